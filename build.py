@@ -3,13 +3,18 @@
 
 import os
 import os.path
+import sys
 import shutil
+import argparse
 import datetime
 import subprocess
 import tarfile
 import json
 
 TIME_STAMP = datetime.datetime.now().strftime("%Y_%m_%d_%H%M")
+# Python versions of the supported Maya releases (2022-2025)
+SUPPORTED_PYTHONS = ("3.9", "3.10", "3.11")
+PACKAGE_NAME = "crudo_sm"
 
 def get_json_value(path='', object_name='', value_name=''):
     """
@@ -59,7 +64,135 @@ def get_git_branch() -> str:
     except subprocess.CalledProcessError:
         return "unknown_branch"
 
-def build() -> None:
+def find_interpreters(pythons=None) -> list:
+    """
+    Interpreters to precompile with: the given paths, otherwise
+    python3.9/3.10/3.11 found on PATH.
+    """
+    if pythons:
+        return pythons
+    found = []
+    for version in SUPPORTED_PYTHONS:
+        path = shutil.which(f"python{version}")
+        if path:
+            found.append(path)
+    return found
+
+
+def compile_package(package_dir, zip_path=None) -> dict:
+    """
+    Runs under the target interpreter. Writes bytecode for every module
+    into __pycache__, and with `zip_path` a zipimport archive holding the
+    same bytecode as legacy .pyc files. The bytecode is hash based and
+    unchecked: release files never change, so it is valid whatever the
+    file times of the installed copy.
+    Returns the module count and the time spent compiling the sources
+    against loading the bytecode.
+    """
+    import importlib.util
+    import marshal
+    import py_compile
+    import time
+    import zipfile
+
+    base_dir = os.path.dirname(package_dir)
+    archive = zipfile.ZipFile(zip_path, "w", zipfile.ZIP_STORED) if zip_path else None
+    modules, compile_time, load_time = 0, 0.0, 0.0
+    try:
+        for directory, dirs, files in os.walk(package_dir):
+            dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+            for name in sorted(files):
+                if not name.endswith(".py"):
+                    continue
+                path = os.path.join(directory, name)
+                relative = os.path.relpath(path, base_dir).replace(os.sep, "/")
+                with open(path, "rb") as f:
+                    source = f.read()
+
+                started = time.perf_counter()
+                compile(source, relative, "exec", dont_inherit=True)
+                compile_time += time.perf_counter() - started
+
+                pyc_path = importlib.util.cache_from_source(path)
+                py_compile.compile(
+                    path,
+                    cfile=pyc_path,
+                    dfile=relative,
+                    doraise=True,
+                    invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH,
+                )
+                with open(pyc_path, "rb") as f:
+                    data = f.read()
+
+                started = time.perf_counter()
+                marshal.loads(data[16:])  # 16 bytes of pyc header
+                load_time += time.perf_counter() - started
+
+                if archive is not None:
+                    archive.writestr(relative[:-3] + ".pyc", data)
+                modules += 1
+    finally:
+        if archive is not None:
+            archive.close()
+
+    return {
+        "version": f"{sys.version_info[0]}.{sys.version_info[1]}",
+        "modules": modules,
+        "compile_ms": compile_time * 1000,
+        "load_ms": load_time * 1000,
+    }
+
+
+def precompile(addon_dir, interpreters, make_zip=False) -> list:
+    """
+    Precompile the package of a build with every interpreter, each one
+    writes its own __pycache__ entries and, with `make_zip`, its own
+    crudo_sm.<cache tag>.zip next to the package.
+    """
+    package_dir = os.path.abspath(os.path.join(addon_dir, PACKAGE_NAME))
+    results = []
+    for python in interpreters:
+        command = [python, os.path.abspath(__file__), "--compile-package", package_dir]
+        if make_zip:
+            command.append("--zip")
+        try:
+            result = subprocess.run(
+                command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True
+            )
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"Warning: could not precompile with {python}: {getattr(e, 'stderr', '') or e}")
+            continue
+        results.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    return results
+
+
+def report(results, make_zip=False) -> None:
+    """
+    Print what precompiling saves where .pyc files can't be written.
+    Times are totals over every module of the package, a startup imports
+    only part of them.
+    """
+    if not results:
+        print(f"No Python {'/'.join(SUPPORTED_PYTHONS)} interpreter found, shipping sources only")
+        return
+    print("Precompiled bytecode:")
+    for result in results:
+        saved = result["compile_ms"] - result["load_ms"]
+        line = (
+            f"  Python {result['version']}: {result['modules']} modules, "
+            f"compile {result['compile_ms']:.0f} ms, load bytecode {result['load_ms']:.0f} ms, "
+            f"~{saved:.0f} ms saved over all modules"
+        )
+        if make_zip:
+            line += f", {result['modules']} file opens -> 1"
+        print(line)
+    done = {result["version"] for result in results}
+    missing = [version for version in SUPPORTED_PYTHONS if version not in done]
+    if missing:
+        print(f"  No bytecode for Python {', '.join(missing)}, it compiles from source")
+
+
+def build(pythons=None, make_zip=False) -> None:
     settings_path = "./src/crudo_sm/settings/config.json"
     addon_name = get_json_value(
         path=settings_path,
@@ -105,10 +238,40 @@ def build() -> None:
     # Clean up the temporary archive
     os.remove(temp_archive_path)
 
+    # Bytecode for every supported Maya Python, picked by cache tag at import
+    results = precompile(addon_dir, find_interpreters(pythons), make_zip)
+    report(results, make_zip)
+
     # Create a zip archive of the new_build directory
     shutil.make_archive(new_build, 'zip', new_build)
 
     return None
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build a ScriptMate release archive.")
+    parser.add_argument(
+        "--python", action="append", dest="pythons", metavar="PATH",
+        help="Interpreter to precompile with, repeatable "
+             f"(default: python{'/'.join(SUPPORTED_PYTHONS)} on PATH)",
+    )
+    parser.add_argument(
+        "--zip", action="store_true", dest="make_zip",
+        help="Also package the bytecode as one zipimport archive per Python version",
+    )
+    # Internal: run by precompile() under each target interpreter
+    parser.add_argument("--compile-package", metavar="DIR", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    build()
+    args = parse_args()
+    if args.compile_package:
+        zip_path = None
+        if args.make_zip:
+            zip_path = os.path.join(
+                os.path.dirname(args.compile_package),
+                f"{PACKAGE_NAME}.{sys.implementation.cache_tag}.zip",
+            )
+        print(json.dumps(compile_package(args.compile_package, zip_path)))
+    else:
+        build(args.pythons, args.make_zip)
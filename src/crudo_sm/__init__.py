@@ -0,0 +1,8 @@
+import os
+
+# Data files (settings, icons) live in the source tree. When the package
+# is imported from a bytecode archive next to it (crudo_sm.<tag>.zip,
+# see build.py) __file__ points inside the archive instead
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+if not os.path.isdir(PACKAGE_DIR):
+    PACKAGE_DIR = os.path.join(os.path.dirname(os.path.dirname(PACKAGE_DIR)), "crudo_sm")
@@ -0,0 +1,356 @@
+# bundle.py
+# -*- coding: utf-8 -*-
+"""
+Single-file library bundles for network deployment.
+A bundle is a zip archive holding the sources of a library at their
+library paths, their bytecode for the Python that built it, and an index
+of the library tree with content digests, shield verdicts and OPERATOR
+literals. A bundle path listed as a library root is mounted from its
+index alone; members are read when a script is imported.
+
+Scripts are imported through BundleLoader, package submodules through
+Python's own zipimport, so `main.py` packages work unchanged.
+
+Usage:
+    python -m crudo_sm.core.bundle /path/to/library library.smbundle
+"""
+import argparse
+import importlib.abc
+import importlib.util
+import json
+import marshal
+import os
+import py_compile
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+import zipimport
+from os.path import join
+
+from crudo_sm.core import shield, requirements
+from crudo_sm.core import loader
+
+BUNDLE_SUFFIX = ".smbundle"
+BUNDLE_VERSION = 1
+INDEX_MEMBER = "__bundle__/index.json"
+PYC_HEADER_SIZE = 16
+
+
+def is_bundle(path):
+    return bool(path) and path.endswith(BUNDLE_SUFFIX) and os.path.isfile(path)
+
+
+def _member(relative_path):
+    return relative_path.replace(os.sep, "/")
+
+
+def _item_member(script, item):
+    """Member path of an indexed script file or package directory."""
+    if script["directory"] in ("", "."):
+        return item
+    return f"{script['directory']}/{item}"
+
+
+def _compile_member(path):
+    """Unchecked hash based bytecode of a file, None when it doesn't compile."""
+    handle, pyc_path = tempfile.mkstemp(suffix=".pyc")
+    os.close(handle)
+    try:
+        py_compile.compile(
+            path,
+            cfile=pyc_path,
+            doraise=True,
+            invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH,
+        )
+        with open(pyc_path, "rb") as f:
+            return f.read()
+    except py_compile.PyCompileError:
+        return None
+    finally:
+        os.remove(pyc_path)
+
+
+def _bundle_node(node, library_dir, archive, stats):
+    """Index entry of a menu node; writes the files of its scripts into `archive`."""
+    scripts = {}
+    for item, entry in node.scripts.items():
+        is_package = os.path.isdir(entry.path)
+        files = []
+        if is_package:
+            for directory, dirs, names in os.walk(entry.path):
+                dirs[:] = sorted(
+                    d for d in dirs if not d.startswith((".", loader.MenuAliases.EXC.value))
+                )
+                files.extend(join(directory, name) for name in sorted(names) if not name.startswith("."))
+        else:
+            files.append(entry.path)
+
+        for path in files:
+            member = _member(os.path.relpath(path, library_dir))
+            archive.write(path, member)
+            if path.endswith(loader.MenuAliases.EXT.value):
+                data = _compile_member(path)
+                if data is not None:
+                    # Legacy layout next to the source, as zipimport looks it up
+                    archive.writestr(member[:-3] + ".pyc", data)
+            stats["files"] += 1
+
+        main_path = join(entry.path, loader.MenuAliases.MAIN_PACK.value) if is_package else entry.path
+        verdict = shield.inspect_item(entry.path)
+        try:
+            operator_node = shield.find_operator(main_path)
+        except (OSError, SyntaxError, ValueError):
+            operator_node = None
+        scripts[item] = {
+            "directory": _member(os.path.relpath(entry.directory, library_dir)),
+            "digest": entry.digest,
+            "package": is_package,
+            "verdict": {
+                "status": verdict.status.value,
+                "unsafe_imports": verdict.unsafe_imports,
+                "reason": verdict.reason,
+                "error": verdict.error,
+            },
+            "operator": verdict.operator or {},
+            "requirements": shield.operator_requirements(operator_node) if operator_node else {},
+        }
+        stats["scripts"] += 1
+
+    return {
+        "item": node.item,
+        "name": node.name,
+        "category": node.category,
+        "scripts": scripts,
+        "children": {
+            item: _bundle_node(child, library_dir, archive, stats)
+            for item, child in node.children.items()
+        },
+    }
+
+
+def build(library_dir, bundle_path, depth=None):
+    """
+    Write the bundle of a library directory, the shield pass runs here
+    once instead of on every machine. Returns script and file counts.
+    """
+    from crudo_sm.core import scanner
+    library_dir = os.path.abspath(library_dir)
+    tree = scanner.scan_root(scanner.LibraryRoot("bundle", library_dir), depth or scanner.SCAN_DEPTH)
+    stats = {"scripts": 0, "files": 0}
+
+    tmp_path = f"{bundle_path}.tmp"
+    with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as archive:
+        index = {
+            "version": BUNDLE_VERSION,
+            "cache_tag": sys.implementation.cache_tag,
+            "time": time.time(),
+            "default": _bundle_node(tree.default, library_dir, archive, stats),
+            "menus": {
+                item: _bundle_node(node, library_dir, archive, stats)
+                for item, node in tree.menus.items()
+            },
+        }
+        archive.writestr(INDEX_MEMBER, json.dumps(index))
+    os.replace(tmp_path, bundle_path)
+    return stats
+
+
+class Bundle:
+    """
+        A mounted bundle: the archive directory and the index, members
+        are read on demand
+    """
+
+    def __init__(self, path):
+        self.path = path
+        stat = os.stat(path)
+        self.signature = (stat.st_mtime_ns, stat.st_size)
+        self.lock = threading.Lock()
+        self.archive = zipfile.ZipFile(path, "r")
+        self.index = json.loads(self.archive.read(INDEX_MEMBER))
+        if self.index.get("version") != BUNDLE_VERSION:
+            self.archive.close()
+            raise ValueError(f"unsupported bundle version {self.index.get('version')}")
+        self.scripts = {}   # member of the item -> index entry
+        for node in [self.index["default"], *self.index["menus"].values()]:
+            self._collect(node)
+
+    def _collect(self, node):
+        for item, script in node["scripts"].items():
+            member = _item_member(script, item)
+            self.scripts[member] = script
+        for child in node["children"].values():
+            self._collect(child)
+
+    def close(self):
+        with self.lock:
+            self.archive.close()
+
+    def read(self, member):
+        with self.lock:
+            return self.archive.read(member)
+
+    def has(self, member):
+        try:
+            self.archive.getinfo(member)
+        except KeyError:
+            return False
+        return True
+
+    def directory(self, relative_dir):
+        """Virtual path of a bundle directory, as zipimport understands it."""
+        if relative_dir in ("", "."):
+            return self.path
+        return join(self.path, *relative_dir.split("/"))
+
+    def is_package(self, member):
+        script = self.scripts.get(member)
+        return bool(script and script["package"])
+
+    def verdict(self, member):
+        """Verdict of the bundle build, or EXCLUDED by requirements this host doesn't meet."""
+        script = self.scripts.get(member)
+        if script is None:
+            return shield.Verdict(shield.Status.INVALID, "-", "Not in bundle", member)
+        unmet = requirements.unmet(script["requirements"])
+        if unmet:
+            return shield.Verdict(shield.Status.EXCLUDED, "-", unmet, "-")
+        found = script["verdict"]
+        return shield.Verdict(
+            shield.Status(found["status"]),
+            found["unsafe_imports"],
+            found["reason"],
+            found["error"],
+            None,
+            script["operator"] or None,
+        )
+
+    def code(self, member, origin):
+        """Code object of a source member, from its bytecode when it matches this Python."""
+        pyc_member = member[:-3] + ".pyc"
+        if self.has(pyc_member):
+            data = self.read(pyc_member)
+            if data[:4] == importlib.util.MAGIC_NUMBER:
+                return marshal.loads(data[PYC_HEADER_SIZE:])
+        return compile(self.read(member), origin, "exec", dont_inherit=True)
+
+    def spec(self, module_name, member, is_package):
+        """Module spec of a bundled script or `main.py` package."""
+        origin = self.directory(member)
+        if is_package:
+            main = loader.MenuAliases.MAIN_PACK.value
+            spec = importlib.util.spec_from_loader(
+                module_name,
+                BundleLoader(self, f"{member}/{main}", True),
+                origin=join(origin, main),
+                is_package=True,
+            )
+            # Submodules are found by zipimport under the package directory
+            spec.submodule_search_locations = [origin]
+        else:
+            spec = importlib.util.spec_from_loader(
+                module_name, BundleLoader(self, member, False), origin=origin
+            )
+        spec.has_location = True   # Sets __file__, as for file based scripts
+        return spec
+
+
+class BundleLoader(importlib.abc.InspectLoader):
+    """Loads one bundled script; get_source keeps tracebacks readable."""
+
+    def __init__(self, bundle, member, is_package):
+        self.bundle = bundle
+        self.member = member
+        self.package = is_package
+
+    def is_package(self, fullname):
+        return self.package
+
+    def get_source(self, fullname):
+        return importlib.util.decode_source(self.bundle.read(self.member))
+
+    def get_code(self, fullname):
+        return self.bundle.code(self.member, self.bundle.directory(self.member))
+
+
+_mounts = {}
+_mounts_lock = threading.Lock()
+
+
+def mount(path):
+    """The mounted bundle at `path`, opened again when the file was replaced."""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    with _mounts_lock:
+        bundle = _mounts.get(path)
+        if bundle is not None and bundle.signature == (stat.st_mtime_ns, stat.st_size):
+            return bundle
+        if bundle is not None:
+            bundle.close()
+            # zipimport keeps the directory of the previous file
+            zipimport._zip_directory_cache.pop(path, None)
+            for entry in [entry for entry in sys.path_importer_cache if entry.startswith(path)]:
+                del sys.path_importer_cache[entry]
+        bundle = _mounts[path] = Bundle(path)
+    return bundle
+
+
+def find(item_path):
+    """(bundle, member) of a path inside a mounted bundle, or (None, None)."""
+    with _mounts_lock:
+        for path, bundle in _mounts.items():
+            if item_path.startswith(path + os.sep):
+                return bundle, _member(os.path.relpath(item_path, path))
+    return None, None
+
+
+def _tree_node(data, bundle, root):
+    from crudo_sm.core.scanner import MenuNode, ScriptEntry
+    node = MenuNode(data["item"], data["name"], data["category"])
+    for item, script in data["scripts"].items():
+        entry = ScriptEntry(item, bundle.directory(script["directory"]), root, script["digest"])
+        member = _item_member(script, item)
+        entry.verdict = bundle.verdict(member)
+        entry.operator = script["operator"]
+        node.scripts[item] = entry
+    for item, child in data["children"].items():
+        node.children[item] = _tree_node(child, bundle, root)
+    return node
+
+
+def scan_bundle(root):
+    """LibraryTree of a bundle root from its index, entries already carry their verdicts."""
+    from crudo_sm.core.scanner import LibraryTree
+    tree = LibraryTree()
+    tree.roots.append((root, tree))
+    bundle = mount(root.path)
+    tree.default = _tree_node(bundle.index["default"], bundle, root)
+    tree.menus = {
+        item: _tree_node(node, bundle, root) for item, node in bundle.index["menus"].items()
+    }
+    return tree
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bundle a ScriptMate library into one file.")
+    parser.add_argument("library", help="Library root directory")
+    parser.add_argument("output", help=f"Bundle file to write (*{BUNDLE_SUFFIX})")
+    parser.add_argument("--depth", type=int, default=None, help="Maximum folder depth")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.library):
+        parser.error(f"not a directory: {args.library}")
+    output = args.output if args.output.endswith(BUNDLE_SUFFIX) else args.output + BUNDLE_SUFFIX
+    started = time.perf_counter()
+    stats = build(args.library, output, args.depth)
+    print(
+        f"{output}: {stats['scripts']} scripts, {stats['files']} files "
+        f"({time.perf_counter() - started:.1f}s)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+# chains.py
+# -*- coding: utf-8 -*-
+"""
+Script chains: named, ordered lists of library scripts run as one batch.
+Chains are written by hand in the local config:
+
+    "chains": [
+        {
+            "name": "Export Prep",
+            "steps": ["menu_Rig/cleanup.py", "menu_Rig/sub_Tools_Names/rename.py"]
+        }
+    ]
+
+A step is the path of a script or package relative to its library root,
+or a script id. Every step is imported before the first one runs, so a
+missing or broken script stops the chain before the scene is touched.
+The caller wraps the run in `batch(name)`, in Maya a single undo chunk
+with the viewport refresh suspended.
+"""
+import os
+import time
+from collections import namedtuple
+from contextlib import nullcontext
+
+from crudo_sm.core.metrics import Metrics
+from crudo_sm.core.registry import ScriptRegistry
+
+Chain = namedtuple("Chain", ["name", "steps"])
+
+
+class ChainError(Exception):
+    """A chain stopped; `timings` holds the (step, seconds) of the steps which ran."""
+
+    def __init__(self, message, timings=()):
+        super().__init__(message)
+        self.timings = list(timings)
+
+
+def load_chains(data):
+    """Chains of a local config, malformed entries are left out."""
+    chains = []
+    for chain in (data or {}).get("chains") or []:
+        if isinstance(chain, dict) and chain.get("name") and isinstance(chain.get("steps"), list):
+            chains.append(Chain(str(chain["name"]), [str(step) for step in chain["steps"]]))
+    return chains
+
+
+def find_chain(data, name):
+    for chain in load_chains(data):
+        if chain.name == name:
+            return chain
+    return None
+
+
+def script_ids_by_path(roots):
+    """Library relative path ("menu_Rig/cleanup.py") -> script id of every registered script."""
+    found = {}
+    for record in ScriptRegistry.records():
+        for _, root_path in roots:
+            relative = os.path.relpath(record.path, root_path)
+            if not relative.startswith(".."):
+                found.setdefault(relative.replace(os.sep, "/"), record.script_id)
+                break
+    return found
+
+
+def resolve(chain, roots):
+    """[(step, script id, module)] of a chain, every step imported."""
+    by_path = script_ids_by_path(roots)
+    resolved = []
+    for step in chain.steps:
+        script_id = step if ScriptRegistry.get(step) else by_path.get(step.strip("/"))
+        if script_id is None:
+            raise ChainError(f"unknown script {step}")
+        module = ScriptRegistry.resolve(script_id)
+        if module is None:
+            raise ChainError(f"script is not available: {step}")
+        resolved.append((step, script_id, module))
+    return resolved
+
+
+def run_chain(chain, roots, batch=None, usage=None):
+    """
+    Run every step of `chain` in order inside `batch(chain.name)`.
+    Returns the (step, seconds) timings; raises ChainError when a step
+    can't be imported or fails, the steps before it stay applied.
+    """
+    steps = resolve(chain, roots)
+    timings = []
+    with (batch or (lambda name: nullcontext()))(chain.name):
+        for step, script_id, module in steps:
+            started = time.perf_counter()
+            try:
+                module.execute()
+            except Exception as e:
+                raise ChainError(f"{step} failed: {e}", timings) from e
+            finally:
+                elapsed = time.perf_counter() - started
+                Metrics.observe("scriptmate_chain_step_duration_seconds", elapsed)
+            timings.append((step, elapsed))
+
+    if usage is not None:
+        for _, script_id, _ in steps:
+            usage.record(script_id)
+    return timings
+
+
+def format_timings(timings):
+    """"cleanup.py 0.120s, rename.py 0.031s (total 0.151s)"."""
+    steps = ", ".join(f"{os.path.basename(step.rstrip('/'))} {seconds:.3f}s" for step, seconds in timings)
+    return f"{steps} (total {sum(seconds for _, seconds in timings):.3f}s)"
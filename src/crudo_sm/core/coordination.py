@@ -0,0 +1,258 @@
+# coordination.py
+# -*- coding: utf-8 -*-
+"""
+Library scans shared between the Maya sessions of one workstation.
+Sessions meet in a local SQLite database in WAL mode. The first session
+to scan a root takes a lease on it and publishes the scanned tree, the
+others wait for that tree instead of walking the library again. Shield
+verdicts are published by path and content digest, so each file is
+inspected once per workstation and host version.
+
+The owner renews its lease while it scans; a session that dies mid-scan
+stops renewing, its lease runs out and the next session takes over.
+Any database problem falls back to scanning locally.
+"""
+import getpass
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import closing
+from pathlib import Path
+
+from crudo_sm.core.metrics import Metrics
+
+SCHEMA_VERSION = 1
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS leases ("
+    " key TEXT PRIMARY KEY, owner TEXT NOT NULL, started REAL NOT NULL, expires REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS scans ("
+    " key TEXT PRIMARY KEY, started REAL NOT NULL, payload TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS verdicts ("
+    " path TEXT NOT NULL, digest TEXT NOT NULL, host TEXT NOT NULL, payload TEXT NOT NULL,"
+    " PRIMARY KEY (path, digest, host))",
+)
+POLL_INTERVAL = 0.1
+
+
+def default_path():
+    """
+    Database in the local temp folder: home directories are often on
+    NFS, where WAL mode does not work and locking is unreliable.
+    """
+    try:
+        user = getpass.getuser()
+    except (KeyError, OSError, ImportError):
+        user = str(os.getpid())
+    return Path(tempfile.gettempdir()) / f"scriptmate-{user}" / "sessions.db"
+
+
+class ScanCoordinator:
+    """
+        Leases and published results in the workstation database.
+        Every call opens its own connection, scans run in threads.
+    """
+    _instance = None
+
+    @staticmethod
+    def get_instance(config=None):
+        if ScanCoordinator._instance is None:
+            if config is None:
+                raise ValueError(
+                    "ScanCoordinator instance is not initialized and no config provided."
+                )
+            ScanCoordinator._instance = ScanCoordinator(config)
+        return ScanCoordinator._instance
+
+    def __init__(self, config):
+        if ScanCoordinator._instance is not None:
+            raise RuntimeError("Use `get_instance` to access the ScanCoordinator.")
+
+        self.enabled = bool(config.get_core_param("coordination", "state"))
+        configured = config.get_core_param("coordination", "path")
+        self.path = Path(configured).expanduser() if configured else default_path()
+        self.wait = (config.get_core_param("coordination", "wait_ms") or 10000) / 1000.0
+        self.max_age = (config.get_core_param("coordination", "max_age_ms") or 10000) / 1000.0
+        self.lease = (config.get_core_param("coordination", "lease_ms") or 5000) / 1000.0
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._ready = False
+        self._ready_lock = threading.Lock()
+
+    def _connect(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(str(self.path), timeout=5.0, isolation_level=None)
+        try:
+            with self._ready_lock:
+                if not self._ready:
+                    self._prepare(connection)
+                    self._ready = True
+        except BaseException:
+            connection.close()
+            raise
+        return closing(connection)
+
+    def _prepare(self, connection):
+        """WAL mode and tables, recreated when written by another schema version."""
+        connection.execute("PRAGMA journal_mode=WAL")
+        # Checked inside the write lock, sessions starting together prepare once
+        connection.execute("BEGIN IMMEDIATE")
+        if connection.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            for table in ("leases", "scans", "verdicts"):
+                connection.execute(f"DROP TABLE IF EXISTS {table}")
+            for statement in SCHEMA:
+                connection.execute(statement)
+            connection.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        connection.execute("COMMIT")
+
+    def share(self, key, produce, max_age=None, report=print):
+        """
+        Payload (a string) of `produce()` for `key`, made here or by
+        another session. A payload published at most `max_age` seconds
+        before this call is reused and a running scan which started in
+        that window is waited for, up to `wait` seconds; otherwise this
+        session scans, holding the lease when nobody else does.
+        Problems go to `report`, scan threads must not print.
+        """
+        if not self.enabled:
+            return produce()
+        max_age = self.max_age if max_age is None else max_age
+        try:
+            oldest = time.time() - max_age
+            give_up = time.monotonic() + self.wait
+            while True:
+                payload, role = self._claim(key, oldest, time.monotonic() >= give_up)
+                if payload is not None:
+                    Metrics.inc("scriptmate_scan_coordination_total", result="reused")
+                    return payload
+                if role is not None:
+                    break
+                time.sleep(POLL_INTERVAL)
+        except (OSError, sqlite3.Error) as e:
+            report(f"ScriptMate: scan coordination unavailable, scanning alone: {e}")
+            Metrics.inc("scriptmate_scan_coordination_total", result="error")
+            return produce()
+
+        Metrics.inc("scriptmate_scan_coordination_total", result=role)
+        started = time.time()
+        stop = threading.Event()
+        if role == "leader":
+            threading.Thread(
+                target=self._renew, args=(key, stop), name="ScriptMateLease", daemon=True
+            ).start()
+        try:
+            payload = produce()
+        finally:
+            stop.set()
+            if role == "leader":
+                self._release(key)
+        self._publish(key, started, payload, report)
+        return payload
+
+    def _claim(self, key, oldest, alone):
+        """
+        (payload, None) for a fresh result, (None, role) when this session
+        has to scan, as "leader" or "alone", (None, None) to keep waiting.
+        """
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = connection.execute(
+                    "SELECT started, payload FROM scans WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[0] >= oldest:
+                    return row[1], None
+
+                now = time.time()
+                lease = connection.execute(
+                    "SELECT started, expires FROM leases WHERE key = ?", (key,)
+                ).fetchone()
+                if lease is None or lease[1] < now:
+                    # Free, or left behind by a session which died mid-scan
+                    connection.execute(
+                        "INSERT OR REPLACE INTO leases (key, owner, started, expires) VALUES (?, ?, ?, ?)",
+                        (key, self.owner, now, now + self.lease),
+                    )
+                    return None, "leader"
+                if alone or lease[0] < oldest:
+                    # Waited long enough, or its result would be too old anyway
+                    return None, "alone"
+                return None, None
+            finally:
+                connection.execute("COMMIT")
+
+    def _renew(self, key, stop):
+        while not stop.wait(self.lease / 3.0):
+            try:
+                with self._connect() as connection:
+                    connection.execute(
+                        "UPDATE leases SET expires = ? WHERE key = ? AND owner = ?",
+                        (time.time() + self.lease, key, self.owner),
+                    )
+            except sqlite3.Error:
+                pass   # Expires on its own, a follower scans
+
+    def _release(self, key):
+        try:
+            with self._connect() as connection:
+                connection.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, self.owner))
+        except sqlite3.Error:
+            pass
+
+    def _publish(self, key, started, payload, report=print):
+        try:
+            with self._connect() as connection:
+                # Never replace a result of a scan which started later
+                connection.execute(
+                    "INSERT INTO scans (key, started, payload) VALUES (?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET started = excluded.started, payload = excluded.payload "
+                    "WHERE excluded.started > scans.started",
+                    (key, started, payload),
+                )
+        except sqlite3.Error as e:
+            report(f"ScriptMate: could not publish scan: {e}")
+
+    def load_verdicts(self, keys, host):
+        """{(path, digest): payload} of the verdicts published for `host`."""
+        if not self.enabled or not keys:
+            return {}
+        found = {}
+        try:
+            with self._connect() as connection:
+                for path, digest in keys:
+                    row = connection.execute(
+                        "SELECT payload FROM verdicts WHERE path = ? AND digest = ? AND host = ?",
+                        (path, digest, host),
+                    ).fetchone()
+                    if row is not None:
+                        found[(path, digest)] = row[0]
+        except (OSError, sqlite3.Error):
+            return {}
+        return found
+
+    def store_verdicts(self, payloads, host):
+        """Publish {(path, digest): payload} for sessions on the same `host`."""
+        if not self.enabled or not payloads:
+            return
+        try:
+            with self._connect() as connection:
+                connection.execute("BEGIN IMMEDIATE")
+                # Verdicts of earlier contents of the same files are dead
+                connection.executemany(
+                    "DELETE FROM verdicts WHERE path = ? AND host = ? AND digest != ?",
+                    [(path, host, digest) for path, digest in payloads],
+                )
+                connection.executemany(
+                    "INSERT OR REPLACE INTO verdicts (path, digest, host, payload) VALUES (?, ?, ?, ?)",
+                    [(path, digest, host, payload) for (path, digest), payload in payloads.items()],
+                )
+                connection.execute("COMMIT")
+        except (OSError, sqlite3.Error):
+            pass
+
+
+def host_key(host):
+    """Verdicts depend on the requirements of the host they were made for."""
+    return json.dumps(host, sort_keys=True)
@@ -0,0 +1,287 @@
+# import_graph.py
+# -*- coding: utf-8 -*-
+"""
+Intra-package import graph for script packages (main.py + submodules).
+Module names are relative to the package directory: "main", "helpers",
+"sub" for sub/__init__.py, "sub.util" for sub/util.py.
+"""
+import ast
+import os
+import sys
+import types
+from collections import deque
+
+MAIN_MODULE = "main"
+
+
+def relative_name(package_dir, file_path):
+    """Relative dotted module name of a python file inside a package."""
+    rel = os.path.relpath(file_path, package_dir)[:-3].replace(os.sep, ".")
+    return rel[:-len(".__init__")] if rel.endswith(".__init__") else rel
+
+
+def file_signature(file_path):
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class ImportGraph:
+    """
+        module -> set of package modules it imports,
+        built from the AST during the shield pass
+    """
+
+    def __init__(self, package_name, files=None):
+        self.package_name = package_name
+        self.files = files or {}   # module -> source file path
+        self.edges = {name: set() for name in self.files}
+
+    @classmethod
+    def from_trees(cls, package_dir, trees):
+        """Build the graph from {file path: parsed ast} of every package file."""
+        graph = cls(
+            os.path.basename(os.path.normpath(package_dir)),
+            {relative_name(package_dir, path): path for path in trees},
+        )
+        for path, tree in trees.items():
+            name = relative_name(package_dir, path)
+            is_init = os.path.basename(path) == "__init__.py"
+            for target in graph._imports(name, is_init, tree):
+                if target != name:
+                    graph.edges[name].add(target)
+        return graph
+
+    def to_dict(self):
+        return {
+            "package_name": self.package_name,
+            "files": self.files,
+            "edges": {name: sorted(targets) for name, targets in self.edges.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        graph = cls(data["package_name"], dict(data["files"]))
+        graph.edges = {name: set(targets) for name, targets in data["edges"].items()}
+        return graph
+
+    def _resolve(self, dotted, names=()):
+        """Map an imported dotted name (plus `from` names) to package modules."""
+        found = set()
+        for name in names:
+            candidate = f"{dotted}.{name}" if dotted else name
+            if candidate in self.files:
+                found.add(candidate)
+        if not found:
+            parts = dotted.split(".") if dotted else []
+            while parts:
+                candidate = ".".join(parts)
+                if candidate in self.files:
+                    found.add(candidate)
+                    break
+                parts.pop()
+        return found
+
+    def _imports(self, name, is_init, tree):
+        package_parts = name.split(".") if is_init else name.split(".")[:-1]
+        if name == MAIN_MODULE:
+            package_parts = []
+        prefix = f"{self.package_name}."
+
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ImportFrom):
+                names = [alias.name for alias in node.names]
+                if node.level:
+                    # Relative import, resolved against the importing package
+                    base = package_parts[:len(package_parts) - (node.level - 1)]
+                    dotted = ".".join(base + ([node.module] if node.module else []))
+                    yield from self._resolve(dotted, names)
+                elif node.module and (node.module + ".").startswith(prefix):
+                    yield from self._resolve(node.module[len(prefix):], names)
+                elif node.module == self.package_name:
+                    yield from self._resolve("", names)
+            elif isinstance(node, ast.Import):
+                for alias in node.names:
+                    if alias.name.startswith(prefix):
+                        yield from self._resolve(alias.name[len(prefix):])
+
+    def importers(self):
+        """Reverse edges: module -> modules importing it."""
+        reverse = {name: set() for name in self.edges}
+        for name, targets in self.edges.items():
+            for target in targets:
+                reverse.setdefault(target, set()).add(name)
+        return reverse
+
+    def affected(self, changed):
+        """
+        Changed modules and all their transitive importers, in topological
+        order: every module comes before the modules importing it.
+        """
+        reverse = self.importers()
+        affected = set()
+        queue = deque(name for name in changed if name in reverse)
+        affected.update(queue)
+        while queue:
+            for importer in reverse.get(queue.popleft(), ()):
+                if importer not in affected:
+                    affected.add(importer)
+                    queue.append(importer)
+        return self.topological_order(affected)
+
+    def topological_order(self, names):
+        """Order `names` dependencies-first; import cycles keep a stable order."""
+        names = set(names)
+        order = []
+        state = {}
+
+        def visit(name):
+            if state.get(name):
+                return
+            state[name] = True
+            for target in sorted(self.edges.get(name, ())):
+                if target in names:
+                    visit(target)
+            order.append(name)
+
+        for name in sorted(names):
+            visit(name)
+        return order
+
+
+def stale_submodules(module):
+    """Submodules bound as attributes of `module` which are not the loaded ones."""
+    if module is None:
+        return []
+    prefix = f"{module.__name__}."
+    return [
+        value.__name__ for attribute, value in list(vars(module).items())
+        if isinstance(value, types.ModuleType)
+        and value.__name__ == f"{prefix}{attribute}"
+        and sys.modules.get(value.__name__) is not value
+    ]
+
+
+class PackageState:
+    __slots__ = ("module_name", "package_dir", "alias", "graph", "signatures")
+
+    def __init__(self, module_name, package_dir, alias, graph):
+        self.module_name = module_name
+        self.package_dir = package_dir
+        self.alias = alias
+        self.graph = graph
+        self.signatures = {}
+
+    def prefixes(self):
+        return [self.module_name] + ([self.alias] if self.alias else [])
+
+    def relative(self, qualified):
+        """Relative module name of a sys.modules name of this package."""
+        for prefix in self.prefixes():
+            if qualified.startswith(f"{prefix}."):
+                return qualified[len(prefix) + 1:]
+        return None
+
+    def loaded_submodules(self):
+        """(relative name, sys.modules name) of loaded submodules of this package."""
+        loaded = []
+        for prefix in self.prefixes():
+            start = f"{prefix}."
+            for name in self.graph.files:
+                qualified = f"{start}{name}"
+                if name != MAIN_MODULE and qualified in sys.modules:
+                    loaded.append((name, qualified))
+        return loaded
+
+
+class PackageReloader:
+    """
+        Reloads only the part of a package affected by a change:
+        changed submodules and their importers are dropped, the rest
+        stays in sys.modules and is reused by the next import of main.py
+    """
+    _packages = {}
+    _retained = {}
+
+    @classmethod
+    def register(cls, module_name, package_dir, alias, graph):
+        """
+        Record a freshly executed package. Returns the names of retained
+        submodules whose source changed after they were loaded (stale).
+        """
+        previous = cls._packages.get(module_name)
+        state = PackageState(module_name, package_dir, alias, graph)
+        retained = cls._retained.pop(module_name, set())
+
+        for name, path in graph.files.items():
+            state.signatures[name] = file_signature(path)
+
+        # Verify against the new graph: a retained submodule must still
+        # exist and be exactly the source it was loaded from, and the
+        # submodules bound on it must be the loaded ones
+        stale = []
+        for qualified in retained:
+            name = previous.relative(qualified) if previous else None
+            if (
+                name not in graph.files
+                or previous.signatures.get(name) != state.signatures[name]
+                or stale_submodules(sys.modules.get(qualified))
+            ):
+                stale.append(qualified)
+
+        cls._packages[module_name] = state
+        return stale
+
+    @classmethod
+    def retained(cls, module_name):
+        return cls._retained.get(module_name, set())
+
+    @classmethod
+    def forget(cls, module_name):
+        cls._packages.pop(module_name, None)
+        cls._retained.pop(module_name, None)
+
+    @classmethod
+    def invalidate_changed(cls, scanned):
+        """
+        Compare every loaded package with its file signatures in `scanned`
+        ({package directory: {module: signature}}, read by the library
+        scan) and decide which submodules may stay loaded. Packages the
+        scan did not read (gone, or their library came from a snapshot)
+        are reloaded in full. Returns the names to keep.
+        """
+        from crudo_sm.core.module_tracker import ModuleTracker
+
+        keep = set()
+        for module_name, state in list(cls._packages.items()):
+            current = scanned.get(state.package_dir)
+            if current is None:
+                cls.forget(module_name)
+                continue
+
+            changed = {
+                name for name in set(current) | set(state.signatures)
+                if current.get(name) != state.signatures.get(name)
+            }
+            # main.py always runs again, so whatever imports it goes too
+            invalid = set(state.graph.affected(set(changed) | {MAIN_MODULE})) | {MAIN_MODULE}
+            # Drop importers before the modules they import
+            for name in reversed(state.graph.topological_order(invalid)):
+                for prefix in state.prefixes():
+                    ModuleTracker.unload(f"{prefix}.{name}")
+                    # A retained parent package must not hand out the
+                    # old module: `from .sub import deep` reads the attribute
+                    parent, _, attribute = name.rpartition(".")
+                    parent_module = sys.modules.get(f"{prefix}.{parent}") if parent else None
+                    if isinstance(getattr(parent_module, attribute, None), types.ModuleType):
+                        delattr(parent_module, attribute)
+
+            retained = {
+                qualified for name, qualified in state.loaded_submodules()
+                if name not in invalid
+            }
+            cls._retained[module_name] = retained
+            keep |= retained
+        return keep
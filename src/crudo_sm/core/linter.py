@@ -0,0 +1,239 @@
+# linter.py
+# -*- coding: utf-8 -*-
+"""
+Offline library linter.
+Runs the same shield rules as the loader over a whole library tree,
+without Maya, so maintainers can catch blocked or broken scripts early.
+
+Usage:
+    python -m crudo_sm.core.linter /path/to/library --output report.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from os.path import join, isdir, relpath
+from pathlib import Path
+
+from crudo_sm.core import shield
+from crudo_sm.core.loader import MenuAliases
+from crudo_sm.core.traversal import IgnoreRules, Traversal
+
+DEFAULT_CACHE_DIR = "~/crudo.dev/cache/scriptMate/lint"
+CACHE_VERSION = 1
+# Below this amount of stale items a process pool costs more than it saves
+PARALLEL_THRESHOLD = 32
+FAILING_STATUSES = {shield.Status.BLOCKED.value, shield.Status.INVALID.value}
+
+
+def collect_items(root, depth=6):
+    """
+    Walk a library root with the loader's traversal rules and
+    return the paths of every script file and package candidate.
+    `.scriptmateignore` files apply, symlink loops are walked once.
+    """
+    items = []
+    traversal = Traversal()
+
+    def walk(directory, depth, allow_menus, rules):
+        if depth <= 0 or not traversal.enter(directory):
+            return
+        try:
+            entries = sorted(os.scandir(directory), key=lambda e: e.name)
+        except OSError:
+            return
+        rules = rules.child(directory, [entry.name for entry in entries])
+
+        for entry in entries:
+            name = entry.name
+            if name.startswith((".", MenuAliases.EXC.value)):
+                continue
+            is_dir = entry.is_dir()
+            if rules.ignored(entry.path, is_dir):
+                continue
+
+            if name.endswith(MenuAliases.EXT.value) and not is_dir:
+                items.append(entry.path)
+            elif not is_dir:
+                continue
+            elif name.startswith(MenuAliases.MENU.value):
+                if allow_menus:
+                    walk(entry.path, depth - 1, False, rules)
+            elif name.startswith(MenuAliases.SUB.value):
+                if len(name.split(MenuAliases.SEP.value, 2)) == 3:
+                    walk(entry.path, depth - 1, False, rules)
+            else:
+                items.append(entry.path)
+
+    walk(root, depth, True, IgnoreRules())
+    return items
+
+
+def item_signature(item_path):
+    """
+    Cheap change detector for an item: mtime and size of the file,
+    or of every python file inside a package directory.
+    """
+    if not isdir(item_path):
+        stat = os.stat(item_path)
+        return [stat.st_mtime_ns, stat.st_size]
+
+    latest, total, count = 0, 0, 0
+    for directory, dirs, files in os.walk(item_path):
+        dirs[:] = [d for d in dirs if not d.startswith(MenuAliases.EXC.value)]
+        for name in files:
+            if name.endswith(MenuAliases.EXT.value):
+                stat = os.stat(join(directory, name))
+                latest = max(latest, stat.st_mtime_ns)
+                total += stat.st_size
+                count += 1
+    return [latest, total, count]
+
+
+def lint_item(item_path):
+    """Worker entry: run the shield pass on one item and return a plain dict."""
+    verdict = shield.inspect_item(item_path)
+    return {
+        "status": verdict.status.value,
+        "unsafe_imports": verdict.unsafe_imports,
+        "reason": verdict.reason,
+        "error": verdict.error,
+    }
+
+
+def default_cache_path(root):
+    digest = hashlib.sha1(os.path.abspath(root).encode("utf-8")).hexdigest()[:12]
+    return Path(DEFAULT_CACHE_DIR).expanduser() / f"{digest}.json"
+
+
+def load_cache(cache_path):
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != CACHE_VERSION:
+        return {}
+    return data.get("items", {})
+
+
+def save_cache(cache_path, items):
+    """Write the cache next to its final location and swap it in atomically."""
+    cache_path = Path(cache_path)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": CACHE_VERSION, "items": items}, f)
+    os.replace(tmp_path, cache_path)
+
+
+def lint_library(root, jobs=None, cache_path=None, depth=6):
+    """
+    Lint every item under root.
+    Items whose signature matches the cache are not analysed again.
+    Returns the report dictionary.
+    """
+    started = time.perf_counter()
+    root = os.path.abspath(os.path.expanduser(root))
+    cache = load_cache(cache_path) if cache_path else {}
+
+    results = {}
+    stale = []
+    for item_path in collect_items(root, depth):
+        key = relpath(item_path, root)
+        try:
+            signature = item_signature(item_path)
+        except OSError as e:
+            results[key] = {
+                "status": shield.Status.INVALID.value,
+                "unsafe_imports": "-",
+                "reason": "Unreadable",
+                "error": str(e),
+                "signature": None,
+            }
+            continue
+
+        cached = cache.get(key)
+        if cached and cached.get("signature") == signature:
+            results[key] = cached
+        else:
+            stale.append((key, item_path, signature))
+
+    paths = [item_path for _, item_path, _ in stale]
+    if len(paths) >= PARALLEL_THRESHOLD and jobs != 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            chunksize = max(1, len(paths) // ((jobs or os.cpu_count() or 1) * 4))
+            verdicts = list(executor.map(lint_item, paths, chunksize=chunksize))
+    else:
+        verdicts = [lint_item(item_path) for item_path in paths]
+
+    for (key, _, signature), verdict in zip(stale, verdicts):
+        verdict["signature"] = signature
+        results[key] = verdict
+
+    if cache_path:
+        save_cache(cache_path, results)
+
+    summary = {status.value: 0 for status in shield.Status}
+    for verdict in results.values():
+        summary[verdict["status"]] += 1
+    summary["total"] = len(results)
+    summary["analysed"] = len(stale)
+    summary["cached"] = len(results) - len(stale)
+
+    return {
+        "root": root,
+        "generated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "duration": round(time.perf_counter() - started, 3),
+        "summary": summary,
+        "items": [
+            {"path": key, **{k: v for k, v in verdict.items() if k != "signature"}}
+            for key, verdict in sorted(results.items())
+        ],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="crudo_sm.core.linter",
+        description="Lint a ScriptMate library with the same shield rules as the loader.",
+    )
+    parser.add_argument("root", help="Library root directory")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("-o", "--output", default="-", help="Report file, '-' for stdout")
+    parser.add_argument("--cache", default=None, help="Cache file (default: per-root file in ~/crudo.dev)")
+    parser.add_argument("--no-cache", action="store_true", help="Analyse every item from scratch")
+    parser.add_argument("--depth", type=int, default=6, help="Maximum traversal depth")
+    args = parser.parse_args(argv)
+
+    if not isdir(os.path.expanduser(args.root)):
+        parser.error(f"not a directory: {args.root}")
+
+    cache_path = None
+    if not args.no_cache:
+        cache_path = args.cache or default_cache_path(args.root)
+
+    report = lint_library(args.root, jobs=args.jobs, cache_path=cache_path, depth=args.depth)
+    payload = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(payload)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload + "\n")
+
+    summary = report["summary"]
+    failed = sum(summary[status] for status in FAILING_STATUSES)
+    print(
+        f"ScriptMate lint: {summary['total']} items, {failed} failing, "
+        f"{summary['cached']} cached, {report['duration']}s",
+        file=sys.stderr,
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,18 +4,26 @@ from os.path import (
     join,
     isdir,
     dirname,
-    exists,
-    basename,
 )
 import sys
+import builtins
 from os import listdir
+import importlib.abc
 import importlib.util as pymod
-import traceback
+import time
 from enum import Enum
 from crudo_sm.core import shield
+from crudo_sm.core import requirements
+from crudo_sm.core import bundle
 from crudo_sm.core import logging
+from crudo_sm.core.traversal import IgnoreRules
 from crudo_sm.settings.common import CONFIG
 from crudo_sm.core.module_tracker import ModuleTracker
+from crudo_sm.core.registry import ScriptRegistry
+from crudo_sm.core.import_graph import PackageReloader
+from crudo_sm.core.quarantine import Quarantine
+from crudo_sm.core.trial import TrialRunner
+from crudo_sm.core.metrics import Metrics
 
 class MenuAliases(Enum):
     MENU = 'menu_'
@@ -26,6 +34,259 @@ class MenuAliases(Enum):
     MAIN_PACK = 'main.py'
 
 
+def is_module_candidate(item, item_path):
+    """Files and plain directories are module candidates, menu folders are not."""
+    return item.endswith(MenuAliases.EXT.value) or (
+        isdir(item_path) and not item.startswith(MenuAliases.MENU.value)
+        and not item.startswith(MenuAliases.SUB.value)
+    )
+
+
+def module_name_for(directory, item):
+    """Namespaced module name, which is also the script id, of a library item."""
+    user_module_name = item[:-3] if item.endswith(MenuAliases.EXT.value) else item
+    return f"{ModuleTracker.namespace_for(directory)}.{user_module_name}"
+
+
+def item_digest(item_path):
+    """Content digest of a script or package on disk, None when unreadable."""
+    from crudo_sm.core.scanner import content_digest  # The scanner imports this module
+    try:
+        return content_digest(item_path)
+    except OSError:
+        return None
+
+
+class PackageImports(importlib.abc.MetaPathFinder):
+    """
+        Absolute imports of a library package by its own bare name
+        (`import tools.utils` inside `tools`), resolved to the package's
+        namespace. Nothing is registered under the bare name, so equal
+        package names in other menus never see each other: the package
+        modules get their own `__import__`, and this finder hands it to
+        every submodule it loads.
+    """
+    _finders = {}
+
+    def __init__(self, module_name, bare_name):
+        self.module_name = module_name
+        self.bare_name = bare_name
+        self.builtins = dict(builtins.__dict__, __import__=self._import)
+
+    @classmethod
+    def install(cls, module_name, bare_name):
+        cls.remove(module_name)
+        finder = cls._finders[module_name] = cls(module_name, bare_name)
+        sys.meta_path.insert(0, finder)
+        return finder
+
+    @classmethod
+    def remove(cls, module_name):
+        finder = cls._finders.pop(module_name, None)
+        if finder in sys.meta_path:
+            sys.meta_path.remove(finder)
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level == 0 and (name == self.bare_name or name.startswith(f"{self.bare_name}.")):
+            module = builtins.__import__(
+                self.module_name + name[len(self.bare_name):], globals, locals, fromlist, 0
+            )
+            # `import tools.utils` binds the package, `from tools import x` the module
+            return module if fromlist else sys.modules[self.module_name]
+        return builtins.__import__(name, globals, locals, fromlist, level)
+
+    def find_spec(self, fullname, path=None, target=None):
+        if not fullname.startswith(f"{self.module_name}."):
+            return None
+        for finder in sys.meta_path:
+            if isinstance(finder, PackageImports) or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _PackageModuleLoader(spec.loader, self.builtins)
+                return spec
+        return None
+
+
+class _PackageModuleLoader(importlib.abc.Loader):
+    """Runs a package submodule with the package's `__import__`."""
+
+    def __init__(self, loader, package_builtins):
+        self.loader = loader
+        self.package_builtins = package_builtins
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        module.__dict__["__builtins__"] = self.package_builtins
+        self.loader.exec_module(module)
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+
+def drop_item(module_name):
+    """Unload an item together with package submodules kept for a partial reload."""
+    for name in PackageReloader.retained(module_name):
+        ModuleTracker.unload(name)
+    PackageReloader.forget(module_name)
+    PackageImports.remove(module_name)
+    ModuleTracker.unload(module_name)
+
+
+def load_item(directory, item, module_source="", verdict=None, digest=None):
+    """
+    Check and import a single script file or package directory.
+    The result is logged; returns the module, or None when the item is
+    skipped, blocked or fails to import. A `verdict` from an earlier
+    shield pass over the same content skips the inspection; with the
+    content `digest` the import is timed and failures are counted
+    for the quarantine; quarantined content is never imported.
+    """
+    logger = logging.ScriptManagerLogger.get_instance(CONFIG)
+    quarantine = Quarantine.get_instance(CONFIG)
+    item_path = join(directory, item)
+    has_unsafe_imports = "-"
+    reason = "Initial check"
+    module = None
+
+    """ Module namespace constructor"""
+    # Every library directory gets its own namespace so equal
+    # file names from different menus never collide
+    user_module_name = item[:-3] if item.endswith('.py') else item  # use DIR-NAME for packages
+    namespace = ModuleTracker.namespace_for(directory)
+    module_name = module_name_for(directory, item)
+
+    try:
+        spec = None
+        # Scripts of a mounted library bundle are read from the archive
+        mounted, member = bundle.find(item_path)
+        is_package_main = mounted.is_package(member) if mounted else isdir(item_path)
+        item_path_to_check = join(item_path, MenuAliases.MAIN_PACK.value) if is_package_main else item_path
+
+        """ Static OPERATOR and safety checking"""
+        if verdict is None:
+            verdict = mounted.verdict(member) if mounted else shield.inspect_item(item_path)
+        if verdict.status in (shield.Status.BLOCKED, shield.Status.INVALID):
+            logger.log_module(
+                module_source, item, verdict.unsafe_imports, verdict.reason, verdict.error, item_path, digest
+            )
+            Metrics.inc("scriptmate_imports_total", result=verdict.status.value)
+            drop_item(module_name)
+            return None
+        if verdict.status == shield.Status.EXCLUDED:
+            # Not for this Maya: reported once, kept out of the error buffer
+            requirements.report_once(item_path, verdict.reason)
+            Metrics.inc("scriptmate_imports_total", result=verdict.status.value)
+            drop_item(module_name)
+            return None
+        if verdict.status == shield.Status.IGNORED and is_package_main:
+            # Directories without main.py OPERATOR are not packages
+            drop_item(module_name)
+            return None
+        # A trial import may have ruled it out since the menu was built
+        skipped = TrialRunner.get_instance(CONFIG).settle(digest, item_path)
+        if skipped:
+            logger.log_module(
+                module_source, item, verdict.unsafe_imports, "Quarantined", skipped, item_path, digest,
+            )
+            Metrics.inc("scriptmate_imports_total", result="quarantined")
+            drop_item(module_name)
+            return None
+        has_unsafe_imports = verdict.unsafe_imports
+        reason = verdict.reason
+
+        ModuleTracker.ensure_namespace(namespace)
+        # Drop a previous load of the same item with all its submodules,
+        # except package submodules left untouched by the last change
+        retained = PackageReloader.retained(module_name)
+        ModuleTracker.unload(module_name, keep=retained)
+
+        if is_package_main:
+            if mounted:
+                spec = mounted.spec(module_name, member, is_package=True)
+            else:
+                spec = pymod.spec_from_file_location(
+                    module_name,
+                    item_path_to_check,
+                    submodule_search_locations=[
+                        item_path,
+                    ]  # Enable package imports
+                )
+            module = pymod.module_from_spec(spec)
+            ModuleTracker.track_module(module_name, namespace)
+            ModuleTracker.track_module(f"{module_name}.main", module_name)
+
+            # Register both the package and the main module in sys.modules
+            sys.modules[module_name] = module
+            sys.modules[f"{module_name}.main"] = module
+
+            # Keep absolute imports (`import package.utils`) working
+            # inside this package only
+            module.__dict__["__builtins__"] = PackageImports.install(module_name, user_module_name).builtins
+
+            # Retained submodules are reused, bind them on the fresh package
+            for name in retained:
+                parent, _, attribute = name.rpartition(".")
+                if sys.modules.get(parent) is module and name in sys.modules:
+                    setattr(module, attribute, sys.modules[name])
+        else:
+            # Regular module loading
+            if mounted:
+                spec = mounted.spec(module_name, member, is_package=False)
+            else:
+                spec = pymod.spec_from_file_location(module_name, item_path_to_check)
+            module = pymod.module_from_spec(spec)
+            ModuleTracker.track_module(module_name, namespace)
+            sys.modules[module_name] = module
+
+        """Add to the module"""
+        module.__dict__["unsafe"] = shield.unsafe
+        quarantine.begin(digest, item_path)
+        started = time.perf_counter()
+        try:
+            spec.loader.exec_module(module)
+        finally:
+            quarantine.end()
+            elapsed = time.perf_counter() - started
+            Metrics.observe("scriptmate_import_duration_seconds", elapsed)
+        quarantine.record_import(digest, item_path, elapsed)
+
+        """ Runtime OPERATOR checking"""
+        if not hasattr(module, "OPERATOR") or not isinstance(module.OPERATOR, dict):
+            Metrics.inc("scriptmate_imports_total", result="no_operator")
+            drop_item(module_name)
+            return None
+
+        if is_package_main and verdict.import_graph is not None:
+            stale = PackageReloader.register(module_name, item_path, None, verdict.import_graph)
+            if stale:
+                # A reused submodule no longer matches its source: reload it all
+                print(f"ScriptMate: stale submodules in {item}, reloading package: {', '.join(sorted(stale))}")
+                for name in stale:
+                    ModuleTracker.unload(name)
+                ModuleTracker.unload(module_name)
+                return load_item(directory, item, module_source, digest=digest)
+
+        ScriptRegistry.register(module_name, item_path, module, module_source, digest or "")
+        logger.log_module(module_source, item, has_unsafe_imports, reason, "-", item_path, digest)
+        Metrics.inc("scriptmate_imports_total", result="loaded")
+        return module
+
+    except Exception as e:
+        logger.log_module(
+            module_source, item, has_unsafe_imports, reason, logging.ErrorRecord(e), item_path, digest
+        )
+        Metrics.inc("scriptmate_imports_total", result="failed")
+        if module is not None:
+            ScriptRegistry.mark_failed(module_name)
+            quarantine.record_failure(digest, item_path)
+        drop_item(module_name)
+        return None
+
+
 def load_scripts_and_directories(directory='', module_source="", depth=6, finalize_logs=False):
     """
     Load Python script modules and collect directories for nested menus.
@@ -47,129 +308,23 @@ def load_scripts_and_directories(directory='', module_source="", depth=6, finali
         # Return empty if the path is invalid or depth limit is reached
         return scripts, directories
 
-    for item in listdir(directory):
+    items = listdir(directory)
+    rules = IgnoreRules().child(directory, items)
+    for item in items:
         """ Exclude all files which patern matcher from processing"""
-        has_unsafe_imports = "-"
-        has_unsafe_decorator = False
-        reason = "Initial check"
-        error_message = "-"
-
         if any( item.startswith(pattern) for pattern in exclude_list):
             continue
 
         item_path = join(directory, item)
+        if rules.ignored(item_path, isdir(item_path)):
+            continue
         # print("item_path start loop: ", directory, "ITEM: ",item)
 
         """ Module loading"""
-        if item.endswith(MenuAliases.EXT.value) or (
-            isdir(item_path) and not item.startswith(MenuAliases.MENU.value)
-            and not item.startswith(MenuAliases.SUB.value)
-        ):
-            try:
-                spec = None
-                module = None
-                is_package_main = False
-                item_path_to_check = item_path
-                user_module_name = item[:-3] if item.endswith('.py') else item  # use DIR-NAME for packages
-
-                if isdir(item_path):
-                    main_path = join(item_path, MenuAliases.MAIN_PACK.value)
-                    # print("PACKAGE PATH :", main_path)
-                    if exists(main_path) and shield.has_operator_dictionary(main_path):
-                        item_path_to_check = main_path
-                        is_package_main = True
-
-                        # Package safety check here
-                        is_unsafe = shield.UnsafeModuleChecker(item_path)
-                        unsafe_findings, (has_unsafe_decorator, unsafe_reason) = is_unsafe.check_package()
-
-                        if unsafe_findings:
-                            findings_str = "; ".join(f"{basename(f)}: {i}" for f, i in unsafe_findings.items())
-                            if not has_unsafe_decorator:
-                                logger.log_module(
-                                    module_source,
-                                    item,
-                                    findings_str,
-                                    "Package has unsafe imports",
-                                    'Blocked package without @unsafe decorator'
-                                )
-                                continue
-                            else:
-                                has_unsafe_imports = findings_str
-                                reason = f"@unsafe used ({unsafe_reason})"
-
-
-                        # Skip the regular unsafe check for packages
-                        is_valid, validation_reason, error_message = shield.validate_module(item_path_to_check)
-                        if not is_valid:
-                            logger.log_module(module_source, item, has_unsafe_imports, validation_reason, error_message)
-                            continue
-                    else:
-                        continue
-
-                elif shield.has_operator_dictionary(item_path):
-                    """ Static OPERATOR checking"""
-                    # Regular module check (non-package)
-                    # print(item_path_to_check)
-                    has_unsafe_imports, (has_unsafe_decorator, reason) = shield.check_unsafe_modules(item_path_to_check)
-                    if has_unsafe_imports and not has_unsafe_decorator:
-                        has_unsafe_imports = f"{str(has_unsafe_imports)[1:-1]}" if has_unsafe_imports else "-"
-                        # print(str(has_unsafe_imports))
-                        reason = f"@unsafe used ({reason})" if has_unsafe_decorator else "@unsafe not specified"
-                        logger.log_module(module_source, item, has_unsafe_imports, reason, 'Blocked module without @unsafe decorator')
-                        continue
-
-                    is_valid, validation_reason, error_message = shield.validate_module(item_path_to_check)
-                    if not is_valid:
-                        logger.log_module(module_source, item, has_unsafe_imports, validation_reason, error_message)
-                        continue
-
-                """ Module sys.path constructor"""
-                if is_package_main:
-                    # Add parent directory (containing the package directory) to sys.path
-                    """ OFF for debug purposes"""
-                    # package_parent = dirname(item_path)
-                    # if package_parent not in sys.path:
-                    #     sys.path.insert(0, package_parent)
-
-                    # Create a proper package module name based on location
-                    package_name = user_module_name  # This is already the directory name
-                    spec = pymod.spec_from_file_location(
-                        package_name,
-                        item_path_to_check,
-                        submodule_search_locations=[
-                            item_path,
-                        ]  # Enable package imports
-                    )
-                    module = pymod.module_from_spec(spec)
-                    ModuleTracker.track_module(package_name)
-                    ModuleTracker.track_module(f"{package_name}.main")
-
-                    # Register both the package and the main module in sys.modules
-                    sys.modules[package_name] = module
-                    sys.modules[f"{package_name}.main"] = module
-                else:
-                    # Regular module loading
-                    spec = pymod.spec_from_file_location(user_module_name, item_path_to_check)
-                    module = pymod.module_from_spec(spec)
-                    ModuleTracker.track_module(user_module_name)
-
-                """Add to the module"""
-                module.__dict__["unsafe"] = shield.unsafe
-                spec.loader.exec_module(module)
-
-                """ Runtime OPERATOR checking"""
-                if not hasattr(module, "OPERATOR") or not isinstance(module.OPERATOR, dict):
-                    continue
-
-                scripts[user_module_name] = module
-                has_unsafe_imports = f"{str(has_unsafe_imports)}" if has_unsafe_imports else "-"
-                reason = f"@unsafe used ({reason})" if has_unsafe_decorator else "Safe module"
-                logger.log_module(module_source, item, has_unsafe_imports, reason, "-")
-
-            except Exception as e:
-                logger.log_module(module_source, item, has_unsafe_imports, reason, traceback.format_exc())
-                continue
+        if is_module_candidate(item, item_path):
+            module = load_item(directory, item, module_source, digest=item_digest(item_path))
+            if module is not None:
+                scripts[item[:-3] if item.endswith('.py') else item] = module
 
         elif isdir(item_path):
             """
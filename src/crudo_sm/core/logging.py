@@ -2,7 +2,29 @@ import socket
 from datetime import datetime
 import getpass
 import textwrap
+import traceback
 from crudo_sm.utils import file_utils
+from crudo_sm.core.metrics import Metrics
+
+
+class ErrorRecord:
+    """
+        A failed import. The stack is captured without source lines or
+        frames, the traceback text is only formatted when asked for in
+        the error details or written to the log file.
+    """
+    __slots__ = ("kind", "summary", "_exception", "_text")
+
+    def __init__(self, exception):
+        self.kind = type(exception).__name__
+        self._exception = traceback.TracebackException.from_exception(exception, lookup_lines=False)
+        self.summary = "".join(self._exception.format_exception_only()).strip()
+        self._text = None
+
+    def __str__(self):
+        if self._text is None:
+            self._text = "".join(self._exception.format())
+        return self._text
 
 
 class ScriptManagerLogger:
@@ -27,6 +49,8 @@ class ScriptManagerLogger:
         self.log_file_path = self.config.get_core_param("log", "path")
         self.logs = []
         self.error_buffer = []  # For error printing into maya console
+        # (source, script) -> (fingerprint, entry) of errors already shown this session
+        self.known_errors = {}
         self.finalized = False  # Ensure logs are written only once
 
         if self.enable_logging:
@@ -35,20 +59,30 @@ class ScriptManagerLogger:
             self.local_ip = self.get_local_ip()
             self.start_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-    def log_module(self, source, module_name, has_unsafe_imports, reason, error):
+    def log_module(self, source, module_name, has_unsafe_imports, reason, error, path=None, digest=None):
         """
-        Add a module entry to the logs.
+        Add a module entry to the logs. `error` is "-", a message or an
+        ErrorRecord; errors are fingerprinted by script, content `digest`
+        and exception type so unchanged ones are not printed again.
         """
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         entry = (source, module_name, has_unsafe_imports, reason, error, timestamp)
+        script = (source, path or module_name)
 
         if self.enable_logging:
             self.logs.append(entry)  # For file logging
 
         if error != "-":  # If there's an error
-            self.error_buffer.append(entry)  # For immediate display
-            # self.print_error_buffer()  # Print immediately
-            # self.error_buffer.clear()  # Clear only the error buffer
+            if isinstance(error, ErrorRecord):
+                # Without a digest the message tells apart errors of one kind
+                kind = error.kind if digest else error.summary
+            else:
+                kind = f"{reason}: {error}"
+            self.error_buffer.append((script, (digest, kind), entry))  # For immediate display
+            Metrics.inc("scriptmate_logged_errors_total", source=source or "-")
+        else:
+            # Fixed, breaking again later is news
+            self.known_errors.pop(script, None)
 
     def get_local_ip(self):
         try:
@@ -69,13 +103,39 @@ class ScriptManagerLogger:
         # self.finalized = False
 
     def print_error_buffer(self):
-        """Print current error buffer to Maya console with appropriate formatting."""
-        if self.error_buffer:
+        """
+        Print errors that are new or changed since they were last shown to
+        the Maya console, unchanged ones only as a one line summary.
+        """
+        new_entries, unchanged = [], []
+        for script, fingerprint, entry in self.error_buffer:
+            known = self.known_errors.get(script)
+            if known is not None and known[0] == fingerprint:
+                unchanged.append(entry)
+            else:
+                new_entries.append(entry)
+            self.known_errors[script] = (fingerprint, entry)
+
+        if new_entries:
             # Format specifically for console output
-            formatted_log = self.format_logs(self.error_buffer, for_console=True) + "\n"
-            print(f"\nScriptMate: RUNTIME ERROR>\n\t{formatted_log}\n")
+            formatted_log = self.format_logs(new_entries, for_console=True, details=False) + "\n"
+            print(f"\nScriptMate: RUNTIME ERROR> (tracebacks: Settings > Error Details)\n\t{formatted_log}\n")
+        if unchanged:
+            names = ", ".join(sorted({entry[1] for entry in unchanged}))
+            print(
+                f"ScriptMate: {len(unchanged)} known error(s) unchanged: {names} "
+                f"(Settings > Error Details)"
+            )
         self.error_buffer.clear()
 
+    def print_error_details(self):
+        """Print the full table of every error still known this session, tracebacks included."""
+        if not self.known_errors:
+            print("ScriptMate: no script errors this session")
+            return
+        entries = [entry for _, entry in self.known_errors.values()]
+        print(f"\nScriptMate: ERROR DETAILS>\n\t{self.format_logs(entries, for_console=True)}\n")
+
     def write_logs(self):
         # print(f"write_logs called, enable_logging: {self.enable_logging}, logs: {self.logs}")  # Debug
         if self.enable_logging and not self.finalized and self.logs:
@@ -97,10 +157,11 @@ class ScriptManagerLogger:
             except Exception as e:
                 print(f"Error writing logs: {e}")  # Debug
 
-    def format_logs(self, log_entries, for_console=False):
+    def format_logs(self, log_entries, for_console=False, details=True):
         """
         Format logs with consistent column widths and wrapping for both console and file output.
         Maintains proper formatting for multi-line content and error messages.
+        Without `details` failed imports show their one line summary, no traceback.
         """
         if not log_entries:
             return ""
@@ -201,7 +262,10 @@ class ScriptManagerLogger:
             # Process each column in the row
             row_parts = {}
             for i, content in enumerate(entry):
-                content_str = str(content)
+                if not details and isinstance(content, ErrorRecord):
+                    content_str = content.summary
+                else:
+                    content_str = str(content)
                 if i == 2:  # Has Unsafe Imports
                     row_parts[i] = wrap_text(content_str, widths[i], 'imports')
                 elif i == 4:  # Errors
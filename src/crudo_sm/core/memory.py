@@ -0,0 +1,131 @@
+# memory.py
+# -*- coding: utf-8 -*-
+"""
+Memory accounting helpers for user modules:
+rough retained size and a readable list of referrers.
+"""
+import gc
+import sys
+import types
+
+# How deep containers reachable from a module namespace are followed
+SIZE_DEPTH = 3
+MAX_REFERRERS = 8
+
+
+def _owned_by(obj, module_name):
+    """Functions and classes only count for the module that defines them."""
+    owner = getattr(obj, "__module__", None)
+    return owner is None or owner == module_name
+
+
+def estimate_size(module):
+    """
+    Estimate the bytes a module keeps alive: its namespace, the functions
+    and classes it defines and the containers they hold, a few levels deep.
+    Objects of other modules are not counted.
+    """
+    return estimate_namespace_size(module.__dict__, module.__name__)
+
+
+def estimate_namespace_size(namespace, module_name):
+    """Same as estimate_size, for a namespace which outlived its module object."""
+    seen = {id(namespace)}
+    total = sys.getsizeof(namespace)
+    # Builtins are shared by every module
+    stack = [(value, 1) for key, value in namespace.items() if key != "__builtins__"]
+
+    while stack:
+        obj, depth = stack.pop()
+        if id(obj) in seen or isinstance(obj, types.ModuleType):
+            continue
+        seen.add(id(obj))
+
+        if isinstance(obj, (types.FunctionType, type)) and not _owned_by(obj, module_name):
+            continue
+        try:
+            total += sys.getsizeof(obj)
+        except TypeError:
+            continue
+        if depth >= SIZE_DEPTH:
+            continue
+
+        depth += 1
+        if isinstance(obj, dict):
+            stack.extend((value, depth) for item in obj.items() for value in item)
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend((value, depth) for value in obj)
+        elif isinstance(obj, types.FunctionType):
+            stack.append((obj.__code__, depth))
+            stack.extend((value, depth) for value in obj.__defaults__ or ())
+        elif isinstance(obj, type):
+            stack.append((obj.__dict__, depth))
+        elif hasattr(obj, "__dict__"):
+            stack.append((obj.__dict__, depth))
+    return total
+
+
+def _describe(referrer, target):
+    """Name the object holding `target` in terms a script author recognises."""
+    if referrer is sys.modules:
+        return "sys.modules"
+
+    if isinstance(referrer, dict):
+        for owner in gc.get_referrers(referrer):
+            if isinstance(owner, types.ModuleType) and owner.__dict__ is referrer:
+                return f"global of module {owner.__name__}"
+            if getattr(owner, "__dict__", None) is referrer:
+                return f"attribute of {type(owner).__qualname__} instance"
+        keys = [key for key, value in referrer.items() if value is target][:3]
+        return f"dict value under {keys}"
+
+    if isinstance(referrer, tuple):
+        for owner in gc.get_referrers(referrer):
+            if isinstance(owner, types.FunctionType) and owner.__defaults__ is referrer:
+                return f"default argument of {owner.__qualname__} ({owner.__module__})"
+        return "tuple"
+
+    if isinstance(referrer, types.CellType):
+        for owner in gc.get_referrers(referrer):
+            if isinstance(owner, types.FunctionType) and referrer in (owner.__closure__ or ()):
+                return f"closure of {owner.__qualname__} ({owner.__module__})"
+        return "closure cell"
+
+    if isinstance(referrer, types.FunctionType):
+        return f"function {referrer.__qualname__} ({referrer.__module__})"
+
+    return type(referrer).__qualname__
+
+
+def describe_referrers(obj, limit=MAX_REFERRERS, ignore=()):
+    """
+    Describe what keeps `obj` alive, skipping frames of this inspection
+    and the containers in `ignore`.
+    """
+    ignored = {id(container) for container in ignore}
+    referrers = gc.get_referrers(obj)
+    descriptions = []
+    for referrer in referrers:
+        if isinstance(referrer, types.FrameType) or id(referrer) in ignored:
+            continue
+        descriptions.append(_describe(referrer, obj))
+        if len(descriptions) == limit:
+            break
+    del referrers
+    return descriptions
+
+
+def namespace_functions(namespace):
+    """Functions whose globals are `namespace`: what keeps a dropped module's namespace alive."""
+    return [
+        referrer for referrer in gc.get_referrers(namespace)
+        if isinstance(referrer, types.FunctionType) and referrer.__globals__ is namespace
+    ]
+
+
+def format_size(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
@@ -0,0 +1,212 @@
+# metrics.py
+# -*- coding: utf-8 -*-
+"""
+Process-wide counters, gauges and histograms for fleet monitoring.
+The loader, shield, scanner and logger record into Metrics, the UI
+writes them after every scan to a local file in Prometheus text format
+(for a node exporter textfile collector) or JSON. Values add up over
+the Maya session; every session writes its own file, named and labelled
+with its process id, and files of sessions which ended are removed.
+"""
+import json
+import math
+import os
+import threading
+import time
+from pathlib import Path
+
+from crudo_sm.utils.process_utils import pid_alive
+
+# Upper bounds in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# name -> (type, help)
+DEFINITIONS = {
+    "scriptmate_scan_duration_seconds": ("histogram", "Time to scan one library root."),
+    "scriptmate_scan_files": ("gauge", "Scripts and packages found in a root by its last scan."),
+    "scriptmate_scan_skipped": (
+        "gauge", "Items skipped by the last scan of a root: ignored, too deep, loops, too large, over the file limit."
+    ),
+    "scriptmate_scan_snapshot_fallbacks_total": (
+        "counter", "Roots drawn from their snapshot because the scan missed the deadline."
+    ),
+    "scriptmate_shield_checks_total": (
+        "counter", "Entries checked by the shield pass, run or shared with identical content or another session."
+    ),
+    "scriptmate_cache_requests_total": (
+        "counter", "Lookups of the library snapshot and shared verdict caches, by cache and hit or miss."
+    ),
+    "scriptmate_scan_coordination_total": (
+        "counter", "Root scans by role: leader, alone, reused from another session, or error."
+    ),
+    "scriptmate_shield_verdicts_total": ("counter", "Shield verdicts by status."),
+    "scriptmate_shield_duration_seconds": ("histogram", "Time of one shield inspection."),
+    "scriptmate_imports_total": ("counter", "Script imports by result."),
+    "scriptmate_import_duration_seconds": ("histogram", "Time to execute one script import."),
+    "scriptmate_trial_imports_total": (
+        "counter", "Trial imports outside of Maya by outcome: ok, slow, failed or inconclusive."
+    ),
+    "scriptmate_logged_errors_total": ("counter", "Errors reported to the log by library."),
+    "scriptmate_chain_step_duration_seconds": ("histogram", "Time of one step of a script chain."),
+    "scriptmate_menu_build_duration_seconds": ("histogram", "Time to build and draw the menus."),
+    "scriptmate_start_time_seconds": ("gauge", "Unix time the metrics were first recorded."),
+}
+
+
+def _key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_number(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """
+        name -> {labels: value} for counters and gauges,
+        name -> {labels: [bucket counts, sum, count]} for histograms
+    """
+    _counters = {}
+    _gauges = {"scriptmate_start_time_seconds": {(): time.time()}}
+    _histograms = {}
+    _lock = threading.Lock()   # Library roots are scanned in threads
+
+    @classmethod
+    def inc(cls, name, value=1, **labels):
+        with cls._lock:
+            series = cls._counters.setdefault(name, {})
+            key = _key(labels)
+            series[key] = series.get(key, 0) + value
+
+    @classmethod
+    def set(cls, name, value, **labels):
+        with cls._lock:
+            cls._gauges.setdefault(name, {})[_key(labels)] = value
+
+    @classmethod
+    def observe(cls, name, value, **labels):
+        with cls._lock:
+            series = cls._histograms.setdefault(name, {})
+            key = _key(labels)
+            state = series.get(key)
+            if state is None:
+                state = series[key] = [[0] * len(DEFAULT_BUCKETS), 0.0, 0]
+            for i, bound in enumerate(DEFAULT_BUCKETS):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._counters.clear()
+            cls._histograms.clear()
+            cls._gauges = {"scriptmate_start_time_seconds": {(): time.time()}}
+
+    @classmethod
+    def to_prometheus(cls):
+        instance = (("pid", str(os.getpid())),)
+        lines = []
+        with cls._lock:
+            families = [
+                (name, "counter", series) for name, series in cls._counters.items()
+            ] + [
+                (name, "gauge", series) for name, series in cls._gauges.items()
+            ]
+            for name, kind, series in sorted(families):
+                lines.extend(cls._header(name, kind))
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(labels, instance)} {_format_number(value)}")
+
+            for name, series in sorted(cls._histograms.items()):
+                lines.extend(cls._header(name, "histogram"))
+                for labels, (buckets, total, count) in sorted(series.items()):
+                    for bound, bucket in zip(DEFAULT_BUCKETS + (math.inf,), buckets + [count]):
+                        le = instance + (("le", _format_number(bound)),)
+                        lines.append(f"{name}_bucket{_format_labels(labels, le)} {bucket}")
+                    lines.append(f"{name}_sum{_format_labels(labels, instance)} {_format_number(total)}")
+                    lines.append(f"{name}_count{_format_labels(labels, instance)} {count}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _header(name, kind):
+        help_text = DEFINITIONS.get(name, (kind, ""))[1]
+        lines = [f"# HELP {name} {help_text}"] if help_text else []
+        lines.append(f"# TYPE {name} {kind}")
+        return lines
+
+    @classmethod
+    def to_dict(cls):
+        def series(values):
+            return [{"labels": dict(labels), "value": value} for labels, value in sorted(values.items())]
+
+        with cls._lock:
+            return {
+                "time": time.time(),
+                "pid": os.getpid(),
+                "counters": {name: series(values) for name, values in cls._counters.items()},
+                "gauges": {name: series(values) for name, values in cls._gauges.items()},
+                "histograms": {
+                    name: [
+                        {
+                            "labels": dict(labels),
+                            "buckets": dict(zip(map(str, DEFAULT_BUCKETS), buckets)),
+                            "sum": total,
+                            "count": count,
+                        }
+                        for labels, (buckets, total, count) in sorted(values.items())
+                    ]
+                    for name, values in cls._histograms.items()
+                },
+            }
+
+    @classmethod
+    def export(cls, config):
+        """
+        Write the metrics of this session next to `metrics.path`, as
+        `<name>.<pid><suffix>`, in `metrics.format` ("prometheus" or
+        "json"), through a temporary file so a collector never reads a
+        half written file. Files of sessions which ended are removed.
+        """
+        if not config.get_core_param("metrics", "state"):
+            return
+        base = Path(config.get_core_param("metrics", "path")).expanduser()
+        path = base.with_name(f"{base.stem}.{os.getpid()}{base.suffix}")
+        cls._remove_ended(base)
+        if config.get_core_param("metrics", "format") == "json":
+            text = json.dumps(cls.to_dict(), indent=1)
+        else:
+            text = cls.to_prometheus()
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f".{path.name}.tmp")   # Unique, the name holds the pid
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"ScriptMate: could not write metrics: {e}")
+
+    @staticmethod
+    def _remove_ended(base):
+        """Drop the files of sessions no longer running, a collector would keep exporting them."""
+        for found in base.parent.glob(f"{base.stem}.*{base.suffix}"):
+            pid = found.name[len(base.stem) + 1:len(found.name) - len(base.suffix)]
+            if pid.isdigit() and int(pid) != os.getpid() and not pid_alive(int(pid)):
+                try:
+                    found.unlink()
+                except OSError:
+                    pass
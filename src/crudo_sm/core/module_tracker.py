@@ -1,35 +1,230 @@
+import gc
+import hashlib
+import os
 import sys
+import time
+import types
+import weakref
+
+# Root package of every user module loaded by ScriptMate
+NAMESPACE = "crudo_user"
+# Namespace key of the marker left in every unloaded module
+UNLOADED_MARKER = "__scriptmate_unloaded__"
+
+
+class _UnloadedMarker:
+    """
+        Weakly referenced from the tracker, held only by the namespace of
+        an unloaded module: alive as long as that namespace is, which a
+        callback keeps through its __globals__ after the module is gone
+    """
+    __slots__ = ("__weakref__",)
+
 
 class ModuleTracker:
     """
         Flushing modules cache from memmory
-        when we updating our menus
+        when we updating our menus.
+        Every tracked name keeps a parent -> children index,
+        so unloading touches only the entries of that module.
     """
     _loaded_modules = set()
+    _children = {}
+    _parents = {}
+    # (name, module weakref, namespace marker weakref, file, unload time)
+    # of every unloaded module
+    _unloaded = []
+
+    @staticmethod
+    def namespace_for(directory):
+        """Unique namespace of a library directory, derived from its absolute path."""
+        path = os.path.normcase(os.path.abspath(directory))
+        digest = hashlib.sha1(path.encode("utf-8")).hexdigest()[:12]
+        return f"{NAMESPACE}.h{digest}"
+
+    @classmethod
+    def ensure_namespace(cls, namespace):
+        """Register empty parent packages so `crudo_user.<hash>.<name>` is importable."""
+        if NAMESPACE not in sys.modules:
+            root = types.ModuleType(NAMESPACE)
+            root.__path__ = []
+            sys.modules[NAMESPACE] = root
+        if namespace not in sys.modules:
+            package = types.ModuleType(namespace)
+            package.__path__ = []
+            sys.modules[namespace] = package
+            cls.track_module(namespace)
 
     @classmethod
-    def track_module(cls, module_name):
+    def track_module(cls, module_name, parent=None):
         # print(f"FROM ModuleTracker: ", module_name)
         cls._loaded_modules.add(module_name)
+        if parent is not None and cls._parents.get(module_name) is None:
+            cls._parents[module_name] = parent
+            cls._children.setdefault(parent, set()).add(module_name)
+
+    @classmethod
+    def is_tracked(cls, module_name):
+        return module_name in cls._loaded_modules
+
+    @classmethod
+    def unload(cls, module_name, keep=()):
+        """
+        Remove a tracked module and everything registered below it
+        from sys.modules. Names in `keep` stay loaded together with their
+        children and stay indexed under their parent for the next load.
+        Returns the removed names.
+        """
+        removed = []
+        stack = [module_name]
+        while stack:
+            name = stack.pop()
+            if name not in cls._loaded_modules or name in keep:
+                continue
+            children = cls._children.pop(name, set())
+            kept = children.intersection(keep)
+            if kept:
+                cls._children[name] = kept
+            stack.extend(children - kept)
+            cls._loaded_modules.discard(name)
+            module = sys.modules.pop(name, None)
+            if module is not None and getattr(module, "__file__", None):
+                marker = module.__dict__.setdefault(UNLOADED_MARKER, _UnloadedMarker())
+                cls._unloaded.append(
+                    (name, weakref.ref(module), weakref.ref(marker), module.__file__, time.time())
+                )
+            removed.append(name)
+            # print(f"    Removed module: {name}")
+
+        parent = cls._parents.pop(module_name, None)
+        if parent is not None:
+            cls._children.get(parent, set()).discard(module_name)
+        for name in removed[1:]:
+            cls._parents.pop(name, None)
+        return removed
+
+    @classmethod
+    def clean_tracked_modules(cls, keep=()):
+        # Unload from the roots, children go with their parents
+        roots = [
+            name for name in cls._loaded_modules
+            if cls._parents.get(name) not in cls._loaded_modules
+        ]
+        for module_name in roots:
+            cls.unload(module_name, keep)
+
+        if not keep:
+            cls._loaded_modules.clear()
+            cls._children.clear()
+            cls._parents.clear()
+
+    @classmethod
+    def survivors(cls):
+        """
+        Collect garbage and return (name, module weakref, marker weakref,
+        file, unload time) for every unloaded module whose module object
+        or namespace is still referenced somewhere.
+        """
+        gc.collect()
+        cls._unloaded = [entry for entry in cls._unloaded if entry[2]() is not None]
+        alive = {}
+        for entry in cls._unloaded:
+            alive.setdefault(id(entry[2]()), entry)
+        return list(alive.values())
+
+    @staticmethod
+    def _namespace_of(marker):
+        for referrer in gc.get_referrers(marker):
+            if isinstance(referrer, dict) and referrer.get(UNLOADED_MARKER) is marker:
+                return referrer
+        return None
 
     @classmethod
-    def clean_tracked_modules(cls):
-        # First remove all modules we tracking
-        for module_name in cls._loaded_modules:
-            if module_name in sys.modules:
-                # Remove both the main module and any submodules
-                to_remove = [
-                    name for name in sys.modules
-                    if name == module_name or name.startswith(f"{module_name}.")
-                ]
-                for name in to_remove:
-                    sys.modules.pop(name, None)
-                    # print(f"    Removed module: {name}")
+    def loaded(cls):
+        """Currently loaded user modules with a source file, one per module object."""
+        modules = {}
+        for name in cls._loaded_modules:
+            module = sys.modules.get(name)
+            if module is not None and getattr(module, "__file__", None):
+                modules.setdefault(id(module), (name, module))
+        return list(modules.values())
+
+    @classmethod
+    def leak_report(cls):
+        """Text report of modules surviving an unload and memory of loaded ones."""
+        from crudo_sm.core import memory
+
+        lines = ["ScriptMate: LEAK REPORT>"]
+        survivors = cls.survivors()
+        if survivors:
+            lines.append(f"{len(survivors)} unloaded module(s) are still alive:")
+            for name, ref, marker_ref, file_path, unloaded_at in survivors:
+                # Only weak references are kept between iterations,
+                # so the report itself never shows up as a referrer
+                age = time.strftime("%H:%M:%S", time.localtime(unloaded_at))
+                module = ref()
+                if module is not None:
+                    lines.append(
+                        f"  {name} ({file_path}), unloaded at {age}, "
+                        f"retains ~{memory.format_size(memory.estimate_size(module))}"
+                    )
+                    for description in memory.describe_referrers(module):
+                        lines.append(f"      referenced by: {description}")
+                    del module
+                    continue
+                marker = marker_ref()
+                namespace = cls._namespace_of(marker) if marker is not None else None
+                del marker
+                if namespace is None:
+                    continue
+                size = memory.estimate_namespace_size(namespace, name)
+                lines.append(
+                    f"  {name} ({file_path}), unloaded at {age}, namespace kept alive "
+                    f"by its functions, retains ~{memory.format_size(size)}"
+                )
+                functions = memory.namespace_functions(namespace)
+                for function in functions:
+                    for description in memory.describe_referrers(function, ignore=(namespace, functions)):
+                        lines.append(f"      {function.__qualname__} referenced by: {description}")
+                del namespace, functions
+        else:
+            lines.append("No unloaded module is alive.")
+
+        loaded = sorted(
+            ((memory.estimate_size(module), name, module) for name, module in cls.loaded()),
+            key=lambda entry: entry[0],
+            reverse=True,
+        )
+        total = sum(size for size, _, _ in loaded)
+        lines.append(f"\n{len(loaded)} loaded module(s), ~{memory.format_size(total)} retained:")
+        for size, name, module in loaded:
+            lines.append(f"  {memory.format_size(size):>8}  {name} ({module.__file__})")
+        return "\n".join(lines)
 
-        cls._loaded_modules.clear()
+    @classmethod
+    def print_leak_report(cls):
+        print(f"\n{cls.leak_report()}\n")
 
     @classmethod
     def print_tracked(cls):
         print("\nTracked modules:")
         for mod in cls._loaded_modules:
             print(f"- {mod}")
+
+
+class _SubmoduleWatcher:
+    """
+        Meta path hook which only observes imports:
+        submodules of tracked packages imported at runtime
+        are recorded under their parent, the real finders load them
+    """
+
+    def find_spec(self, fullname, path=None, target=None):
+        parent = fullname.rpartition(".")[0]
+        if parent and ModuleTracker.is_tracked(parent):
+            ModuleTracker.track_module(fullname, parent)
+        return None
+
+
+if not any(type(finder).__name__ == "_SubmoduleWatcher" for finder in sys.meta_path):
+    sys.meta_path.insert(0, _SubmoduleWatcher())
@@ -0,0 +1,78 @@
+# preload.py
+# -*- coding: utf-8 -*-
+import time
+
+from crudo_sm.core.registry import ScriptRegistry, LoadState
+from crudo_sm.core.trial import TrialRunner
+from crudo_sm.core.usage import UsageTracker
+
+
+class Preloader:
+    """
+        Imports the scripts a user runs most before they are clicked.
+        The UI calls step() whenever Maya is idle; each call imports at
+        most one script and only once `pause` seconds passed since the
+        previous import, so interaction keeps getting most of the time.
+        Scripts whose last import took longer than `max_import` stay
+        on-demand, waiting for them would show as a hitch. So do scripts
+        of unknown cost: never imported here nor measured by a trial
+        import, or with their trial import still running.
+    """
+
+    def __init__(self, script_ids, usage, pause=0.25, max_import=0.2, trials=None):
+        self.queue = list(script_ids)
+        self.usage = usage
+        self.trials = trials
+        self.pause = pause
+        self.max_import = max_import
+        self.last = 0.0
+
+    @classmethod
+    def from_config(cls, config):
+        """Queue the `top_n` most used scripts which are not imported yet."""
+        usage = UsageTracker.get_instance(config)
+        top_n = config.get_core_param("preload", "top_n") or 0
+        records = [
+            record for record in ScriptRegistry.records()
+            if usage.count(record.script_id)
+            and record.state != LoadState.FAILED
+            and record.module() is None
+        ]
+        records.sort(key=lambda record: usage.count(record.script_id), reverse=True)
+        return cls(
+            [record.script_id for record in records[:top_n]],
+            usage,
+            pause=(config.get_core_param("preload", "pause_ms") or 250) / 1000.0,
+            max_import=(config.get_core_param("preload", "max_import_ms") or 200) / 1000.0,
+            trials=TrialRunner.get_instance(config),
+        )
+
+    def import_cost(self, record):
+        """Seconds the last import of a record took, else its trial import, None when unknown."""
+        known = self.usage.import_time(record.script_id)
+        if known is None and self.trials is not None:
+            known = self.trials.seconds(record.digest)
+        return known
+
+    def step(self):
+        """Import the next queued script when due; returns False once the queue is empty."""
+        if time.perf_counter() - self.last < self.pause:
+            return bool(self.queue)
+
+        while self.queue:
+            script_id = self.queue.pop(0)
+            record = ScriptRegistry.get(script_id)
+            if record is None or record.module() is not None:
+                continue
+            cost = self.import_cost(record)
+            if cost is None or cost > self.max_import:
+                continue
+            started = time.perf_counter()
+            ScriptRegistry.resolve(script_id)
+            self.usage.set_import_time(script_id, time.perf_counter() - started)
+            break
+
+        self.last = time.perf_counter()
+        if not self.queue:
+            self.usage.save()
+        return bool(self.queue)
@@ -0,0 +1,111 @@
+# probe.py
+# -*- coding: utf-8 -*-
+"""
+Quick look at a library path before it is saved: whether it answers,
+how long its first listing took and about how many scripts and menus
+it holds. Nothing is read or hashed, folders are only listed with the
+scanner's rules. Probes run in daemon threads so a dead network share
+never blocks the caller; counting stops at the deadline and the counts
+are then lower bounds.
+"""
+import os
+import threading
+import time
+from collections import namedtuple
+from os.path import join, isdir, isfile
+
+from crudo_sm.core.loader import MenuAliases, is_module_candidate
+from crudo_sm.core.traversal import IgnoreRules, Traversal
+
+# latency in seconds of the first listing, complete False when the deadline cut the count
+ProbeResult = namedtuple(
+    "ProbeResult", ["path", "reachable", "latency", "scripts", "menus", "complete", "error"]
+)
+
+
+def _count_bundle(path, started):
+    from crudo_sm.core import bundle
+    scripts = menus = 0
+    found = bundle.Bundle(path)
+    try:
+        nodes = [found.index["default"], *found.index["menus"].values()]
+        menus = len(found.index["menus"])
+        while nodes:
+            node = nodes.pop()
+            scripts += len(node["scripts"])
+            menus += len(node["children"])
+            nodes.extend(node["children"].values())
+    finally:
+        found.close()
+    return ProbeResult(path, True, time.perf_counter() - started, scripts, menus, True, "")
+
+
+def probe(path, deadline=3.0, depth=6):
+    """ProbeResult of a library path, counted within `deadline` seconds."""
+    from crudo_sm.core import bundle
+    started = time.perf_counter()
+    path = os.path.abspath(os.path.expanduser(path))
+    try:
+        if bundle.is_bundle(path):
+            return _count_bundle(path, started)
+        names = sorted(os.listdir(path))
+    except (OSError, ValueError) as e:
+        error = getattr(e, "strerror", None) or str(e)
+        return ProbeResult(path, False, time.perf_counter() - started, 0, 0, True, error)
+    latency = time.perf_counter() - started
+
+    end = started + deadline
+    traversal = Traversal()
+    counts = {"scripts": 0, "menus": 0}
+    # (directory, names or None, depth, rules, menus allowed)
+    pending = [(path, names, depth, IgnoreRules(), True)]
+    complete = True
+    while pending:
+        if time.perf_counter() > end:
+            complete = False
+            break
+        directory, names, level, rules, allow_menus = pending.pop()
+        if level <= 0 or not traversal.enter(directory):
+            continue
+        if names is None:
+            try:
+                names = sorted(os.listdir(directory))
+            except OSError:
+                continue
+        rules = rules.child(directory, names)
+        for name in names:
+            if name.startswith((".", MenuAliases.EXC.value)):
+                continue
+            item_path = join(directory, name)
+            is_dir = isdir(item_path)
+            if rules.ignored(item_path, is_dir):
+                continue
+            if is_module_candidate(name, item_path):
+                if not is_dir or isfile(join(item_path, MenuAliases.MAIN_PACK.value)):
+                    counts["scripts"] += 1
+            elif is_dir and name.startswith(MenuAliases.MENU.value):
+                if allow_menus:
+                    counts["menus"] += 1
+                    pending.append((item_path, None, level - 1, rules, False))
+            elif (
+                is_dir and name.startswith(MenuAliases.SUB.value)
+                and len(name.split(MenuAliases.SEP.value, 2)) == 3
+            ):
+                counts["menus"] += 1
+                pending.append((item_path, None, level - 1, rules, False))
+
+    return ProbeResult(path, True, latency, counts["scripts"], counts["menus"], complete, "")
+
+
+def start(path, callback, deadline=3.0):
+    """Probe `path` in a daemon thread and call `callback(result)` from it."""
+    def run():
+        try:
+            result = probe(path, deadline)
+        except Exception as e:
+            result = ProbeResult(path, False, 0.0, 0, 0, True, str(e))
+        callback(result)
+
+    thread = threading.Thread(target=run, name="ScriptMateProbe", daemon=True)
+    thread.start()
+    return thread
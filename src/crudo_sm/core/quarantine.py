@@ -0,0 +1,174 @@
+# quarantine.py
+# -*- coding: utf-8 -*-
+import json
+import os
+import time
+from pathlib import Path
+
+from crudo_sm.utils.process_utils import pid_alive
+
+PENDING_SUFFIX = ".pending"
+
+
+class Quarantine:
+    """
+        Scripts skipped at load time, keyed by content hash.
+        A script lands here when its import runs over the time budget,
+        fails `max_failures` times in a row (across sessions, trial
+        imports outside of Maya included, see trial.py), or never
+        returned because Maya was killed while importing it.
+        Sessions share the list: each marks its running import in its
+        own `quarantine.<pid>.pending` file and merges its changes into
+        the file on disk when saving. Editing the
+        file changes its hash, so the new version gets loaded again.
+    """
+    _instance = None
+
+    @staticmethod
+    def get_instance(config=None):
+        if Quarantine._instance is None:
+            if config is None:
+                raise ValueError(
+                    "Quarantine instance is not initialized and no config provided."
+                )
+            Quarantine._instance = Quarantine(config)
+        return Quarantine._instance
+
+    def __init__(self, config):
+        if Quarantine._instance is not None:
+            raise RuntimeError("Use `get_instance` to access the Quarantine.")
+
+        self.path = Path(config.get_core_param("quarantine", "path")).expanduser()
+        self.pending_path = self.path.with_suffix(f".{os.getpid()}{PENDING_SUFFIX}")
+        self.budget = (config.get_core_param("quarantine", "budget_ms") or 1000) / 1000.0
+        self.max_failures = config.get_core_param("quarantine", "max_failures") or 3
+        data = self._load()
+        self.entries = data.get("quarantined", {})   # digest -> {"path", "reason", "time"}
+        self.failures = data.get("failures", {})     # digest -> failed imports in a row
+        self._changed = set()    # digests changed by this session since the last save
+        self._cleared = False
+        self._recover_pending()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def save(self):
+        """
+        Merge the changes of this session into the list on disk, entries
+        of other sessions are kept, and write it through a temporary file
+        so a crash never truncates it.
+        """
+        data = {} if self._cleared else self._load()
+        entries = data.get("quarantined", {}) if isinstance(data.get("quarantined"), dict) else {}
+        failures = data.get("failures", {}) if isinstance(data.get("failures"), dict) else {}
+        for digest in self._changed:
+            for merged, local in ((entries, self.entries), (failures, self.failures)):
+                if digest in local:
+                    merged[digest] = local[digest]
+                else:
+                    merged.pop(digest, None)
+        self.entries, self.failures = entries, failures
+        self._changed.clear()
+        self._cleared = False
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"quarantined": self.entries, "failures": self.failures}, f, indent=4)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"ScriptMate: could not save quarantine: {e}")
+
+    def _recover_pending(self):
+        """An import still marked as running by a session that is gone hung it."""
+        for marker in self.path.parent.glob(f"{self.path.stem}.*{PENDING_SUFFIX}"):
+            try:
+                pid = int(marker.name[len(self.path.stem) + 1:-len(PENDING_SUFFIX)])
+            except ValueError:
+                continue
+            if pid == os.getpid() or pid_alive(pid):
+                continue
+            try:
+                with open(marker, "r", encoding="utf-8") as f:
+                    pending = json.load(f)
+                os.remove(marker)
+            except (OSError, ValueError):
+                continue
+            if isinstance(pending, dict) and pending.get("digest"):
+                self.add(pending["digest"], pending.get("path", ""), "Import never finished")
+
+    def begin(self, digest, path):
+        """Mark an import as running until `end` is called."""
+        if not digest:
+            return
+        try:
+            self.pending_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.pending_path, "w", encoding="utf-8") as f:
+                json.dump({"digest": digest, "path": path}, f)
+        except OSError:
+            pass
+
+    def end(self):
+        try:
+            os.remove(self.pending_path)
+        except OSError:
+            pass
+
+    def add(self, digest, path, reason):
+        self.entries[digest] = {
+            "path": path,
+            "reason": reason,
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        self.failures.pop(digest, None)
+        self._changed.add(digest)
+        self.save()
+        print(f"ScriptMate: quarantined {path}: {reason}")
+
+    def record_import(self, digest, path, elapsed):
+        """Check a finished import against the time budget."""
+        if not digest:
+            return
+        if self.failures.pop(digest, None):
+            self._changed.add(digest)
+            self.save()
+        if elapsed > self.budget:
+            self.add(
+                digest, path,
+                f"Import took {elapsed * 1000:.0f} ms, budget is {self.budget * 1000:.0f} ms",
+            )
+
+    def record_failure(self, digest, path):
+        """Count a failed import, repeated failures quarantine the script."""
+        if not digest:
+            return
+        failures = self.failures[digest] = self.failures.get(digest, 0) + 1
+        self._changed.add(digest)
+        if failures >= self.max_failures:
+            self.add(digest, path, f"Import failed {failures} times")
+        else:
+            self.save()
+
+    def is_quarantined(self, digest):
+        return bool(digest) and digest in self.entries
+
+    def clear(self):
+        """Empty the list for every session."""
+        self.entries.clear()
+        self.failures.clear()
+        self._changed.clear()
+        self._cleared = True
+        self.save()
+
+    def print_report(self):
+        if not self.entries:
+            print("ScriptMate: quarantine is empty")
+            return
+        print(f"ScriptMate: {len(self.entries)} quarantined script(s)")
+        for digest, entry in sorted(self.entries.items(), key=lambda item: item[1].get("path", "")):
+            print(f"  {entry.get('path', '')}\n      {entry.get('reason', '')} ({entry.get('time', '')}, {digest[:12]})")
@@ -0,0 +1,170 @@
+# registry.py
+# -*- coding: utf-8 -*-
+"""
+Central registry of loaded scripts.
+Menus and tools refer to scripts by a stable id and resolve the module
+only when the script runs, so no UI keeps a module object alive.
+
+    from crudo_sm.core import registry
+    registry.run("crudo_user.h1a2b3c4d5e6f.cleanup")
+"""
+import sys
+import time
+import weakref
+from enum import Enum
+from os.path import basename, dirname
+
+
+class LoadState(Enum):
+    UNLOADED = 'unloaded'
+    LOADED = 'loaded'
+    FAILED = 'failed'
+
+
+class ScriptRecord:
+    """Compact description of one script, the module is only weakly referenced."""
+
+    __slots__ = ("script_id", "path", "operator", "source", "digest", "module_ref", "state")
+
+    def __init__(self, script_id, path, operator=None, source="", digest=""):
+        self.script_id = script_id
+        self.path = path
+        self.operator = operator or {}
+        self.source = source
+        self.digest = digest
+        self.module_ref = None
+        self.state = LoadState.UNLOADED
+
+    @property
+    def label(self):
+        return self.operator.get("name", basename(self.path).rsplit(".", 1)[0])
+
+    @property
+    def category(self):
+        return self.operator.get("category", "Uncategorized")
+
+    def module(self):
+        """
+        The live module, or None when it was unloaded or replaced.
+        A module still alive but no longer registered is treated as stale.
+        """
+        module = self.module_ref() if self.module_ref is not None else None
+        if module is None or sys.modules.get(self.script_id) is not module:
+            if self.state == LoadState.LOADED:
+                self.state = LoadState.UNLOADED
+            return None
+        return module
+
+
+class ScriptRegistry:
+    """
+        Script id -> ScriptRecord,
+        the id is the namespaced module name given by the loader
+    """
+    _records = {}
+
+    @classmethod
+    def register(cls, script_id, path, module, source="", digest=""):
+        record = cls._records.get(script_id)
+        if record is None:
+            record = cls._records[script_id] = ScriptRecord(script_id, path, source=source)
+        record.path = path
+        record.source = source or record.source
+        record.digest = digest or record.digest
+        record.operator = dict(module.OPERATOR)
+        record.module_ref = weakref.ref(module)
+        record.state = LoadState.LOADED
+        return record
+
+    @classmethod
+    def register_unloaded(cls, script_id, path, operator, source="", digest=""):
+        """
+        Record a script known only from a library snapshot or its static
+        OPERATOR, imported on first run.
+        """
+        record = cls._records.get(script_id)
+        if record is None:
+            record = cls._records[script_id] = ScriptRecord(
+                script_id, path, dict(operator), source, digest
+            )
+        elif record.module() is None or (digest and record.digest and digest != record.digest):
+            # Never imported, unloaded, or its file changed since the import
+            record.module_ref = None
+            record.state = LoadState.UNLOADED
+            record.path = path
+            record.operator = dict(operator)
+            record.source = source or record.source
+            record.digest = digest or record.digest
+        return record
+
+    @classmethod
+    def mark_failed(cls, script_id):
+        record = cls._records.get(script_id)
+        if record is not None:
+            record.module_ref = None
+            record.state = LoadState.FAILED
+
+    @classmethod
+    def get(cls, script_id):
+        return cls._records.get(script_id)
+
+    @classmethod
+    def records(cls):
+        return list(cls._records.values())
+
+    @classmethod
+    def remove(cls, script_id):
+        return cls._records.pop(script_id, None)
+
+    @classmethod
+    def clear(cls):
+        cls._records.clear()
+
+    @classmethod
+    def resolve(cls, script_id):
+        """
+        Return the module of a script, importing it again when the
+        registered module was unloaded since the menu was built.
+        """
+        record = cls._records.get(script_id)
+        if record is None:
+            return None
+        module = record.module()
+        if module is not None:
+            return module
+
+        # Stale entry: reload on demand through the regular loader checks
+        from crudo_sm.core import loader
+        module = loader.load_item(
+            dirname(record.path), basename(record.path), record.source,
+            digest=record.digest or loader.item_digest(record.path),
+        )
+        loader.load_scripts_and_directories(finalize_logs=True)
+        return module
+
+    @classmethod
+    def run(cls, script_id):
+        """
+        Execute a script by id; returns False when it can't be resolved.
+        An import on click is timed, the preloader relies on it.
+        """
+        from crudo_sm.core.usage import UsageTracker
+        from crudo_sm.settings.common import CONFIG
+        usage = UsageTracker.get_instance(CONFIG)
+        record = cls._records.get(script_id)
+        imported = record is not None and record.module() is None
+        started = time.perf_counter()
+        module = cls.resolve(script_id)
+        if module is None:
+            print(f"ScriptMate: script is not available: {script_id}")
+            return False
+        if imported:
+            usage.set_import_time(script_id, time.perf_counter() - started)
+
+        usage.record(script_id)
+        module.execute()
+        return True
+
+
+def run(script_id):
+    return ScriptRegistry.run(script_id)
@@ -0,0 +1,117 @@
+# requirements.py
+# -*- coding: utf-8 -*-
+"""
+Declarative OPERATOR requirements, checked without importing the script:
+
+    OPERATOR = {
+        "name": "Rig Picker",
+        "maya_version": ">=2025",          # or "2024", or ["2024", "2025"]
+        "python_version": ">=3.10,<3.12",
+        "requires": ["PySide6", "numpy"],  # importable module names
+    }
+
+A list of versions matches when any of them does, a comma separated
+spec when all of its parts do. Nothing is excluded until the running
+host is configured, so tools outside Maya (the linter) see every script.
+"""
+import importlib.util
+import re
+import sys
+
+REQUIREMENT_KEYS = ("maya_version", "python_version", "requires")
+_SPEC = re.compile(r"^\s*(>=|<=|==|!=|>|<)?\s*([0-9][0-9.]*)\s*$")
+_COMPARE = {
+    ">=": lambda a, b: a >= b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    "<": lambda a, b: a < b,
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+}
+
+# Versions of the running host, None until configure() is called
+host = None
+# Module name -> importable, find_spec is not free on network paths
+_available = {}
+# (path, reason) pairs already reported this session
+_reported = set()
+
+
+def configure(maya_version, python_version=None):
+    """Describe the running host, scripts are checked against it from now on."""
+    global host
+    host = {
+        "maya_version": parse_version(maya_version),
+        "python_version": tuple(python_version or sys.version_info[:3]),
+    }
+
+
+def parse_version(value):
+    """Leading numeric part of a version as a tuple: "2025.3" -> (2025, 3)."""
+    match = re.match(r"\s*([0-9][0-9.]*)", str(value))
+    if not match:
+        return ()
+    return tuple(int(part) for part in match.group(1).split(".") if part)
+
+
+def version_matches(version, spec):
+    """
+    True when `version` satisfies `spec`. A bare version compares only
+    as many parts as it gives, "3.10" matches every 3.10.x.
+    """
+    if isinstance(spec, (list, tuple)):
+        return any(version_matches(version, item) for item in spec)
+    for part in str(spec).split(","):
+        match = _SPEC.match(part)
+        if not match:
+            raise ValueError(f"invalid version spec {spec!r}")
+        operator, wanted = match.group(1) or "==", parse_version(match.group(2))
+        if not _COMPARE[operator](version[:len(wanted)], wanted):
+            return False
+    return True
+
+
+def is_available(module_name):
+    top_level = module_name.split(".", 1)[0]
+    if top_level not in _available:
+        try:
+            _available[top_level] = importlib.util.find_spec(top_level) is not None
+        except (ImportError, ValueError):
+            _available[top_level] = False
+    return _available[top_level]
+
+
+def unmet(requirements):
+    """
+    Reason the running host can't run a script with these requirements,
+    or None when it can (or when no host is configured).
+    """
+    if host is None or not requirements:
+        return None
+
+    for key, label in (("maya_version", "Maya"), ("python_version", "Python")):
+        spec = requirements.get(key)
+        if spec is None or not host[key]:
+            continue
+        try:
+            if not version_matches(host[key], spec):
+                current = ".".join(str(part) for part in host[key])
+                return f"Requires {label} {spec}, running {current}"
+        except ValueError as e:
+            return f"Invalid {key}: {e}"
+
+    modules = requirements.get("requires") or []
+    if isinstance(modules, str):
+        modules = [modules]
+    missing = [name for name in modules if not is_available(str(name))]
+    if missing:
+        return f"Requires missing module(s): {', '.join(missing)}"
+    return None
+
+
+def report_once(path, reason):
+    """Print an exclusion the first time it is seen this session."""
+    if (path, reason) in _reported:
+        return
+    _reported.add((path, reason))
+    print(f"ScriptMate: skipped {path}: {reason}")
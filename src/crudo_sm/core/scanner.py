@@ -0,0 +1,663 @@
+# scanner.py
+# -*- coding: utf-8 -*-
+"""
+Library scanning without imports.
+Every library root is walked in its own thread into a tree of menus and
+script entries, and each distinct file content of the root goes through
+the shield pass in that thread too; the trees are overlaid by priority.
+Importing and building menus stay on the main thread.
+
+A root which is not scanned within the deadline (slow or dead network
+mount) is replaced by its last snapshot and keeps scanning in the
+background; the finished scan is used by the next build.
+
+With a ScanCoordinator, Maya sessions of the same workstation share
+their scanned trees and shield verdicts instead of each redoing them.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+from os.path import join, isdir
+
+from crudo_sm.core import shield, requirements
+from crudo_sm.core.coordination import host_key
+from crudo_sm.core.traversal import IgnoreRules, Traversal, SKIP_REASONS
+from crudo_sm.core.metrics import Metrics
+from crudo_sm.core.import_graph import relative_name, file_signature
+from crudo_sm.core.loader import MenuAliases, is_module_candidate
+
+# Ordered library root, the first one has the highest priority
+LibraryRoot = namedtuple("LibraryRoot", ["name", "path"])
+
+SCAN_DEPTH = 6
+HASH_CHUNK = 1 << 20
+SNAPSHOT_VERSION = 1
+# OPERATOR keys kept in snapshots to draw menus without importing
+SNAPSHOT_OPERATOR_KEYS = ("name", "category", "icon")
+
+
+class ScriptEntry:
+    """One script file or package found in a library root."""
+
+    __slots__ = ("item", "directory", "root", "digest", "verdict", "operator", "stale", "signatures")
+
+    def __init__(self, item, directory, root, digest=None):
+        self.item = item
+        self.directory = directory
+        self.root = root
+        self.digest = digest
+        self.verdict = None
+        self.operator = {}   # Filled once imported, kept in snapshots
+        self.stale = False   # Comes from a snapshot of an unreachable root
+        self.signatures = None   # Packages: {module: file signature}, see import_graph
+
+    @property
+    def path(self):
+        return join(self.directory, self.item)
+
+    @property
+    def name(self):
+        return self.item[:-3] if self.item.endswith(MenuAliases.EXT.value) else self.item
+
+
+class MenuNode:
+    """
+        A menu_ or sub_ folder (or a library root itself),
+        merged across roots by its logical path
+    """
+
+    __slots__ = ("item", "name", "category", "scripts", "children")
+
+    def __init__(self, item="", name="", category=""):
+        self.item = item
+        self.name = name
+        self.category = category
+        self.scripts = {}    # item -> ScriptEntry
+        self.children = {}   # item -> MenuNode
+
+    def entries(self):
+        """Every script entry of this node and its children."""
+        yield from self.scripts.values()
+        for child in self.children.values():
+            yield from child.entries()
+
+
+class LibraryTree:
+    """
+        Root level scripts (Default menu) plus the top-level menu_ folders.
+        A merged tree also keeps the tree of every root it was built from.
+    """
+
+    __slots__ = ("default", "menus", "roots", "stale", "traversal")
+
+    def __init__(self):
+        self.default = MenuNode()
+        self.menus = {}      # item -> MenuNode
+        self.roots = []      # (LibraryRoot, LibraryTree) by priority
+        self.stale = []      # LibraryRoots drawn from a snapshot
+        self.traversal = None  # Traversal of a root scanned by this session
+
+    def entries(self):
+        yield from self.default.entries()
+        for node in self.menus.values():
+            yield from node.entries()
+
+
+def content_digest(item_path, files=None):
+    """
+    Hash of a script file, or of every python file of a package
+    (`files`, as listed by Traversal.package_files, when given).
+    """
+    digest = hashlib.sha1()
+
+    def feed(file_path):
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+                digest.update(chunk)
+
+    if not isdir(item_path):
+        feed(item_path)
+        return digest.hexdigest()
+
+    if files is not None:
+        for file_path in files:
+            digest.update(os.path.relpath(file_path, item_path).encode("utf-8"))
+            feed(file_path)
+        return digest.hexdigest()
+
+    for directory, dirs, files in os.walk(item_path):
+        dirs[:] = sorted(d for d in dirs if not d.startswith(MenuAliases.EXC.value))
+        for name in sorted(files):
+            if name.endswith(MenuAliases.EXT.value) and not name.startswith("._"):
+                file_path = join(directory, name)
+                digest.update(os.path.relpath(file_path, item_path).encode("utf-8"))
+                feed(file_path)
+    return digest.hexdigest()
+
+
+def folder_node(item):
+    """Empty MenuNode of a menu_ or sub_<Category>_<Name> folder, None for other folders."""
+    if item.startswith(MenuAliases.MENU.value):
+        return MenuNode(item, item[len(MenuAliases.MENU.value):])
+    if item.startswith(MenuAliases.SUB.value) and MenuAliases.SEP.value in item:
+        parts = item.split(MenuAliases.SEP.value, 2)
+        if len(parts) == 3:
+            _, category, name = parts
+            return MenuNode(item, name, category)
+    return None
+
+
+def _scan_directory(node, directory, root, depth, traversal, rules, menus=None):
+    """
+    Fill `node` from `directory`; `menus` collects menu_ folders at root
+    level. Items matched by `.scriptmateignore` files, folders past
+    `depth` or already visited and files over the limits are skipped.
+    """
+    if depth <= 0:
+        traversal.skipped["depth"] += 1
+        return
+    if not traversal.enter(directory):
+        return
+    try:
+        items = sorted(os.listdir(directory))
+    except OSError:
+        return
+    rules = rules.child(directory, items)
+
+    for item in items:
+        if item.startswith((".", MenuAliases.EXC.value)):
+            continue
+        item_path = join(directory, item)
+        is_dir = isdir(item_path)
+        if rules.ignored(item_path, is_dir):
+            traversal.skipped["ignored"] += 1
+            continue
+
+        if is_module_candidate(item, item_path):
+            files = None
+            if is_dir:
+                # Plain folders (data, caches) are no packages, don't read them
+                if not os.path.isfile(join(item_path, MenuAliases.MAIN_PACK.value)):
+                    continue
+                files = traversal.package_files(item_path, MenuAliases.EXC.value, MenuAliases.EXT.value)
+                if files is None:
+                    continue
+            elif not traversal.admit(item_path):
+                continue
+            try:
+                digest = content_digest(item_path, files)
+            except OSError:
+                digest = None
+            entry = node.scripts[item] = ScriptEntry(item, directory, root, digest)
+            if files is not None:
+                # Partial package reloads compare these, read here within the deadline
+                entry.signatures = {relative_name(item_path, path): file_signature(path) for path in files}
+
+        elif is_dir:
+            child = folder_node(item)
+            if child is None:
+                continue
+            if item.startswith(MenuAliases.MENU.value):
+                if menus is not None:
+                    menus[item] = child
+                    _scan_directory(child, item_path, root, depth - 1, traversal, rules)
+            else:
+                node.children[item] = child
+                _scan_directory(child, item_path, root, depth - 1, traversal, rules)
+
+
+def scan_root(root, depth=SCAN_DEPTH, limits=None):
+    """
+    Walk one library root into a LibraryTree (no imports, no shield pass),
+    within `depth` folders and the ScanLimits `limits`.
+    A bundle root is read from its index instead.
+    """
+    from crudo_sm.core import bundle
+    if bundle.is_bundle(root.path):
+        return bundle.scan_bundle(root)
+    tree = LibraryTree()
+    tree.roots.append((root, tree))
+    tree.traversal = Traversal(limits)
+    if root.path and isdir(root.path):
+        _scan_directory(tree.default, root.path, root, depth, tree.traversal, IgnoreRules(), tree.menus)
+    return tree
+
+
+def _scan_subtree(root, parts, depth, limits=None):
+    """
+    Node of one menu folder of a root, `parts` being the folder names
+    from the root ("" first for folders of the Default menu).
+    """
+    from crudo_sm.core import bundle
+    if bundle.is_bundle(root.path):
+        tree = bundle.scan_bundle(root)
+        node = tree.default if not parts[0] else tree.menus.get(parts[0])
+        for part in parts[1:]:
+            node = node.children.get(part) if node is not None else None
+        return node
+
+    folders = [part for part in parts if part]
+    directory = join(root.path, *folders)
+    node = folder_node(parts[-1])
+    if node is None or not isdir(directory):
+        return None
+    rules = IgnoreRules.for_directory(root.path, os.path.dirname(directory))
+    if rules.ignored(directory, True):
+        return None
+    _scan_directory(node, directory, root, depth - len(folders), Traversal(limits), rules)
+    return node
+
+
+def _scan_and_inspect_subtree(root, parts, depth, limits=None):
+    """_scan_subtree with the shield pass, both in the calling worker thread."""
+    node = _scan_subtree(root, parts, depth, limits)
+    if node is not None:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            inspect_entries([entry for entry in node.entries() if entry.verdict is None], executor)
+    return node
+
+
+def scan_subtree(roots, parts, depth=SCAN_DEPTH, deadline=None, limits=None):
+    """
+    Scan and inspect a single menu folder in every root, overlaid by
+    priority. Returns None when no root has the folder; raises
+    TimeoutError when a root does not answer within `deadline` seconds.
+    """
+    unique = []
+    seen = set()
+    for root in roots:
+        key = _root_key(root) if root.path else None
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(root)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, len(unique)))
+    try:
+        futures = [executor.submit(_scan_and_inspect_subtree, root, parts, depth, limits) for root in unique]
+        _, pending = wait(futures, timeout=deadline)
+        if pending:
+            raise TimeoutError(", ".join(
+                root.name for root, future in zip(unique, futures) if future in pending
+            ))
+
+        merged = None
+        for future in futures:
+            node = future.result()
+            if node is None:
+                continue
+            if merged is None:
+                merged = MenuNode(node.item, node.name, node.category)
+            _overlay(merged, node)
+        return merged
+    finally:
+        # A hanging mount keeps its thread, never Maya
+        executor.shutdown(wait=False)
+
+
+def _root_key(root):
+    return os.path.normcase(os.path.abspath(root.path))
+
+
+class _RootScan(threading.Thread):
+    """
+        Scan and shield pass of one root in a daemon thread, so a
+        hanging mount never blocks Maya, not even on exit
+    """
+
+    def __init__(self, root, depth, limits=None, coordinator=None, max_age=None):
+        super().__init__(name=f"ScriptMateScan-{root.name}", daemon=True)
+        self.root = root
+        self.depth = depth
+        self.limits = limits
+        self.coordinator = coordinator
+        self.max_age = max_age
+        self.tree = None
+        self.done = threading.Event()
+        self.callbacks = []
+        # Printed by the build which takes the scan, never from this thread
+        self.messages = []
+
+    def run(self):
+        try:
+            started = time.perf_counter()
+            tree = _shared_scan(
+                self.root, self.depth, self.limits, self.coordinator, self.max_age, self.messages.append
+            )
+            # Reading every script is part of the scan the deadline waits for
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                inspect_entries(
+                    [entry for entry in tree.entries() if entry.verdict is None], executor, self.coordinator
+                )
+            self.tree = tree
+            Metrics.observe(
+                "scriptmate_scan_duration_seconds", time.perf_counter() - started, root=self.root.name
+            )
+            Metrics.set("scriptmate_scan_files", sum(1 for _ in self.tree.entries()), root=self.root.name)
+            if self.tree.traversal is not None:
+                _report_skipped(self.root, self.tree.traversal, self.messages.append)
+        except Exception as e:
+            self.messages.append(f"ScriptMate: could not scan {self.root.path}: {e}")
+        with _scans_lock:
+            self.done.set()
+            callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback(self.root)
+
+    def notify(self, callback):
+        """Call `callback(root)` from the scan thread once it has finished."""
+        with _scans_lock:
+            if not self.done.is_set():
+                self.callbacks.append(callback)
+                return
+        callback(self.root)
+
+
+# Scans not consumed by a build yet, by root path
+_scans = {}
+_scans_lock = threading.Lock()
+
+
+# Root path -> last reported summary of skipped items
+_skipped_reports = {}
+
+
+def _report_skipped(root, traversal, report=print):
+    """Publish the skipped counts of a scan, reported when they changed since the last scan."""
+    for reason in SKIP_REASONS:
+        Metrics.set("scriptmate_scan_skipped", traversal.skipped[reason], root=root.name, reason=reason)
+    summary = traversal.summary()
+    if _skipped_reports.get(_root_key(root), "") != summary:
+        _skipped_reports[_root_key(root)] = summary
+        if summary:
+            report(f"ScriptMate: scanned {traversal.files} files in {root.name} library, skipped {summary}")
+
+
+def _shared_scan(root, depth, limits=None, coordinator=None, max_age=None, report=print):
+    """
+    Tree of `root` scanned here, or by another Maya session through the
+    coordinator. Bundles are read from their index, never shared.
+    Messages go to `report`.
+    """
+    from crudo_sm.core import bundle
+    if coordinator is None or bundle.is_bundle(root.path):
+        return scan_root(root, depth, limits)
+
+    scanned = []
+
+    def produce():
+        tree = scan_root(root, depth, limits)
+        # Verdicts are published before the tree, sessions taking the
+        # tree find them without inspecting anything
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            inspect_entries(list(tree.entries()), executor, coordinator)
+        scanned.append(tree)
+        return json.dumps(_tree_to_dict(tree))
+
+    key = f"{_root_key(root)}|{depth}|{tuple(limits or ())}"
+    payload = coordinator.share(key, produce, max_age, report)
+    if scanned:
+        return scanned[0]
+    return _tree_from_dict(json.loads(payload), root, stale=False)
+
+
+def _start_scan(root, depth, limits=None, coordinator=None, max_age=None):
+    """Start a scan of `root`, or reuse one still running from a previous build."""
+    with _scans_lock:
+        scan = _scans.get(_root_key(root))
+        if scan is None:
+            scan = _scans[_root_key(root)] = _RootScan(root, depth, limits, coordinator, max_age)
+            scan.start()
+    return scan
+
+
+def _consume_scan(scan):
+    """Take a finished scan for this build and print its messages."""
+    with _scans_lock:
+        if _scans.get(_root_key(scan.root)) is scan:
+            del _scans[_root_key(scan.root)]
+        messages, scan.messages[:] = list(scan.messages), []
+    for message in messages:
+        print(message)
+
+
+def snapshot_path(root, snapshot_dir):
+    key = hashlib.sha1(_root_key(root).encode("utf-8")).hexdigest()
+    return join(os.path.expanduser(snapshot_dir), f"{key}.json")
+
+
+def _node_to_dict(node):
+    return {
+        "item": node.item,
+        "name": node.name,
+        "category": node.category,
+        "scripts": {
+            item: {
+                "directory": entry.directory,
+                "digest": entry.digest,
+                "signatures": entry.signatures,
+                "operator": {
+                    key: entry.operator[key] for key in SNAPSHOT_OPERATOR_KEYS
+                    if isinstance(entry.operator.get(key), str)
+                },
+            }
+            for item, entry in node.scripts.items()
+            # Scripts excluded by their requirements never show up cached
+            if entry.verdict is None or entry.verdict.status != shield.Status.EXCLUDED
+        },
+        "children": {item: _node_to_dict(child) for item, child in node.children.items()},
+    }
+
+
+def _node_from_dict(data, root, stale=True):
+    node = MenuNode(data["item"], data["name"], data["category"])
+    for item, script in data["scripts"].items():
+        entry = node.scripts[item] = ScriptEntry(item, script["directory"], root, script["digest"])
+        entry.operator = script["operator"]
+        entry.stale = stale
+        if script.get("signatures") is not None:
+            entry.signatures = {
+                name: tuple(signature) if signature else None
+                for name, signature in script["signatures"].items()
+            }
+    for item, child in data["children"].items():
+        node.children[item] = _node_from_dict(child, root, stale)
+    return node
+
+
+def _tree_to_dict(tree):
+    return {
+        "default": _node_to_dict(tree.default),
+        "menus": {item: _node_to_dict(node) for item, node in tree.menus.items()},
+    }
+
+
+def _tree_from_dict(data, root, stale=True):
+    tree = LibraryTree()
+    tree.default = _node_from_dict(data["default"], root, stale)
+    tree.menus = {item: _node_from_dict(node, root, stale) for item, node in data["menus"].items()}
+    tree.roots.append((root, tree))
+    return tree
+
+
+def save_snapshots(library, snapshot_dir):
+    """Write the tree of every freshly scanned root for the next slow start."""
+    os.makedirs(os.path.expanduser(snapshot_dir), exist_ok=True)
+    for root, tree in library.roots:
+        if root in library.stale:
+            continue
+        path = snapshot_path(root, snapshot_dir)
+        data = {
+            "version": SNAPSHOT_VERSION,
+            "path": root.path,
+            "time": time.time(),
+            **_tree_to_dict(tree),
+        }
+        try:
+            # Other Maya sessions may save the same snapshot
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"ScriptMate: could not save library snapshot: {e}")
+
+
+def load_snapshot(root, snapshot_dir):
+    """Last scanned tree of `root` with entries marked stale, or None."""
+    try:
+        with open(snapshot_path(root, snapshot_dir), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != SNAPSHOT_VERSION:
+            return None
+        return _tree_from_dict(data, root)
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _overlay(target, node):
+    """Merge `node` below `target`; entries already present win (higher priority)."""
+    for item, entry in node.scripts.items():
+        target.scripts.setdefault(item, entry)
+    for item, child in node.children.items():
+        if item not in target.children:
+            target.children[item] = MenuNode(child.item, child.name, child.category)
+        _overlay(target.children[item], child)
+
+
+def overlay(trees):
+    """Merge trees ordered by priority: a script shadows the same logical path below it."""
+    merged = LibraryTree()
+    for tree in trees:
+        merged.roots.extend(tree.roots)
+        _overlay(merged.default, tree.default)
+        for item, node in tree.menus.items():
+            if item not in merged.menus:
+                merged.menus[item] = MenuNode(node.item, node.name, node.category)
+            _overlay(merged.menus[item], node)
+    return merged
+
+
+def inspect_entries(entries, executor, coordinator=None):
+    """
+    Run the shield pass once per distinct content and share the verdicts,
+    also with other Maya sessions when a coordinator is given.
+    """
+    by_digest = {}
+    for entry in entries:
+        by_digest.setdefault(entry.digest or entry.path, []).append(entry)
+
+    published = {}
+    host = host_key(requirements.host)
+    if coordinator is not None:
+        keys = [(group[0].path, group[0].digest) for group in by_digest.values() if group[0].digest]
+        for (path, digest), payload in coordinator.load_verdicts(keys, host).items():
+            try:
+                published[digest] = shield.verdict_from_dict(json.loads(payload))
+            except (ValueError, KeyError, TypeError):
+                continue
+
+    groups = [group for key, group in by_digest.items() if key not in published]
+    if coordinator is not None and coordinator.enabled:
+        Metrics.inc("scriptmate_cache_requests_total", len(published), cache="verdict", result="hit")
+        Metrics.inc(
+            "scriptmate_cache_requests_total",
+            sum(1 for group in groups if group[0].digest), cache="verdict", result="miss",
+        )
+    Metrics.inc("scriptmate_shield_checks_total", len(groups), result="run")
+    Metrics.inc(
+        "scriptmate_shield_checks_total",
+        sum(len(group) for group in by_digest.values()) - len(groups),
+        result="shared",
+    )
+    verdicts = list(executor.map(lambda group: shield.inspect_item(group[0].path), groups))
+    for group, verdict in zip(groups, verdicts):
+        for entry in group:
+            entry.verdict = verdict
+    for digest, verdict in published.items():
+        for entry in by_digest[digest]:
+            entry.verdict = verdict
+
+    if coordinator is not None:
+        payloads = {}
+        for group, verdict in zip(groups, verdicts):
+            if not group[0].digest:
+                continue
+            try:
+                payloads[(group[0].path, group[0].digest)] = json.dumps(shield.verdict_to_dict(verdict))
+            except (TypeError, ValueError):
+                continue   # OPERATOR literal JSON can't hold (sets, bytes)
+        coordinator.store_verdicts(payloads, host)
+    return len(groups)
+
+
+def scan_libraries(
+    roots, depth=SCAN_DEPTH, deadline=None, snapshot_dir=None, on_revalidated=None,
+    coordinator=None, max_age=None, limits=None,
+):
+    """
+    Scan all roots concurrently, overlay them and inspect every visible
+    entry. Duplicate root paths are scanned once, by their first occurrence.
+    Every root is walked within `depth` folders and the ScanLimits `limits`.
+    A `coordinator` shares scans and verdicts with other Maya sessions,
+    results of other sessions older than `max_age` seconds are not reused.
+
+    Roots not scanned within `deadline` seconds come from their snapshot
+    in `snapshot_dir` (or stay empty) and are listed in `stale`;
+    `on_revalidated(root)` is called from the scan thread once such a
+    root has been scanned.
+    """
+    unique = []
+    seen = set()
+    for root in roots:
+        key = _root_key(root) if root.path else None
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(root)
+
+    scans = [_start_scan(root, depth, limits, coordinator, max_age) for root in unique]
+    end = None if deadline is None else time.monotonic() + deadline
+    trees = []
+    stale = []
+    for scan in scans:
+        timeout = None if end is None else max(0.0, end - time.monotonic())
+        if scan.done.wait(timeout) and scan.tree is not None:
+            _consume_scan(scan)
+            trees.append(scan.tree)
+            continue
+
+        if scan.done.is_set():
+            _consume_scan(scan)   # Failed, the next build scans again
+        elif on_revalidated is not None:
+            scan.notify(on_revalidated)
+        tree = load_snapshot(scan.root, snapshot_dir) if snapshot_dir else None
+        if snapshot_dir:
+            Metrics.inc(
+                "scriptmate_cache_requests_total", cache="snapshot", result="miss" if tree is None else "hit"
+            )
+        if tree is None:
+            tree = LibraryTree()
+            tree.roots.append((scan.root, tree))
+        trees.append(tree)
+        stale.append(scan.root)
+        Metrics.inc("scriptmate_scan_snapshot_fallbacks_total", root=scan.root.name)
+
+    merged = overlay(trees)
+    merged.stale = stale
+    # Roots were inspected by their scan threads; an entry left without a
+    # verdict is never read here, it is listed like a snapshot entry
+    for entry in merged.entries():
+        if entry.verdict is None:
+            entry.stale = True
+    return merged
+
+
+def package_signatures(library):
+    """{package directory: {module: file signature}} of the freshly scanned packages."""
+    return {
+        entry.path: entry.signatures for entry in library.entries()
+        if entry.signatures is not None and not entry.stale
+    }
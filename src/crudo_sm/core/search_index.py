@@ -0,0 +1,207 @@
+# search_index.py
+# -*- coding: utf-8 -*-
+"""
+In-memory index over loaded scripts for the search palette.
+A prefix trie answers word-prefix queries, a trigram index catches typos.
+"""
+import re
+from collections import Counter, namedtuple
+
+SearchEntry = namedtuple(
+    "SearchEntry", ["key", "label", "category", "path", "icon", "source"], defaults=("", "")
+)
+
+MIN_FUZZY = 0.34  # minimal share of query trigrams an entry must contain
+
+
+def tokenize(text):
+    """Split camelCase, snake_case and path strings into lowercase words."""
+    text = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", text or "")
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+def trigrams(text):
+    padded = f"  {' '.join(tokenize(text))} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class PrefixTrie:
+    """Trie where every node keeps the ids reachable below it."""
+
+    __slots__ = ("root",)
+
+    def __init__(self):
+        self.root = ({}, set())
+
+    def insert(self, word, entry_id):
+        children, ids = self.root
+        for char in word:
+            node = children.get(char)
+            if node is None:
+                node = children[char] = ({}, set())
+            children, ids = node
+            ids.add(entry_id)
+
+    def remove(self, word, entry_id):
+        """Drop `entry_id` along `word`, nodes left without ids are pruned."""
+        path = []
+        children, ids = self.root
+        for char in word:
+            node = children.get(char)
+            if node is None:
+                break
+            path.append((children, char, node))
+            children, ids = node
+            ids.discard(entry_id)
+        for children, char, node in reversed(path):
+            if node[1] or node[0]:
+                break
+            del children[char]
+
+    def lookup(self, prefix):
+        node = self.root
+        for char in prefix:
+            node = node[0].get(char)
+            if node is None:
+                return set()
+        return node[1]
+
+
+class SearchIndex:
+    """
+        Built once during the menu scan,
+        queried on every keystroke of the palette
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.entries = {}
+        self._name_trie = PrefixTrie()
+        self._meta_trie = PrefixTrie()
+        self._trigrams = {}
+        self._usage = lambda key: 0
+        self._order = None
+        self._position = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, key, label, category="", path="", icon="", source=""):
+        """Index one script; key identifies it for activation and usage counts."""
+        if key in self.entries:
+            return
+        self.entries[key] = SearchEntry(key, label, category, path, icon, source)
+        self._order = None
+
+        for word in tokenize(label):
+            self._name_trie.insert(word, key)
+            self._meta_trie.insert(word, key)
+        for word in tokenize(f"{category} {path}"):
+            self._meta_trie.insert(word, key)
+        for gram in trigrams(f"{label} {category} {path}"):
+            self._trigrams.setdefault(gram, set()).add(key)
+
+    def remove(self, key):
+        """Drop one script, e.g. before its menu is built again."""
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        self._order = None
+
+        for word in tokenize(entry.label):
+            self._name_trie.remove(word, key)
+            self._meta_trie.remove(word, key)
+        for word in tokenize(f"{entry.category} {entry.path}"):
+            self._meta_trie.remove(word, key)
+        for gram in trigrams(f"{entry.label} {entry.category} {entry.path}"):
+            ids = self._trigrams.get(gram)
+            if ids is not None:
+                ids.discard(key)
+                if not ids:
+                    del self._trigrams[gram]
+
+    def set_usage(self, usage):
+        """
+        Rank entries by usage count (most used first), then by label.
+        Called after the scan and whenever a script is run, not per keystroke.
+        """
+        self._usage = usage
+        self._order = None
+
+    def _ranking(self):
+        if self._order is None:
+            self._order = sorted(
+                self.entries,
+                key=lambda key: (-self._usage(key), self.entries[key].label.lower()),
+            )
+            self._position = {key: i for i, key in enumerate(self._order)}
+        return self._order
+
+    def ranked(self):
+        """Every key, most used first."""
+        return list(self._ranking())
+
+    def matching(self, text):
+        """Keys whose label, category or path words start with every query word."""
+        words = tokenize(text)
+        if not words:
+            return set(self.entries)
+        return self._prefix_match(self._meta_trie, words)
+
+    def _prefix_match(self, trie, words):
+        postings = sorted((trie.lookup(word) for word in words), key=len)
+        if len(postings) == 1:
+            return postings[0]
+        return postings[0].intersection(*postings[1:])
+
+    def _fuzzy_match(self, text):
+        """Entries sharing enough trigrams with the query, for typos."""
+        query_grams = trigrams(text)
+        # Grams found in most entries carry no information and cost the most,
+        # grams found in none (the typo itself) can't be matched at all
+        common = max(1, len(self.entries) // 4)
+        postings = [ids for ids in map(self._trigrams.get, query_grams) if ids]
+        rare = [ids for ids in postings if len(ids) <= common] or postings
+
+        hits = Counter()
+        for ids in rare:
+            hits.update(ids)
+        needed = MIN_FUZZY * len(rare)
+        return sorted(
+            (key for key, count in hits.items() if count >= needed),
+            key=lambda key: (-hits[key], self._position[key]),
+        )
+
+    def _top(self, ids, limit, exclude=()):
+        """First `limit` ids in ranking order without sorting large sets."""
+        order = self._ranking()
+        if len(ids) > limit * 8:
+            top = []
+            for key in order:
+                if key in ids and key not in exclude:
+                    top.append(key)
+                    if len(top) == limit:
+                        break
+            return top
+        position = self._position
+        return sorted((key for key in ids if key not in exclude), key=position.__getitem__)[:limit]
+
+    def search(self, text, limit=20):
+        """
+        Return up to `limit` entries for the query text.
+        Name matches rank above category/path matches, usage orders
+        entries within a tier; typo matches are used only as a fallback.
+        """
+        words = tokenize(text)
+        if not words or not self.entries:
+            return []
+        self._ranking()
+
+        keys = self._top(self._prefix_match(self._name_trie, words), limit)
+        if len(keys) < limit:
+            keys += self._top(self._prefix_match(self._meta_trie, words), limit - len(keys), set(keys))
+        if not keys:
+            keys = self._fuzzy_match(text)[:limit]
+        return [self.entries[key] for key in keys]
@@ -2,6 +2,52 @@
 import ast
 import os
 import py_compile
+import time
+from collections import namedtuple
+from enum import Enum
+from crudo_sm.core.import_graph import ImportGraph
+from crudo_sm.core import requirements
+from crudo_sm.core.metrics import Metrics
+
+
+class Status(Enum):
+    SAFE = 'safe'          # Passed every static check
+    UNSAFE = 'unsafe'      # Unsafe imports allowed by the @unsafe decorator
+    BLOCKED = 'blocked'    # Unsafe imports without the @unsafe decorator
+    INVALID = 'invalid'    # Syntax error or unreadable source
+    IGNORED = 'ignored'    # No static OPERATOR dictionary
+    EXCLUDED = 'excluded'  # OPERATOR requirements not met by the running host
+
+
+# Result of the static pass for one library item, `operator` is the
+# OPERATOR dictionary when it is a plain literal
+Verdict = namedtuple(
+    "Verdict",
+    ["status", "unsafe_imports", "reason", "error", "import_graph", "operator"],
+    defaults=(None, None),
+)
+
+
+def verdict_to_dict(verdict):
+    return {
+        "status": verdict.status.value,
+        "unsafe_imports": verdict.unsafe_imports,
+        "reason": verdict.reason,
+        "error": verdict.error,
+        "import_graph": verdict.import_graph.to_dict() if verdict.import_graph else None,
+        "operator": verdict.operator,
+    }
+
+
+def verdict_from_dict(data):
+    return Verdict(
+        Status(data["status"]),
+        data["unsafe_imports"],
+        data["reason"],
+        data["error"],
+        ImportGraph.from_dict(data["import_graph"]) if data["import_graph"] else None,
+        data["operator"],
+    )
 
 
 def unsafe(func=None, reason=None):
@@ -43,6 +89,8 @@ class UnsafeModuleChecker:
         self.unsafe_findings = {}
         self.has_unsafe_decorator = False
         self.decorator_reason = None
+        self.tree = None
+        self.import_graph = None
 
     def check_file(self):
         """
@@ -51,6 +99,7 @@ class UnsafeModuleChecker:
         """
         with open(self.file_path, "r", encoding="utf-8") as f:
             tree = ast.parse(f.read(), filename=self.file_path)
+        self.tree = tree
 
         has_unsafe_imports = []
         unsafe_decorator_info = (False, None)
@@ -101,13 +150,22 @@ class UnsafeModuleChecker:
             self.has_unsafe_decorator = main_decorator_info[0]
             self.decorator_reason = main_decorator_info[1]
 
+        trees = {}
+        visited = set()
+
         def scan_directory(dir_path):
+            # Symlinked folders may loop back, walk every directory once
+            stat = os.stat(dir_path)
+            if (stat.st_dev, stat.st_ino) in visited:
+                return
+            visited.add((stat.st_dev, stat.st_ino))
             for item in os.listdir(dir_path):
                 item_path = os.path.join(dir_path, item)
 
                 if item.endswith(".py") and not item.startswith("._"):
                     checker = UnsafeModuleChecker(item_path)
                     unsafe_imports, _ = checker.check_file()
+                    trees[item_path] = checker.tree
                     if unsafe_imports:
                         if not self.has_unsafe_decorator:
                             # Only track as unsafe if no @unsafe decorator in main.py
@@ -123,6 +181,8 @@ class UnsafeModuleChecker:
             return self.check_file()
         else:
             scan_directory(self.file_path)
+            # Reuse the parsed sources for the intra-package import graph
+            self.import_graph = ImportGraph.from_trees(self.file_path, trees)
             return self.unsafe_findings, (
                 self.has_unsafe_decorator,
                 self.decorator_reason,
@@ -136,9 +196,9 @@ def check_unsafe_modules(file_path):
     return checker.check_file()
 
 
-def has_operator_dictionary(file_path):
+def find_operator(file_path):
     """
-    Check if a Python file defines a dictionary named 'OPERATOR'.
+    Return the dictionary node assigned to 'OPERATOR' in a Python file, or None.
     """
     with open(file_path, "r", encoding='utf-8') as f:
         tree = ast.parse(f.read(), filename=file_path)
@@ -149,5 +209,105 @@ def has_operator_dictionary(file_path):
             for target in node.targets:
                 if isinstance(target, ast.Name) and target.id == "OPERATOR":
                     if isinstance(node.value, ast.Dict):  # Check if it's a dictionary
-                        return True
-    return False
+                        return node.value
+    return None
+
+
+def has_operator_dictionary(file_path):
+    """
+    Check if a Python file defines a dictionary named 'OPERATOR'.
+    """
+    return find_operator(file_path) is not None
+
+
+def operator_literal(node):
+    """OPERATOR as a dict when it is built from literals only, otherwise None."""
+    try:
+        value = ast.literal_eval(node)
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        return None
+    return value if isinstance(value, dict) else None
+
+
+def operator_requirements(node):
+    """
+    Requirement keys of an OPERATOR dictionary node, each evaluated on its
+    own so a non-literal name or icon doesn't hide them.
+    """
+    found = {}
+    for key, value in zip(node.keys, node.values):
+        if isinstance(key, ast.Constant) and key.value in requirements.REQUIREMENT_KEYS:
+            try:
+                found[key.value] = ast.literal_eval(value)
+            except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+                found[key.value] = "<not a literal>"
+    return found
+
+
+def inspect_item(item_path):
+    """
+    Run the static checks the loader applies before importing an item.
+    Works for single-file scripts and for package directories with main.py.
+    Returns a Verdict; allowed items have a SAFE or UNSAFE status.
+    """
+    started = time.perf_counter()
+    verdict = _inspect_item(item_path)
+    Metrics.observe("scriptmate_shield_duration_seconds", time.perf_counter() - started)
+    Metrics.inc("scriptmate_shield_verdicts_total", status=verdict.status.value)
+    return verdict
+
+
+def _inspect_item(item_path):
+    is_package = os.path.isdir(item_path)
+    path_to_check = os.path.join(item_path, "main.py") if is_package else item_path
+
+    try:
+        operator_node = find_operator(path_to_check) if os.path.isfile(path_to_check) else None
+        if operator_node is None:
+            return Verdict(Status.IGNORED, "-", "No OPERATOR dictionary", "-")
+        operator = operator_literal(operator_node)
+        unmet = requirements.unmet(operator_requirements(operator_node))
+        if unmet:
+            return Verdict(Status.EXCLUDED, "-", unmet, "-")
+
+        import_graph = None
+        if is_package:
+            checker = UnsafeModuleChecker(item_path)
+            unsafe_findings, (has_unsafe_decorator, unsafe_reason) = checker.check_package()
+            import_graph = checker.import_graph
+            unsafe_imports = "; ".join(
+                f"{os.path.basename(f)}: {i}" for f, i in unsafe_findings.items()
+            )
+            if unsafe_findings and not has_unsafe_decorator:
+                return Verdict(
+                    Status.BLOCKED,
+                    unsafe_imports,
+                    "Package has unsafe imports",
+                    "Blocked package without @unsafe decorator",
+                )
+        else:
+            unsafe_findings, (has_unsafe_decorator, unsafe_reason) = check_unsafe_modules(
+                path_to_check
+            )
+            unsafe_imports = str(unsafe_findings)[1:-1]
+            if unsafe_findings and not has_unsafe_decorator:
+                return Verdict(
+                    Status.BLOCKED,
+                    unsafe_imports,
+                    "@unsafe not specified",
+                    "Blocked module without @unsafe decorator",
+                )
+    except (IndentationError, SyntaxError, UnicodeDecodeError, OSError) as e:
+        return Verdict(Status.INVALID, "-", "Syntax Error", str(e))
+
+    unsafe_imports = unsafe_imports or "-"
+    is_valid, validation_reason, error_message = validate_module(path_to_check)
+    if not is_valid:
+        return Verdict(Status.INVALID, unsafe_imports, validation_reason, error_message)
+
+    if has_unsafe_decorator:
+        return Verdict(
+            Status.UNSAFE, unsafe_imports, f"@unsafe used ({unsafe_reason})", "-",
+            import_graph, operator,
+        )
+    return Verdict(Status.SAFE, unsafe_imports, "Safe module", "-", import_graph, operator)
@@ -0,0 +1,234 @@
+# traversal.py
+# -*- coding: utf-8 -*-
+"""
+Rules for walking a library tree.
+
+A `.scriptmateignore` file, in gitignore syntax, may sit in any library
+folder; its patterns apply to that folder and everything below it, and
+deeper files override shallower ones:
+
+    # data next to the scripts
+    cache/
+    *.abc
+    /vendor/
+    !vendor/keep_me.py
+
+Files inside a package are always analysed as a whole, they can all be
+imported. Limits bound the folder depth, the python files analysed per
+root and their size; the folder depth is given by the scanner.
+Directories reached twice (symlink loops) are walked once. Everything skipped is counted per reason.
+"""
+import os
+import re
+from collections import Counter, namedtuple
+from os.path import join, isdir
+
+IGNORE_FILE = ".scriptmateignore"
+
+# Python files analysed per root and their size in bytes, 0 for no limit
+ScanLimits = namedtuple("ScanLimits", ["max_files", "max_file_size"], defaults=(0, 0))
+
+SKIP_REASONS = {
+    "ignored": "ignored",
+    "depth": "too deep",
+    "loop": "loops",
+    "too_large": "too large",
+    "file_limit": "over the file limit",
+}
+
+
+def limits_from_config(config):
+    return ScanLimits(
+        config.get_core_param("scan", "max_files") or 0,
+        (config.get_core_param("scan", "max_file_size_kb") or 0) * 1024,
+    )
+
+
+def _translate(pattern):
+    """Regex of one gitignore glob, matched against slash separated relative paths."""
+    regex = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith("**/", i):
+            regex.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            regex.append(".*")
+            i += 2
+            continue
+        if char == "*":
+            regex.append("[^/]*")
+        elif char == "?":
+            regex.append("[^/]")
+        elif char == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                regex.append(re.escape(char))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                regex.append(f"[{body}]")
+                i = end
+        elif char == "\\" and i + 1 < len(pattern):
+            i += 1
+            regex.append(re.escape(pattern[i]))
+        else:
+            regex.append(re.escape(char))
+        i += 1
+    return "".join(regex)
+
+
+def parse_ignore(text):
+    """[(regex, negate, dir_only)] of the lines of an ignore file."""
+    patterns = []
+    for line in text.splitlines():
+        # Trailing spaces don't count unless escaped
+        line = re.sub(r"(?<!\\)\s+$", "", line)
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        elif line.startswith(("\\#", "\\!")):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        # A slash before the end anchors the pattern to the ignore file's folder
+        anchored = "/" in line
+        body = _translate(line.lstrip("/"))
+        regex = re.compile(("^" if anchored else "^(?:.*/)?") + body + "$")
+        patterns.append((regex, negate, dir_only))
+    return patterns
+
+
+class IgnoreRules:
+    """
+        Patterns of the ignore files from a library root down to one
+        folder, outermost first
+    """
+
+    def __init__(self, chain=()):
+        self.chain = tuple(chain)   # (base directory, patterns)
+
+    def child(self, directory, names):
+        """Rules for the items of `directory`, given the names it contains."""
+        if IGNORE_FILE not in names:
+            return self
+        try:
+            with open(join(directory, IGNORE_FILE), "r", encoding="utf-8") as f:
+                patterns = parse_ignore(f.read())
+        except (OSError, UnicodeDecodeError):
+            return self
+        return IgnoreRules(self.chain + ((directory, patterns),)) if patterns else self
+
+    @classmethod
+    def for_directory(cls, root_path, directory):
+        """Rules of every ignore file from `root_path` down to `directory`."""
+        rules = cls()
+        relative = os.path.relpath(directory, root_path)
+        folders = [] if relative == "." else relative.split(os.sep)
+        current = root_path
+        for folder in [None] + folders:
+            if folder is not None:
+                current = join(current, folder)
+            try:
+                rules = rules.child(current, os.listdir(current))
+            except OSError:
+                break
+        return rules
+
+    def ignored(self, path, is_dir):
+        """Last matching pattern wins, `!` patterns bring an item back."""
+        result = False
+        for base, patterns in self.chain:
+            relative = os.path.relpath(path, base).replace(os.sep, "/")
+            if relative.startswith(".."):
+                continue
+            for regex, negate, dir_only in patterns:
+                if dir_only and not is_dir:
+                    continue
+                if regex.match(relative):
+                    result = not negate
+        return result
+
+
+class Traversal:
+    """
+        State of one walk over a library root: limits, directories
+        visited (by device and inode) and what was skipped
+    """
+
+    def __init__(self, limits=None):
+        self.limits = limits or ScanLimits()
+        self.files = 0
+        self.skipped = Counter()
+        self._visited = set()
+
+    def enter(self, directory):
+        """False when `directory` was reached before, e.g. through a symlink loop."""
+        try:
+            stat = os.stat(directory)
+        except OSError:
+            return False
+        key = (stat.st_dev, stat.st_ino)
+        if key in self._visited:
+            self.skipped["loop"] += 1
+            return False
+        self._visited.add(key)
+        return True
+
+    def admit(self, file_path):
+        """Count a python file to analyse; False when it is over the size or file limit."""
+        if self.limits.max_files and self.files >= self.limits.max_files:
+            self.skipped["file_limit"] += 1
+            return False
+        if self.limits.max_file_size:
+            try:
+                if os.path.getsize(file_path) > self.limits.max_file_size:
+                    self.skipped["too_large"] += 1
+                    return False
+            except OSError:
+                return False
+        self.files += 1
+        return True
+
+    def package_files(self, package_dir, exclude="__", extension=".py"):
+        """
+        Python files of a package in os.walk order (content digests
+        depend on it), or None when one of them is over a limit and the
+        package can't be analysed.
+        """
+        files = []
+
+        def walk(directory):
+            if not self.enter(directory):
+                return True
+            try:
+                names = sorted(os.listdir(directory))
+            except OSError:
+                return True
+            dirs = []
+            for name in names:
+                path = join(directory, name)
+                if isdir(path):
+                    if not name.startswith(exclude):
+                        dirs.append(path)
+                elif name.endswith(extension) and not name.startswith("._"):
+                    if not self.admit(path):
+                        return False
+                    files.append(path)
+            return all(walk(path) for path in dirs)
+
+        return files if walk(package_dir) else None
+
+    def summary(self):
+        """"3 ignored, 1 loops" or "" when nothing was skipped."""
+        return ", ".join(
+            f"{self.skipped[reason]} {label}" for reason, label in SKIP_REASONS.items()
+            if self.skipped[reason]
+        )
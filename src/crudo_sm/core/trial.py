@@ -0,0 +1,297 @@
+# trial.py
+# -*- coding: utf-8 -*-
+"""
+Trial imports of new or changed library scripts, outside of Maya.
+Each script is imported once per content digest in a separate
+interpreter (mayapy when found, otherwise python) by trial_worker.py,
+with Maya modules stubbed. Workers run in parallel in the background
+while menus are built; results are kept by digest. While a failed
+trial stands, the session does not import the script, and the failure
+counts toward the quarantine like a failed import. A cold interpreter
+with stubbed modules is no fair clock: a slow trial is reported, and
+only one over `slow_factor` times the budget keeps the script out.
+
+Imports that only failed because the worker lacks a module this session
+has are inconclusive and never quarantine a script.
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from os.path import join, dirname, basename, isfile
+from pathlib import Path
+
+from crudo_sm import PACKAGE_DIR
+from crudo_sm.core import requirements
+from crudo_sm.core.metrics import Metrics
+from crudo_sm.core.quarantine import Quarantine
+from crudo_sm.core.trial_worker import RESULT_PREFIX
+
+WORKER = join(dirname(os.path.abspath(__file__)), "trial_worker.py")
+DEFAULT_STUBS = ["maya", "pymel", "mtoa", "arnold", "ufe", "mayaUsd"]
+
+
+def find_interpreter(configured=""):
+    """Configured interpreter, mayapy next to this Maya, or the python on PATH."""
+    if configured:
+        return os.path.expanduser(configured)
+    executable = sys.executable or ""
+    if basename(executable).lower().startswith(("mayapy", "python")):
+        return executable
+    for name in ("mayapy", "mayapy.exe"):
+        candidate = join(dirname(executable), name)
+        if isfile(candidate):
+            return candidate
+    return shutil.which("python3") or shutil.which("python")
+
+
+class TrialRunner:
+    """
+        Background trial imports and their results, keyed by content digest:
+        {"path", "ok", "seconds", "error", "missing", "modules", "time"},
+        plus "counted" once a failure reached the quarantine
+    """
+    _instance = None
+
+    @staticmethod
+    def get_instance(config=None):
+        if TrialRunner._instance is None:
+            if config is None:
+                raise ValueError(
+                    "TrialRunner instance is not initialized and no config provided."
+                )
+            TrialRunner._instance = TrialRunner(config)
+        return TrialRunner._instance
+
+    def __init__(self, config):
+        if TrialRunner._instance is not None:
+            raise RuntimeError("Use `get_instance` to access the TrialRunner.")
+
+        self.enabled = bool(config.get_core_param("trial", "state"))
+        self.path = Path(
+            config.get_core_param("trial", "path") or "~/crudo.dev/cache/scriptMate/trials.json"
+        ).expanduser()
+        self.interpreter = find_interpreter(config.get_core_param("trial", "interpreter") or "")
+        self.workers = config.get_core_param("trial", "workers") or 2
+        self.timeout = (config.get_core_param("trial", "timeout_ms") or 20000) / 1000.0
+        self.wait_time = (config.get_core_param("trial", "wait_ms") or 2000) / 1000.0
+        self.stubs = config.get_core_param("trial", "stub_modules") or DEFAULT_STUBS
+        self.slow_factor = config.get_core_param("trial", "slow_factor") or 5
+        self.results = self._load()
+        self.pending = {}          # digest -> path
+        self.settled = set()       # digests whose result reached the quarantine
+        self.deadline = 0.0
+        self._condition = threading.Condition()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def save(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+            with self._condition:
+                data = json.dumps(self.results, indent=4)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"ScriptMate: could not save trial results: {e}")
+
+    def submit(self, entries, on_result=None):
+        """
+        Trial every (digest, path) with no result yet in the background.
+        `on_result(digest, path)` is called from a worker thread when a
+        result arrives. Returns the number of trials started.
+        """
+        if not self.enabled or not self.interpreter:
+            return 0
+        with self._condition:
+            todo = {
+                digest: path for digest, path in entries
+                if digest and digest not in self.results and digest not in self.pending
+            }
+            self.pending.update(todo)
+            # Imports of this build wait this long for their trial
+            self.deadline = time.monotonic() + self.wait_time
+        if todo:
+            threading.Thread(
+                target=self._run_all, args=(todo, on_result), name="ScriptMateTrials", daemon=True
+            ).start()
+        return len(todo)
+
+    def _run_all(self, todo, on_result):
+        def run(digest, path):
+            result = self.run_one(path)
+            result["path"] = path
+            result["time"] = time.strftime("%Y-%m-%d %H:%M:%S")
+            with self._condition:
+                self.results[digest] = result
+                self.pending.pop(digest, None)
+                self._condition.notify_all()
+            Metrics.inc(
+                "scriptmate_trial_imports_total",
+                result=self.outcome(result, Quarantine.get_instance().budget),
+            )
+            if on_result is not None:
+                on_result(digest, path)
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ScriptMateTrial") as executor:
+            for future in [executor.submit(run, digest, path) for digest, path in todo.items()]:
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"ScriptMate: trial import error: {e}")
+        with self._condition:
+            for digest in todo:
+                self.pending.pop(digest, None)
+            self._condition.notify_all()
+        self.save()
+
+    def run_one(self, path):
+        """Result of one trial import in a fresh interpreter."""
+        command = [self.interpreter, WORKER]
+        for name in self.stubs:
+            command += ["--stub", name]
+        command.append(path)
+        # Scripts may import crudo_sm like they do inside Maya
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [dirname(PACKAGE_DIR), env.get("PYTHONPATH")]))
+        try:
+            process = subprocess.run(
+                command, capture_output=True, text=True, timeout=self.timeout,
+                cwd=dirname(path), stdin=subprocess.DEVNULL, env=env,
+            )
+        except subprocess.TimeoutExpired:
+            return {
+                "ok": False, "seconds": self.timeout, "error": f"no result after {self.timeout:.0f} s",
+                "error_type": "Timeout", "missing": "", "modules": [],
+            }
+        except OSError as e:
+            return {
+                "ok": False, "seconds": 0.0, "error": f"worker did not start: {e}",
+                "error_type": "Worker", "missing": "", "modules": [],
+            }
+        for line in reversed(process.stdout.splitlines()):
+            if line.startswith(RESULT_PREFIX):
+                try:
+                    return json.loads(line[len(RESULT_PREFIX):])
+                except ValueError:
+                    break
+        # Killed by a signal while importing, or gone without a word
+        error = (process.stderr.strip().splitlines() or [f"exit code {process.returncode}"])[-1]
+        return {
+            "ok": False, "seconds": 0.0, "error": error,
+            "error_type": "Crash" if process.returncode < 0 else "Worker", "missing": "", "modules": [],
+        }
+
+    def outcome(self, result, budget=None):
+        """"ok", "slow", "failed" or "inconclusive"."""
+        if result.get("ok"):
+            return "slow" if budget is not None and result.get("seconds", 0.0) > budget else "ok"
+        if result.get("error_type") == "Worker":
+            return "inconclusive"
+        missing = result.get("missing")
+        if missing and requirements.is_available(missing):
+            # Installed here, only the worker's interpreter lacks it
+            return "inconclusive"
+        return "failed"
+
+    def seconds(self, digest):
+        """Import time measured by a successful trial of `digest`, or None."""
+        result = self.results.get(digest) if digest else None
+        if result is None or not result.get("ok"):
+            return None
+        return result.get("seconds")
+
+    def is_pending(self, digest):
+        return bool(digest) and digest in self.pending
+
+    def wait(self, digest):
+        """Result of `digest`, waiting for a running trial until the build deadline."""
+        if not digest:
+            return None
+        with self._condition:
+            while digest in self.pending:
+                remaining = self.deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            return self.results.get(digest)
+
+    def blocking(self, digest):
+        """Why the standing trial result keeps `digest` out of the session, or ""."""
+        result = self.results.get(digest) if digest else None
+        if result is None:
+            return ""
+        budget = Quarantine.get_instance().budget
+        outcome = self.outcome(result, budget)
+        if outcome == "failed":
+            return f"Trial import failed: {result.get('error', '')}"
+        if outcome == "slow" and result.get("seconds", 0.0) > budget * self.slow_factor:
+            return (
+                f"Trial import took {result['seconds'] * 1000:.0f} ms, "
+                f"over {self.slow_factor}x the budget"
+            )
+        return ""
+
+    def settle(self, digest, path):
+        """
+        Hand the trial result of `digest` to the quarantine; call from the
+        main thread. Returns why the script must not be imported, or "".
+        """
+        quarantine = Quarantine.get_instance()
+        result = self.wait(digest)
+        if result is not None and digest not in self.settled:
+            self.settled.add(digest)
+            outcome = self.outcome(result, quarantine.budget)
+            if outcome == "slow":
+                print(
+                    f"ScriptMate: trial import of {path} took {result['seconds'] * 1000:.0f} ms, "
+                    f"budget is {quarantine.budget * 1000:.0f} ms"
+                )
+            elif outcome == "failed" and not result.get("counted"):
+                # Counted once per digest, not again by every later session
+                print(f"ScriptMate: trial import of {path} failed: {result.get('error', '')}")
+                with self._condition:
+                    result["counted"] = True
+                self.save()
+                quarantine.record_failure(digest, path)
+        if quarantine.is_quarantined(digest):
+            return quarantine.entries[digest].get("reason", "") or "Quarantined"
+        return self.blocking(digest)
+
+    def clear(self):
+        """Forget every result, scripts are tried again at the next build."""
+        with self._condition:
+            self.results.clear()
+            self.settled.clear()
+        self.save()
+
+    def print_report(self):
+        if not self.results and not self.pending:
+            print("ScriptMate: no trial imports yet")
+            return
+        budget = Quarantine.get_instance().budget
+        print(
+            f"ScriptMate: {len(self.results)} trial import(s), {len(self.pending)} running"
+            f" ({self.interpreter or 'no interpreter'})"
+        )
+        for digest, result in sorted(self.results.items(), key=lambda item: item[1].get("path", "")):
+            outcome = self.outcome(result, budget)
+            detail = result.get("error") if not result.get("ok") else ", ".join(result.get("modules", [])) or "-"
+            print(
+                f"  {result.get('path', '')}\n"
+                f"      {outcome} in {result.get('seconds', 0.0) * 1000:.0f} ms: {detail}"
+                f" ({result.get('time', '')}, {digest[:12]})"
+                + ("\n      not imported by the session" if self.blocking(digest) else "")
+            )
@@ -0,0 +1,204 @@
+# trial_worker.py
+# -*- coding: utf-8 -*-
+"""
+Trial import of one library script in a fresh interpreter, started by
+crudo_sm.core.trial. Standard library only, the interpreter may be any
+Python 3 or mayapy. Maya modules (and the other --stub names) are
+replaced by permissive stubs, so scripts import without a Maya session.
+`execute()` is never called.
+
+Usage:
+    python trial_worker.py [--stub maya --stub pymel ...] PATH
+
+Prints one RESULT_PREFIX line of JSON: ok, seconds, error, error_type,
+missing (name of a module not found) and modules (top-level modules the
+import pulled in).
+"""
+import argparse
+import importlib.abc
+import importlib.machinery
+import importlib.util
+import io
+import json
+import os
+import sys
+import time
+import traceback
+import types
+
+RESULT_PREFIX = "SCRIPTMATE_TRIAL "
+
+
+class Stub:
+    """Stands in for any Maya object: callable, subscriptable, falsy, empty."""
+
+    def __init__(self, name="stub"):
+        self._name = name
+
+    def __getattr__(self, name):
+        if name.startswith("__") and name.endswith("__"):
+            raise AttributeError(name)
+        return Stub(f"{self._name}.{name}")
+
+    def __call__(self, *args, **kwargs):
+        return Stub(f"{self._name}()")
+
+    def __getitem__(self, key):
+        return Stub(f"{self._name}[]")
+
+    def __setitem__(self, key, value):
+        pass
+
+    def __iter__(self):
+        return iter(())
+
+    def __len__(self):
+        return 0
+
+    def __bool__(self):
+        return False
+
+    def __int__(self):
+        return 0
+
+    def __float__(self):
+        return 0.0
+
+    def __index__(self):
+        return 0
+
+    def __str__(self):
+        return ""
+
+    def __fspath__(self):
+        return ""
+
+    def __contains__(self, item):
+        return False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def __mro_entries__(self, bases):
+        # `class Tool(OpenMayaMPx.MPxCommand)` subclasses a plain object
+        return (object,)
+
+    def _same(self, other):
+        return Stub(self._name)
+
+    __add__ = __radd__ = __sub__ = __rsub__ = __mul__ = __rmul__ = _same
+    __truediv__ = __rtruediv__ = __floordiv__ = __mod__ = __or__ = __and__ = _same
+
+    def __lt__(self, other):
+        return False
+
+    __le__ = __gt__ = __ge__ = __lt__
+
+    def __hash__(self):
+        return id(self)
+
+
+class StubModule(types.ModuleType):
+    def __getattr__(self, name):
+        if name.startswith("__") and name.endswith("__"):
+            raise AttributeError(name)
+        return Stub(f"{self.__name__}.{name}")
+
+
+class StubFinder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    """Serves every module under the stubbed top-level names."""
+
+    def __init__(self, names):
+        self.names = set(names)
+
+    def find_spec(self, fullname, path=None, target=None):
+        if fullname.split(".", 1)[0] not in self.names:
+            return None
+        return importlib.machinery.ModuleSpec(fullname, self, is_package=True)
+
+    def create_module(self, spec):
+        module = StubModule(spec.name)
+        module.__path__ = []
+        return module
+
+    def exec_module(self, module):
+        pass
+
+
+def unsafe(func=None, reason=None):
+    """No-op stand-in of the @unsafe decorator the loader injects."""
+    def decorator(f):
+        return f
+    return decorator if func is None else decorator(func)
+
+
+def trial_import(path):
+    path = os.path.abspath(path)
+    is_package = os.path.isdir(path)
+    item = os.path.basename(path)
+    bare_name = item if is_package else item[:-3]
+    module_name = f"scriptmate_trial.{bare_name}"
+
+    if is_package:
+        spec = importlib.util.spec_from_file_location(
+            module_name, os.path.join(path, "main.py"), submodule_search_locations=[path]
+        )
+    else:
+        spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    module.__dict__["unsafe"] = unsafe
+    sys.modules["scriptmate_trial"] = types.ModuleType("scriptmate_trial")
+    sys.modules[module_name] = module
+    if is_package and bare_name not in sys.modules:
+        sys.modules[bare_name] = module   # Absolute imports, one package per process
+
+    before = set(sys.modules)
+    result = {"ok": True, "seconds": 0.0, "error": "", "error_type": "", "missing": "", "modules": []}
+    started = time.perf_counter()
+    try:
+        spec.loader.exec_module(module)
+    except BaseException as e:
+        result.update(
+            ok=False,
+            error="".join(traceback.format_exception_only(type(e), e)).strip(),
+            error_type=type(e).__name__,
+            missing=getattr(e, "name", None) or "" if isinstance(e, ImportError) else "",
+        )
+    result["seconds"] = time.perf_counter() - started
+
+    own = {"scriptmate_trial", bare_name}
+    result["modules"] = sorted({
+        name.split(".", 1)[0] for name in set(sys.modules) - before
+        if name.split(".", 1)[0] not in own and not name.startswith("_")
+    })
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Trial import of one ScriptMate script.")
+    parser.add_argument("path", help="Script file or package directory")
+    parser.add_argument("--stub", action="append", default=[], help="Top-level module to stub")
+    args = parser.parse_args(argv)
+
+    # This folder is on sys.path as the script's own, its logging.py
+    # and friends would shadow the standard library for the script
+    here = os.path.dirname(os.path.abspath(__file__))
+    sys.path[:] = [entry for entry in sys.path if os.path.abspath(entry or ".") != here]
+    sys.meta_path.insert(0, StubFinder(args.stub))
+    # Whatever the script prints must not mix with the result line
+    real_stdout, sys.stdout = sys.stdout, io.StringIO()
+    try:
+        result = trial_import(args.path)
+    finally:
+        sys.stdout = real_stdout
+    real_stdout.write(RESULT_PREFIX + json.dumps(result) + "\n")
+    real_stdout.flush()
+    # Threads the script started must not keep the worker alive
+    os._exit(0)
+
+
+if __name__ == "__main__":
+    main()
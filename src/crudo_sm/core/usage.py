@@ -0,0 +1,70 @@
+# usage.py
+# -*- coding: utf-8 -*-
+import json
+import os
+from pathlib import Path
+
+
+class UsageTracker:
+    """
+        Per-user script usage counters and the last idle import time
+        of each script, persisted as a small json file next to the user
+        settings
+    """
+    _instance = None
+
+    @staticmethod
+    def get_instance(config=None):
+        if UsageTracker._instance is None:
+            if config is None:
+                raise ValueError(
+                    "UsageTracker instance is not initialized and no config provided."
+                )
+            UsageTracker._instance = UsageTracker(config)
+        return UsageTracker._instance
+
+    def __init__(self, config):
+        if UsageTracker._instance is not None:
+            raise RuntimeError("Use `get_instance` to access the UsageTracker.")
+
+        self.path = Path(config.get_core_param("usage", "path")).expanduser()
+        self.counts, self.import_times = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}, {}
+        if not isinstance(data, dict):
+            return {}, {}
+        if "counts" not in data:
+            # Files written before import times were kept hold counters only
+            return data, {}
+        return data.get("counts") or {}, data.get("import_times") or {}
+
+    def save(self):
+        """Write counters through a temporary file so a crash never truncates them."""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"counts": self.counts, "import_times": self.import_times}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"ScriptMate: could not save usage: {e}")
+
+    def record(self, key):
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.save()
+
+    def count(self, key):
+        return self.counts.get(key, 0)
+
+    def set_import_time(self, key, seconds):
+        """Remember how long a script took to import, saved with the next save()."""
+        self.import_times[key] = round(seconds, 4)
+
+    def import_time(self, key):
+        """Seconds of the last measured import, None when never measured."""
+        return self.import_times.get(key)
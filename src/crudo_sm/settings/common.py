@@ -1,9 +1,12 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 import json
+import os
 from pathlib import Path
 import shutil
 
+from crudo_sm import PACKAGE_DIR
+
 class JsonConfig:
     def __init__(self, path):
         """
@@ -63,7 +66,7 @@ class ConfigManager:
         if self._initialized:
             return
 
-        self.current_directory = Path(__file__).parent
+        self.current_directory = Path(PACKAGE_DIR) / "settings"
         self.core_config_file = (self.current_directory / "config.json").resolve()
         self.core_config = None
         self.local_config = None
@@ -119,12 +122,46 @@ class ConfigManager:
         """Get the path to local config file"""
         return self.local_config_path
 
+    def get_library_roots(self):
+        """
+        Ordered (name, path) library roots, highest priority first.
+        Configs without a "libraries" list fall back to the userScripts
+        local and network paths; a path listed twice is kept once.
+        """
+        data = self.local_config.data or {}
+        libraries = data.get('libraries')
+        if not isinstance(libraries, list) or not libraries:
+            user_scripts = (data.get('userScripts') or [{}])[0]
+            libraries = [
+                {'name': 'Local', 'path': user_scripts.get('local_path')},
+                {'name': 'Network', 'path': user_scripts.get('network_path')},
+            ]
+
+        roots = []
+        seen = set()
+        for library in libraries:
+            path = library.get('path')
+            if not path:
+                continue
+            # No resolve(): it would touch a possibly unreachable mount
+            path = os.path.abspath(os.path.expanduser(path))
+            if path not in seen:
+                seen.add(path)
+                roots.append((library.get('name') or Path(path).name, path))
+        return roots
+
     def update_user_scripts_paths(self, network_path, local_path):
         """Update user scripts paths in local config"""
         data = self.get_local_config_data()
         if data and 'userScripts' in data:
             data['userScripts'][0]['network_path'] = network_path
             data['userScripts'][0]['local_path'] = local_path
+            # Keep the Local and Network library roots in sync
+            for library in data.get('libraries') or []:
+                if library.get('name') == 'Local':
+                    library['path'] = local_path
+                elif library.get('name') == 'Network':
+                    library['path'] = network_path
             self.save_local_config_data(data)
             return True
         return False
@@ -5,49 +5,62 @@ interface builder
 
 # python modules
 import os
-from os.path import join, isdir
 import sys
+import json
 import types
-from pathlib import Path
+import hashlib
+import time
+from contextlib import contextmanager
+from functools import partial
 
 from crudo_sm.core.module_tracker import ModuleTracker
+from crudo_sm.core.quarantine import Quarantine
+from crudo_sm.core.trial import TrialRunner
+from crudo_sm.core.metrics import Metrics
+from crudo_sm.core.coordination import ScanCoordinator
+from crudo_sm.core.logging import ScriptManagerLogger
+from crudo_sm.core.import_graph import PackageReloader
 
 # sys.path.insert(0, os.path.abspath(join(os.path.dirname(__file__), "..")))
 # Own modules
-from crudo_sm.utils import string_utils, file_utils
-from crudo_sm.core import loader
-from crudo_sm.user_interface import preferences, buttons
+from crudo_sm.utils import string_utils
+from crudo_sm.core import loader, scanner, requirements, chains, shield, bundle
+from crudo_sm.core.scanner import LibraryRoot
+from crudo_sm.core.traversal import limits_from_config
+from crudo_sm.core.preload import Preloader
+from crudo_sm.core.registry import ScriptRegistry
+from crudo_sm.core.search_index import SearchIndex
+from crudo_sm.core.usage import UsageTracker
+from crudo_sm.user_interface import preferences, buttons, search_palette, script_browser
+from crudo_sm.user_interface.icons import IconIndex, get_icon
+from crudo_sm.user_interface.menu_model import Divider, Item, SubMenu, Menu, MenuLayout
+from crudo_sm.user_interface.menu_render import create_renderer
 from crudo_sm.settings.common import CONFIG
 
 # Import Maya modules
 import maya.cmds as cmds
+import maya.utils
 
-# Global variables to keep track of previous paths and menu directories
-previous_network_path = None
-previous_local_path = None
-previous_local_menu_dirs = set()
-previous_network_menu_dirs = set()
+# OPERATOR requirements are checked against this Maya
+requirements.configure(cmds.about(version=True))
 
+# Menus currently drawn in Maya
+current_layout = None
+renderer = None
+# Idle-time import of the most used scripts
+preloader = None
+preload_job = None
 
-def get_icon(icon_title="/idtools.png"):
-    """Return icon folder"""
-    icon_dir = (
-        os.path.normpath(
-            join(os.path.abspath(join(os.path.dirname(__file__), "..")), "icon")
-        )
-        + icon_title
-    )
-    return icon_dir
+SEARCH_INDEX = SearchIndex()
+QUARANTINE_CATEGORY = "Quarantined"
+CONTEXT_MENU_NAME = "ScriptMateDefaultContextMenu"
 
 
-def clear_menu_items(menu_name):
-    """
-    Clear all items from the given menu without deleting the menu itself.
-    """
-    if cmds.menu(menu_name, exists=True):
-        items = cmds.menu(menu_name, query=True, itemArray=True) or []
-        for item in items:
-            cmds.deleteUI(item, menuItem=True)
+def get_renderer():
+    global renderer
+    if renderer is None:
+        renderer = create_renderer(CONFIG.get_core_param("menus", "renderer"), run_script, ACTIONS)
+    return renderer
 
 
 def rescan_and_update():
@@ -57,279 +70,629 @@ def rescan_and_update():
     """
     # Print what we racking before cleanup
     # ModuleTracker.print_tracked()
-    # Clean up modules
-    ModuleTracker.clean_tracked_modules()
-    # Force Python to do garbage collection
-    import gc
-    gc.collect()
-    # Reload config and rebuild menus
+    # Reload config and rebuild menus, modules are cleaned up once scanned
     CONFIG.reload()
-    ui_context_menu(force_update=True)
+    ui_context_menu(force_update=True, fresh_scan=True, unload=True)
+    # Collect garbage and report old modules something still holds on to
+    survivors = ModuleTracker.survivors()
+    if survivors:
+        print(
+            f"ScriptMate: {len(survivors)} unloaded module(s) are still referenced, "
+            "see Settings > Leak Report"
+        )
     cmds.warning("All User modules has been updated")
 
-def add_top_level_menu(menu_name, menu_label, parent="MayaWindow"):
+def schedule_refresh(root):
+    """Called from a scan thread once a slow library answered: rebuild on the main thread."""
+    maya.utils.executeDeferred(partial(refresh_library, root))
+
+
+def refresh_library(root):
+    print(f"ScriptMate: {root.name} library scanned, updating menus")
+    ui_context_menu()
+
+
+def clear_quarantine():
+    """Give every quarantined script another chance and rebuild the menus."""
+    Quarantine.get_instance(CONFIG).clear()
+    TrialRunner.get_instance(CONFIG).clear()
+    rescan_and_update()
+
+
+def start_trials(entries):
+    """
+    Trial import new or changed scripts outside of Maya. Scripts of
+    bundles, unreachable libraries and blocked ones are left out.
+    """
+    quarantine = Quarantine.get_instance(CONFIG)
+    candidates = [
+        (entry.digest, entry.path) for entry in entries
+        if entry.digest and not entry.stale
+        and entry.verdict is not None
+        and entry.verdict.status in (shield.Status.SAFE, shield.Status.UNSAFE)
+        and not quarantine.is_quarantined(entry.digest)
+        and bundle.find(entry.path)[0] is None
+    ]
+    TrialRunner.get_instance(CONFIG).submit(
+        candidates,
+        lambda digest, path: maya.utils.executeDeferred(partial(settle_trial, digest, path)),
+    )
+
+
+def settle_trial(digest, path):
+    TrialRunner.get_instance(CONFIG).settle(digest, path)
+
+
+@contextmanager
+def batched(name):
+    """One undo chunk for everything run inside, with the viewport refresh suspended."""
+    cmds.undoInfo(openChunk=True, chunkName=f"ScriptMate: {name}")
+    cmds.refresh(suspend=True)
+    try:
+        yield
+    finally:
+        cmds.refresh(suspend=False)
+        cmds.undoInfo(closeChunk=True)
+        cmds.refresh(force=True)
+
+
+def run_chain(name):
+    """Run a chain of the local config as one batch, undone in one step."""
+    chain = chains.find_chain(CONFIG.get_local_config_data(), name)
+    if chain is None:
+        cmds.warning(f"ScriptMate: no chain named {name}")
+        return
+    try:
+        timings = chains.run_chain(
+            chain, CONFIG.get_library_roots(), batched, UsageTracker.get_instance(CONFIG)
+        )
+    except chains.ChainError as e:
+        if e.timings:
+            print(f"ScriptMate: chain {name} ran {chains.format_timings(e.timings)}, undo reverts it")
+        cmds.warning(f"ScriptMate: chain {name} stopped: {e}")
+        return
+    print(f"ScriptMate: chain {name}: {chains.format_timings(timings)}")
+    SEARCH_INDEX.set_usage(UsageTracker.get_instance(CONFIG).count)
+
+
+def load_entry(entry, loaded):
     """
-    Create or update a top-level menu in Maya.
+    Import a scanned entry once per build: entries with identical
+    content share the module of the first one.
     """
-    if not cmds.menu(menu_name, exists=True):
-        cmds.menu(menu_name, label=menu_label, parent=parent, tearOff=True)
-    return f"{parent}|{menu_name}"
+    key = entry.digest or entry.path
+    if key not in loaded:
+        loaded[key] = loader.load_item(
+            entry.directory, entry.item, entry.root.name,
+            verdict=entry.verdict, digest=entry.digest,
+        )
+    return loaded[key]
 
 
-def add_submenu(parent, dir_name, dir_path, script_location, source, depth=4):
+def load_scripts(node, loaded):
+    """
+    Import the scripts of a menu node, grouped by OPERATOR category.
+    Quarantined scripts and scripts whose trial import rules them out
+    are not imported, and scripts of an unreachable
+    library come from its snapshot, both are listed with no module.
+    With lazy imports, scripts whose OPERATOR is a plain literal are
+    listed from it and imported when clicked or preloaded.
+    """
+    quarantine = Quarantine.get_instance(CONFIG)
+    trials = TrialRunner.get_instance(CONFIG)
+    lazy = CONFIG.get_core_param("menus", "lazy_import")
+    categories = {}
+    for entry in node.scripts.values():
+        listed = lazy and entry.verdict is not None and entry.verdict.operator is not None
+        if not entry.stale and not listed:
+            # Imported now: its running trial import is waited for
+            skipped = trials.settle(entry.digest, entry.path)
+        else:
+            skipped = quarantine.is_quarantined(entry.digest) or trials.blocking(entry.digest)
+        if skipped:
+            categories.setdefault(QUARANTINE_CATEGORY, []).append((entry, None))
+            continue
+        if entry.stale:
+            category = entry.operator.get("category", "Uncategorized")
+            categories.setdefault(category, []).append((entry, None))
+            continue
+        if listed:
+            entry.operator = entry.verdict.operator
+            category = entry.operator.get("category", "Uncategorized")
+            categories.setdefault(category, []).append((entry, None))
+            continue
+        module = load_entry(entry, loaded)
+        if module is not None:
+            # Kept in the library snapshot for slow startups
+            entry.operator = module.OPERATOR
+            category = module.OPERATOR.get("category", "Uncategorized")
+            categories.setdefault(category, []).append((entry, module))
+    return categories
+
+
+def add_entry(parent, entry, module):
+    """
+    Menu item of a scanned script: quarantined ones and those ruled out
+    by their trial import are greyed out, cached and lazy items import on click.
+    """
+    if module is not None:
+        add_item(parent, entry.name, module, entry.root.path)
+    elif (
+        Quarantine.get_instance(CONFIG).is_quarantined(entry.digest)
+        or TrialRunner.get_instance(CONFIG).blocking(entry.digest)
+    ):
+        parent.add(Item(
+            entry.name.replace("_", " "),
+            enabled=False,
+            annotation="Quarantined, see Settings > Quarantine",
+        ))
+    else:
+        add_unloaded_item(parent, entry)
+
+
+def add_unloaded_item(parent, entry):
+    """
+    Menu item of a script known from a library snapshot or from its
+    static OPERATOR, the script is imported when clicked.
+    """
+    script_id = loader.module_name_for(entry.directory, entry.item)
+    record = ScriptRegistry.register_unloaded(
+        script_id, entry.path, entry.operator, entry.root.name, entry.digest
+    )
+    if entry.stale:
+        # No icon lookup: the library folder may not answer
+        icon = ""
+        annotation = f"Cached, {entry.root.name} library is not reachable"
+    else:
+        icon = IconIndex.resolve(entry.root.path, record.operator.get("icon", ""))
+        annotation = ""
+    SEARCH_INDEX.add(
+        script_id,
+        record.label,
+        record.category,
+        os.path.relpath(record.path, entry.root.path),
+        icon,
+        record.source,
+    )
+    parent.add(Item(
+        record.label,
+        icon=icon,
+        script_id=script_id,
+        annotation=annotation,
+        category=record.category,
+        path=record.path,
+        root=entry.root.path,
+        source=record.source,
+    ))
+
+
+def top_level_menu_name(item):
+    return string_utils.format_menu_name(item.lstrip("menu_"))
+
+
+def submenu_name(path):
+    """Maya UI name of a library submenu, stable for its folder path."""
+    return f"ScriptMateMenu_{hashlib.sha1('/'.join(path).encode('utf-8')).hexdigest()[:12]}"
+
+
+def add_refresh_item(menu, path):
+    """Refresh action of a library menu, it rescans only that folder."""
+    menu.add(Divider())
+    menu.add(Item(
+        "Refresh", icon=get_icon("/update.svg"), action=f"refresh_menu:{'/'.join(path)}"
+    ))
+
+
+def add_submenu(parent, node, loaded, depth=4, path=("",)):
     """
     Create a submenu under the specified parent and populate it with scripts.
+    `path` holds the folder names of the parent menu from the library roots.
     """
     if depth <= 0:
         return
 
-    submenu = cmds.menuItem(
-        label=dir_name.replace("_", " "), parent=parent, subMenu=True, tearOff=True
-    )
-    scripts, directories = loader.load_scripts_and_directories(
-        directory=dir_path, module_source=source, depth=depth - 1, finalize_logs=False
-    )
+    path = path + (node.item,)
+    submenu = parent.add(SubMenu(node.name.replace("_", " "), submenu_name(path)))
 
     # Organize and add scripts
-    categories = {}
-    for script_name, module in scripts.items():
-        category = module.OPERATOR.get("category", "Uncategorized")
-        categories.setdefault(category, []).append((script_name, module))
-
+    categories = load_scripts(node, loaded)
     for category, script_list in sorted(categories.items()):
-        cmds.menuItem(parent=submenu, divider=True, dividerLabel=category)
-        for script_name, module in script_list:
-            add_item(submenu, script_name, module, script_location)
+        submenu.add(Divider(category))
+        for entry, module in script_list:
+            add_entry(submenu, entry, module)
 
     # Add nested submenus for directories
-    for sub_dir_name, (sub_dir_path, sub_category) in directories.items():
-        if sub_category:
-            cmds.menuItem(parent=submenu, divider=True, dividerLabel=sub_category)
-        add_submenu(submenu, sub_dir_name, sub_dir_path, script_location, source, depth - 1)
+    for child in node.children.values():
+        if child.category:
+            submenu.add(Divider(child.category))
+        add_submenu(submenu, child, loaded, depth - 1, path)
+    add_refresh_item(submenu, path)
 
 
-def add_item(parent: str, name:str , module: types.ModuleType, menu_location: str="") -> None:
-    """ Create a menu item for a script module under the specified parent.
-    Args:
-        parent    (str): "MayaWindow|{MY_MENU}" name of menu parent to >
-        name      (str): Item name as default argument if get("name") is None
-        module (module): Which contain module context like OPERATOR etc.
-
-    return:
-        None  
+def run_script(script_id: str) -> None:
     """
-    script_label = module.OPERATOR.get("name", name)
-    
-    if not menu_location:
-        icons_dir = Path()
-    else:
-        icons_dir = Path(menu_location) / "icons"
-    
-    if icons_dir.exists():
-        icon = str(icons_dir / module.OPERATOR.get("icon", ""))
-    else:
-        icon = ""
+    Execute a script by id through the registry.
+    Shared by menu items and the search palette.
+    """
+    if ScriptRegistry.run(script_id):
+        SEARCH_INDEX.set_usage(UsageTracker.get_instance(CONFIG).count)
+
+
+def start_preload():
+    """Import the most used scripts which are not loaded yet while Maya is idle."""
+    global preloader, preload_job
+    stop_preload()
+    preloader = Preloader.from_config(CONFIG)
+    if preloader.queue:
+        preload_job = cmds.scriptJob(idleEvent=preload_step)
+
+
+def preload_step():
+    # Playback is never slowed down by a preload
+    if cmds.play(query=True, state=True):
+        return
+    if not preloader.step():
+        # A job can't be killed from its own callback
+        maya.utils.executeDeferred(stop_preload)
 
-    # print("\nModule name: ", script_label)
-    # print("----Icon path: ", icon, "\n----Icons dir: ", icons_dir)    
-    cmds.menuItem(
-        label=script_label,
-        i=icon, 
-        parent=parent, 
-        c=lambda *args, mod=module: mod.execute(),
-    )
 
+def stop_preload():
+    global preload_job
+    if preload_job is not None and cmds.scriptJob(exists=preload_job):
+        cmds.scriptJob(kill=preload_job, force=True)
+    preload_job = None
 
-def create_top_level_menu(source, directory, paths_changed):
+
+def refresh_menu(path):
     """
-    Create or update top-level menus based on the given directory and source.
+    Rescan, check and import again one library menu folder and redraw
+    only its menu. `path` holds the folder names from the library roots,
+    starting with "" for submenus of the Default menu.
     """
-    global previous_local_menu_dirs, previous_network_menu_dirs
-    current_menu_dirs = set()
-
-    # print(f"\n\n{source} START.previous_menu_dirs: ",
-    #       previous_local_menu_dirs if source == "Local" else previous_network_menu_dirs)
-
-    if os.path.isdir(directory):
-        for item in os.listdir(directory):
-            item_path = join(directory, item)
-            if isdir(item_path) and item.startswith("menu_"):
-                menu_name = string_utils.format_menu_name(item.lstrip("menu_"))
-                menu_label = item.lstrip("menu_").replace("_", " ")
-                # print(f"Menu label: {menu_label}, Menu name: {menu_name}")
-                current_menu_dirs.add(menu_name)
-
-                menu_parent = add_top_level_menu(menu_name, menu_label)
-                clear_menu_items(menu_name)
-
-                scripts, directories = loader.load_scripts_and_directories(
-                    directory=item_path, module_source=source, finalize_logs=False
-                )
-
-                # Add categorized scripts and submenus
-                categories = {}
-                for script_name, module in scripts.items():
-                    category = module.OPERATOR.get("category", "Uncategorized")
-                    categories.setdefault(category, []).append((script_name, module))
-
-                # Assign category for submenu
-                for dir_name, (dir_path, category) in directories.items():
-                    categories.setdefault(string_utils.convert_to_title_case(category), []).append((dir_name, dir_path))
-
-                for category, script_list in sorted(categories.items()):
-                    cmds.menuItem(
-                        parent=menu_parent, divider=True, dividerLabel=category
-                    )
-                    for name, item in script_list:
-                        if isinstance(item, str):  # Directory
-                            add_submenu(menu_parent, name, item, directory, source, depth=4)
-                        else:  
-                            # Script module
-                            add_item(menu_parent, name, item, directory)
-
-
-    menu_changed = previous_network_menu_dirs != current_menu_dirs
-    # Determine which menus have been removed
-    if paths_changed or menu_changed:
-        previous_dirs = (
-            previous_local_menu_dirs
-            if source == "Local"
-            else previous_network_menu_dirs
+    started = time.perf_counter()
+    parts = tuple(path.split("/"))
+    name = top_level_menu_name(parts[0]) if len(parts) == 1 else submenu_name(parts)
+    target = current_layout.find(name) if current_layout is not None else None
+    if target is None:
+        ui_context_menu()
+        return
+
+    roots = [LibraryRoot(root_name, root_path) for root_name, root_path in CONFIG.get_library_roots()]
+    try:
+        node = scanner.scan_subtree(
+            roots, parts,
+            depth=CONFIG.get_core_param("scan", "max_depth") or scanner.SCAN_DEPTH,
+            deadline=(CONFIG.get_core_param("scan", "deadline_ms") or 3000) / 1000.0,
+            limits=limits_from_config(CONFIG),
         )
-        removed_menus = previous_dirs - current_menu_dirs
-        for menu_name in removed_menus:
-            if cmds.menu(menu_name, exists=True):
-                cmds.deleteUI(menu_name)
-
-        # Update the correct previous menu set
-        if source == "Local":
-            previous_local_menu_dirs = current_menu_dirs
-        else:
-            previous_network_menu_dirs = current_menu_dirs
+    except TimeoutError as e:
+        cmds.warning(f"ScriptMate: {e} did not answer, rebuilding every menu")
+        ui_context_menu()
+        return
+    if node is None:
+        # The folder is gone from every library, its parent changes too
+        ui_context_menu()
+        return
 
+    stop_preload()
+    start_trials(node.entries())
+    # Items of the menu on screen are indexed again from the new scan
+    previous = {item.script_id for item in target.items() if item.script_id}
+    for script_id in previous:
+        SEARCH_INDEX.remove(script_id)
+    loaded = {}
+    if len(parts) == 1:
+        menu = create_top_level_menu(node, loaded)
+        current_layout.add(menu)
+        get_renderer().render(menu)
+    else:
+        holder = SubMenu("")
+        add_submenu(holder, node, loaded, depth=6 - len(parts), path=parts[:-1])
+        menu = holder.children[0]
+        target.children = menu.children
+        if not get_renderer().render_submenu(menu):
+            get_renderer().apply(current_layout)
+
+    # Scripts gone from the folder, and from every other menu, are unloaded
+    for script_id in previous - {item.script_id for item in current_layout.items() if item.script_id}:
+        ScriptRegistry.remove(script_id)
+        loader.drop_item(script_id)
 
-def ui_context_menu(force_update=False):
-    global CONFIG, previous_network_path, previous_local_path
-    CONFIG.reload()
+    loader.load_scripts_and_directories(finalize_logs=True)
+    SEARCH_INDEX.set_usage(UsageTracker.get_instance(CONFIG).count)
+    script_browser.refresh()
+    current_layout.save(CONFIG.get_core_param("layout", "path"), layout_signature())
+    Metrics.observe("scriptmate_menu_build_duration_seconds", time.perf_counter() - started, kind="menu")
+    Metrics.export(CONFIG)
+    start_preload()
+    print(f"ScriptMate: {menu.label} menu refreshed")
 
-    # # #
-    # Get current paths
-    local_scripts_path = file_utils.path_existance(
-        CONFIG.get_local_param("userScripts", "local_path")
-    )
-    network_scripts_path = CONFIG.get_local_param("userScripts", "network_path")
 
-    # # #
-    # Determine if paths have changed or force_update is True
-    local_paths_changed = local_scripts_path != previous_local_path or force_update
-    network_paths_changed = (
-        network_scripts_path != previous_network_path or force_update
+def show_search_palette() -> None:
+    search_palette.show(SEARCH_INDEX, run_script)
+
+
+def show_script_browser() -> None:
+    script_browser.show(
+        "from crudo_sm.user_interface import context_tab; context_tab.attach_script_browser()"
     )
 
-    # # #
-    # Update previous paths
-    previous_local_path = local_scripts_path
-    previous_network_path = network_scripts_path
 
-    # # #
-    # Always create the default menu for settings and updates
-    menu_label = CONFIG.get_core_param("general", "title")
-    context_menu_name = "ScriptMateDefaultContextMenu"
+def attach_script_browser() -> None:
+    script_browser.attach(SEARCH_INDEX, run_script)
 
-    if not cmds.menu(context_menu_name, exists=True):
-        cmds.menu(
-            context_menu_name, label=menu_label, parent="MayaWindow", tearOff=True
-        )
 
-    # # #
-    # Clear existing menu items
-    clear_menu_items(context_menu_name)
+def add_item(parent: SubMenu, name:str , module: types.ModuleType, menu_location: str="") -> None:
+    """ Create a menu item for a script module under the specified parent.
+    Args:
+        parent (SubMenu): Menu model node the item is added to
+        name      (str): Item name as default argument if get("name") is None
+        module (module): Which contain module context like OPERATOR etc.
 
-    # Load scripts and directories for the Default menu
-    scripts, directories = loader.load_scripts_and_directories(
-        directory=local_scripts_path, module_source="Local", finalize_logs=False
+    return:
+        None
+    """
+    script_label = module.OPERATOR.get("name", name)
+    # Menus keep only the script id, the module is resolved on click
+    script_id = module.__name__
+    record = ScriptRegistry.get(script_id)
+    icon = IconIndex.resolve(menu_location, module.OPERATOR.get("icon", ""))
+    SEARCH_INDEX.add(
+        script_id,
+        script_label,
+        record.category,
+        os.path.relpath(record.path, menu_location) if menu_location else record.path,
+        icon,
+        record.source,
     )
 
-    # Parrent menu to the Maya main Window
-    currParent = f"MayaWindow|{context_menu_name}"
-    categories = {}
-    for script_name, module in scripts.items():
-        category = module.OPERATOR.get("category", "Uncategorized")
-        if category not in categories:
-            categories[category] = []
-        categories[category].append((script_name, module))
+    # print("\nModule name: ", script_label)
+    # print("----Icon path: ", icon)
+    parent.add(Item(
+        script_label,
+        icon=icon,
+        script_id=script_id,
+        category=record.category,
+        path=record.path,
+        root=menu_location,
+        source=record.source,
+    ))
+
+
+def create_top_level_menu(node, loaded):
+    """
+    Create the top-level menu model of a merged menu_ folder.
+    """
+    menu_name = top_level_menu_name(node.item)
+    menu_label = node.item.lstrip("menu_").replace("_", " ")
+    menu = Menu(menu_label, menu_name)
+
+    # Add categorized scripts and submenus
+    categories = load_scripts(node, loaded)
+
+    # Assign category for submenu
+    for child in node.children.values():
+        categories.setdefault(string_utils.convert_to_title_case(child.category), []).append((child, None))
+
+    for category, script_list in sorted(categories.items()):
+        menu.add(Divider(category))
+        for item, module in script_list:
+            if isinstance(item, scanner.MenuNode):  # Directory
+                add_submenu(menu, item, loaded, depth=4, path=(node.item,))
+            else:
+                # Script module
+                add_entry(menu, item, module)
+    add_refresh_item(menu, (node.item,))
+    return menu
+
+
+def create_context_menu(library, loaded):
+    """
+    The ScriptMate menu: root level scripts of every library
+    followed by search, help and settings.
+    """
+    menu = Menu(CONFIG.get_core_param("general", "title"), CONTEXT_MENU_NAME)
+
+    # Root level scripts of all libraries go to the Default menu
+    categories = load_scripts(library.default, loaded)
 
     # Include top-level 'sub_' directories in the main menu
-    for dir_name, (dir_path, category) in directories.items():
-        if category not in categories:
-            categories[category] = []
-        categories[category].append((dir_name, dir_path))
+    for child in library.default.children.values():
+        categories.setdefault(child.category, []).append((child, None))
 
     # Create menu items for each category
     for category, script_list in sorted(categories.items()):
-        cmds.menuItem(parent=currParent, divider=True, dividerLabel=category)
-        for name, item in script_list:
-            if isinstance(item, str):  # If item is a directory path
-                add_submenu(currParent, name, item, local_scripts_path, "Local",  depth=4)
-            else:  
+        menu.add(Divider(category))
+        for item, module in script_list:
+            if isinstance(item, scanner.MenuNode):  # If item is a directory
+                add_submenu(menu, item, loaded, depth=4, path=("",))
+            else:
                 # If item is a script module
-                # print("Local script PATH: ", local_scripts_path)
-                add_item(currParent, name, item, local_scripts_path)
+                add_entry(menu, item, module)
+
+    # Libraries drawn from their snapshot until the scan finishes
+    if library.stale:
+        menu.add(Divider("Offline Libraries"))
+        for root in library.stale:
+            menu.add(Item(f"{root.name} (cached, updating...)", enabled=False))
+
+    # Add "Search" palette entry
+    menu.add(Divider("Search"))
+    menu.add(Item("Search Scripts...", name="search_scripts", action="search"))
+    menu.add(Item("Script Browser...", name="script_browser", action="browser"))
+
+    # Chains of the local config, each run as one undoable batch
+    chain_list = chains.load_chains(CONFIG.get_local_config_data())
+    if chain_list:
+        chains_menu = menu.add(SubMenu("Chains", "ChainsMenu"))
+        for chain in chain_list:
+            chains_menu.add(Item(
+                chain.name, annotation=" > ".join(chain.steps), action=f"run_chain:{chain.name}"
+            ))
 
     # Add "Help" sub menu
-    help_menu = "HelpMenu"
-    cmds.menuItem(parent=currParent, divider=True, dividerLabel="Help")
-    cmds.menuItem(
-        help_menu,
-        label="Help",
-        parent=currParent,
-        image=get_icon("/help.svg"),
-        subMenu=True,
-        tearOff=True,
-    )
-    help_parent = f"MayaWindow|{context_menu_name}|{help_menu}"
-    cmds.menuItem(
-        "documentation",
-        label="Documentation",
-        image=get_icon("/documentation.svg"),
-        parent=help_parent,
-        c=lambda *args: buttons.WebButton(
-            CONFIG.get_core_param("links", "documentation")
-        ).web_button(),
-    )
+    menu.add(Divider("Help"))
+    help_menu = menu.add(SubMenu("Help", "HelpMenu", get_icon("/help.svg")))
+    help_menu.add(Item(
+        "Documentation", name="documentation",
+        icon=get_icon("/documentation.svg"), action="documentation",
+    ))
+
     # Add "Settings" and "Update" options
-    cmds.menuItem(parent=currParent, divider=True, dividerLabel="Settings")
-    cmds.menuItem(
-        "SettingsMenu",
-        label="Settings",
-        parent=currParent,
-        image=get_icon("/settings.svg"),
-        subMenu=True,
-        tearOff=True,
-    )
-    preferencesParent = f"MayaWindow|{context_menu_name}|SettingsMenu"
-    cmds.menuItem(
-        "preferences",
-        label="Preferences",
-        image=get_icon("/settings.svg"),
-        parent=preferencesParent,
-        c=lambda *args: preferences.show(),
+    menu.add(Divider("Settings"))
+    settings_menu = menu.add(SubMenu("Settings", "SettingsMenu", get_icon("/settings.svg")))
+    settings_menu.add(Item(
+        "Preferences", name="preferences", icon=get_icon("/settings.svg"), action="preferences"
+    ))
+    settings_menu.add(Item(
+        "Update Scripts", name="update_scripts", icon=get_icon("/update.svg"), action="update_scripts"
+    ))
+    settings_menu.add(Item("Leak Report", name="leak_report", action="leak_report"))
+    settings_menu.add(Item("Error Details", name="error_details", action="error_details"))
+    quarantine_menu = settings_menu.add(SubMenu("Quarantine", "quarantine_menu"))
+    quarantine_menu.add(Item(
+        "Show Quarantined Scripts", name="show_quarantine", action="show_quarantine"
+    ))
+    quarantine_menu.add(Item("Trial Imports", name="show_trials", action="show_trials"))
+    quarantine_menu.add(Item("Clear Quarantine", name="clear_quarantine", action="clear_quarantine"))
+    return menu
+
+
+def layout_signature():
+    """Saved layouts are only replayed for the same version and libraries."""
+    return json.dumps(
+        [CONFIG.get_core_param("general", "version"), CONFIG.get_library_roots()]
     )
-    cmds.menuItem(
-        "update_scripts",
-        label="Update Scripts",
-        image=get_icon("/update.svg"),
-        parent=preferencesParent,
-        c=lambda *args: rescan_and_update(),
+
+
+def replay_layout():
+    """
+    Draw the menus saved by the last build without touching any library.
+    Scripts are registered unloaded and imported on click.
+    Returns False when there is no usable layout.
+    """
+    global current_layout
+    started = time.perf_counter()
+    layout = MenuLayout.load(CONFIG.get_core_param("layout", "path"), layout_signature())
+    if layout is None:
+        return False
+
+    for item in layout.items():
+        if item.script_id:
+            record = ScriptRegistry.register_unloaded(
+                item.script_id,
+                item.path,
+                {"name": item.label, "category": item.category},
+                item.source,
+            )
+            SEARCH_INDEX.add(
+                item.script_id,
+                item.label,
+                record.category,
+                os.path.relpath(item.path, item.root) if item.root else item.path,
+                item.icon,
+                item.source,
+            )
+    SEARCH_INDEX.set_usage(UsageTracker.get_instance(CONFIG).count)
+    get_renderer().apply(layout)
+    current_layout = layout
+    Metrics.observe("scriptmate_menu_build_duration_seconds", time.perf_counter() - started, kind="replay")
+    return True
+
+
+def ui_context_menu(force_update=False, fresh_scan=False, unload=False):
+    """
+    Scan the libraries, build the menu layout and draw it. Only menus
+    which differ from the ones on screen are drawn again, unless
+    `force_update` is set. A `fresh_scan` never reuses a scan another
+    Maya session made before it. With `unload` every user module is
+    unloaded before importing, except package submodules the scan
+    found unchanged.
+    """
+    global CONFIG, current_layout
+    started = time.perf_counter()
+    CONFIG.reload()
+    # Records are replaced by this build
+    stop_preload()
+
+    # # #
+    # Scan every library root concurrently and overlay them by priority
+    roots = [LibraryRoot(name, path) for name, path in CONFIG.get_library_roots()]
+    snapshot_dir = CONFIG.get_core_param("scan", "snapshot_dir")
+    library = scanner.scan_libraries(
+        roots,
+        depth=CONFIG.get_core_param("scan", "max_depth") or scanner.SCAN_DEPTH,
+        limits=limits_from_config(CONFIG),
+        deadline=(CONFIG.get_core_param("scan", "deadline_ms") or 3000) / 1000.0,
+        snapshot_dir=snapshot_dir,
+        on_revalidated=schedule_refresh,
+        coordinator=ScanCoordinator.get_instance(CONFIG),
+        max_age=0 if fresh_scan else None,
     )
+    if unload:
+        # Package submodules untouched since the last scan (and not
+        # importing changed ones) stay loaded
+        ModuleTracker.clean_tracked_modules(
+            keep=PackageReloader.invalidate_changed(scanner.package_signatures(library))
+        )
+    start_trials(library.entries())
+    # Modules of this build by content, identical scripts are imported once
+    loaded = {}
+
+    SEARCH_INDEX.clear()
+    IconIndex.clear()
+
+    # # #
+    # Always create the default menu for settings and updates, then
+    # top-level menus merged across libraries
+    layout = MenuLayout()
+    layout.add(create_context_menu(library, loaded))
+    for node in library.menus.values():
+        layout.add(create_top_level_menu(node, loaded))
 
-    # Create menus for Local and Network scripts
-    create_top_level_menu("Local", local_scripts_path, local_paths_changed)
-    create_top_level_menu("Network", network_scripts_path, network_paths_changed)
     loader.load_scripts_and_directories(finalize_logs=True)
+    SEARCH_INDEX.set_usage(UsageTracker.get_instance(CONFIG).count)
+    scanner.save_snapshots(library, snapshot_dir)
+    script_browser.refresh()
+
+    # Draw what changed, menus no library provides anymore are removed
+    get_renderer().apply(layout, None if force_update else current_layout)
+    current_layout = layout
+    layout.save(CONFIG.get_core_param("layout", "path"), layout_signature())
+    Metrics.observe("scriptmate_menu_build_duration_seconds", time.perf_counter() - started, kind="full")
+    Metrics.export(CONFIG)
+    start_preload()
+
+
+# Built-in menu actions by name, saved layouts refer to them
+ACTIONS = {
+    "search": show_search_palette,
+    "browser": show_script_browser,
+    "documentation": lambda: buttons.WebButton(
+        CONFIG.get_core_param("links", "documentation")
+    ).web_button(),
+    "preferences": lambda: preferences.show(),
+    "update_scripts": rescan_and_update,
+    "refresh_menu": refresh_menu,
+    "run_chain": run_chain,
+    "leak_report": ModuleTracker.print_leak_report,
+    "error_details": lambda: ScriptManagerLogger.get_instance(CONFIG).print_error_details(),
+    "show_quarantine": lambda: Quarantine.get_instance(CONFIG).print_report(),
+    "show_trials": lambda: TrialRunner.get_instance(CONFIG).print_report(),
+    "clear_quarantine": clear_quarantine,
+}
 
 
 def add_menus():
     print("crudo_usm: context menu load starting")
-    ui_context_menu(force_update=True)
+    if replay_layout():
+        # Menus of the last session are up, check them against the
+        # libraries once Maya is idle and patch the differences
+        maya.utils.executeDeferred(ui_context_menu)
+    else:
+        ui_context_menu(force_update=True)
+    search_palette.register_hotkey(
+        "from crudo_sm.user_interface import context_tab; context_tab.show_search_palette()",
+        CONFIG.get_core_param("search", "hotkey"),
+    )
     print("crudo_usm: context menu load success")
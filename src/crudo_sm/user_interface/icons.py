@@ -0,0 +1,95 @@
+# icons.py
+"""
+Icon lookup for menus and Qt panels.
+Every icons directory is listed once, and decoded icons are shared
+by everything which draws them.
+"""
+
+# python modules
+import os
+from os.path import join, normcase
+
+# Import Maya modules
+import maya.cmds as cmds
+
+maya_version = cmds.about(version=True)
+if not maya_version.startswith('2025'):
+    from PySide2 import QtGui
+else:
+    from PySide6 import QtGui
+
+from crudo_sm import PACKAGE_DIR
+
+ICON_DIR = join(PACKAGE_DIR, "icon")
+PLACEHOLDER = join(ICON_DIR, "placeholder.svg")
+ICONS_FOLDER = "icons"
+
+
+def get_icon(icon_title="/idtools.png"):
+    """Return path of a bundled ScriptMate icon"""
+    return ICON_DIR + icon_title
+
+
+class IconIndex:
+    """
+        Library icons directory -> {file name: resolved path},
+        filled with a single scandir per directory
+    """
+    _directories = {}
+
+    @classmethod
+    def index(cls, icons_dir):
+        entries = cls._directories.get(icons_dir)
+        if entries is None:
+            entries = {}
+            try:
+                with os.scandir(icons_dir) as scan:
+                    for entry in scan:
+                        if entry.is_file():
+                            entries[normcase(entry.name)] = os.path.abspath(entry.path)
+            except OSError:
+                pass  # Missing icons folder, every lookup falls back
+            cls._directories[icons_dir] = entries
+        return entries
+
+    @classmethod
+    def resolve(cls, library_root, icon_name):
+        """
+        Path of `icon_name` in `<library_root>/icons`.
+        Scripts without an icon get no icon, unknown names the placeholder.
+        """
+        if not icon_name:
+            return ""
+        if not library_root:
+            return PLACEHOLDER
+        icons_dir = join(library_root, ICONS_FOLDER)
+        path = cls.index(icons_dir).get(normcase(icon_name))
+        if path is None and ("/" in icon_name or os.sep in icon_name):
+            # "sub/tool.png" lives below the listed folder
+            candidate = os.path.abspath(join(icons_dir, icon_name))
+            if os.path.isfile(candidate):
+                path = candidate
+        return path or PLACEHOLDER
+
+    @classmethod
+    def clear(cls):
+        """Forget listed directories, called when libraries are rescanned."""
+        cls._directories.clear()
+
+
+class IconCache:
+    """Process-wide decoded icons, one QIcon per file for every panel."""
+    _icons = {}
+
+    @classmethod
+    def get(cls, path):
+        if not path:
+            return QtGui.QIcon()
+        icon = cls._icons.get(path)
+        if icon is None:
+            icon = cls._icons[path] = QtGui.QIcon(path)
+        return icon
+
+    @classmethod
+    def clear(cls):
+        cls._icons.clear()
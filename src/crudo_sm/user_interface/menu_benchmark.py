@@ -0,0 +1,62 @@
+# menu_benchmark.py
+"""
+Compare the maya.cmds and Qt menu renderers on a synthetic layout.
+Run from the Maya script editor:
+
+    from crudo_sm.user_interface import menu_benchmark
+    menu_benchmark.run(menus=10, submenus=10, items=50)
+"""
+
+# python modules
+import time
+
+from crudo_sm.user_interface.menu_model import Divider, Item, SubMenu, Menu, MenuLayout
+from crudo_sm.user_interface.menu_render import CmdsMenuRenderer, QtMenuRenderer
+
+MENU_PREFIX = "ScriptMateBenchmark"
+
+
+def synthetic_layout(menus=10, submenus=10, items=50):
+    """`menus` top-level menus of `submenus` submenus with `items` items each."""
+    layout = MenuLayout()
+    for m in range(menus):
+        menu = layout.add(Menu(f"Benchmark {m}", f"{MENU_PREFIX}{m}"))
+        for s in range(submenus):
+            menu.add(Divider(f"Category {s % 3}"))
+            submenu = menu.add(SubMenu(f"Submenu {s}"))
+            for i in range(items):
+                if i % 10 == 0:
+                    submenu.add(Divider(f"Group {i // 10}"))
+                submenu.add(Item(f"Script {m}.{s}.{i}", script_id=f"benchmark.{m}.{s}.{i}"))
+    return layout
+
+
+def measure(renderer, layout):
+    """Seconds to draw the layout, draw it again over itself and delete it."""
+    started = time.perf_counter()
+    renderer.apply(layout)
+    drawn = time.perf_counter()
+    renderer.apply(layout)
+    redrawn = time.perf_counter()
+    for menu_name in layout.menus:
+        renderer.delete(menu_name)
+    deleted = time.perf_counter()
+    return drawn - started, redrawn - drawn, deleted - redrawn
+
+
+def run(menus=10, submenus=10, items=50):
+    layout = synthetic_layout(menus, submenus, items)
+    count = sum(1 for _ in layout.items())
+    print(f"ScriptMate menu benchmark: {menus} menus, {count} items")
+    print(f"  {'renderer':<10}{'draw':>10}{'redraw':>10}{'delete':>10}")
+
+    results = {}
+    for name, renderer_class in (("cmds", CmdsMenuRenderer), ("qt", QtMenuRenderer)):
+        renderer = renderer_class(lambda script_id: None, {})
+        results[name] = measure(renderer, layout)
+        draw, redraw, delete = results[name]
+        print(f"  {name:<10}{draw * 1000:>8.0f}ms{redraw * 1000:>8.0f}ms{delete * 1000:>8.0f}ms")
+
+    if results["qt"][0]:
+        print(f"  draw time cmds / qt: {results['cmds'][0] / results['qt'][0]:.1f}")
+    return results
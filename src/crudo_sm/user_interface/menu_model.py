@@ -0,0 +1,196 @@
+# menu_model.py
+"""
+Rendered menu model: what ScriptMate shows in Maya, without Maya.
+The context menu builder fills a MenuLayout, a renderer draws it, and
+the layout is saved so the next launch can draw the same menus before
+touching any library.
+"""
+
+# python modules
+import json
+import os
+
+
+class Divider:
+    __slots__ = ("label",)
+
+    def __init__(self, label=""):
+        self.label = label
+
+    def to_dict(self):
+        return {"type": "divider", "label": self.label}
+
+
+class Item:
+    """
+        A menu entry running either a library script (`script_id`)
+        or a built-in ScriptMate `action`
+    """
+
+    __slots__ = (
+        "label", "name", "icon", "script_id", "action", "enabled", "annotation",
+        "category", "path", "root", "source",
+    )
+
+    def __init__(self, label, name="", icon="", script_id="", action="", enabled=True,
+                 annotation="", category="", path="", root="", source=""):
+        self.label = label
+        self.name = name
+        self.icon = icon
+        self.script_id = script_id
+        self.action = action
+        self.enabled = enabled
+        self.annotation = annotation
+        # Enough to register and search the script before it is imported
+        self.category = category
+        self.path = path
+        self.root = root
+        self.source = source
+
+    def to_dict(self):
+        # Defaults are left out to keep saved layouts small
+        data = {"type": "item", "label": self.label}
+        for key in self.__slots__:
+            value = getattr(self, key)
+            if key != "enabled" and value:
+                data[key] = value
+        if not self.enabled:
+            data["enabled"] = False
+        return data
+
+
+class SubMenu:
+    __slots__ = ("label", "name", "icon", "children")
+
+    def __init__(self, label, name="", icon=""):
+        self.label = label
+        self.name = name
+        self.icon = icon
+        self.children = []
+
+    def add(self, child):
+        self.children.append(child)
+        return child
+
+    def items(self):
+        """Every Item of this menu and its submenus."""
+        for child in self.children:
+            if isinstance(child, Item):
+                yield child
+            elif isinstance(child, SubMenu):
+                yield from child.items()
+
+    def find(self, name):
+        """Submenu named `name` below this one, or None."""
+        for child in self.children:
+            if isinstance(child, SubMenu):
+                if child.name == name:
+                    return child
+                found = child.find(name)
+                if found is not None:
+                    return found
+        return None
+
+    def to_dict(self):
+        return {
+            "type": "submenu",
+            "label": self.label,
+            "name": self.name,
+            "icon": self.icon,
+            "children": [child.to_dict() for child in self.children],
+        }
+
+
+class Menu(SubMenu):
+    """Top-level menu of the Maya main window menubar."""
+    __slots__ = ()
+
+    def to_dict(self):
+        data = super(Menu, self).to_dict()
+        data["type"] = "menu"
+        return data
+
+
+def from_dict(data):
+    kind = data.get("type")
+    if kind == "divider":
+        return Divider(data.get("label", ""))
+    if kind == "item":
+        return Item(**{key: value for key, value in data.items() if key != "type"})
+    node = (Menu if kind == "menu" else SubMenu)(
+        data.get("label", ""), data.get("name", ""), data.get("icon", "")
+    )
+    node.children = [from_dict(child) for child in data.get("children", [])]
+    return node
+
+
+class MenuLayout:
+    """Top-level menus by Maya menu name, in menubar order."""
+
+    VERSION = 1
+
+    def __init__(self):
+        self.menus = {}
+
+    def add(self, menu):
+        self.menus[menu.name] = menu
+        return menu
+
+    def items(self):
+        for menu in self.menus.values():
+            yield from menu.items()
+
+    def find(self, name):
+        """Top-level menu or submenu named `name`, or None."""
+        if name in self.menus:
+            return self.menus[name]
+        for menu in self.menus.values():
+            found = menu.find(name)
+            if found is not None:
+                return found
+        return None
+
+    def to_dict(self):
+        return {name: menu.to_dict() for name, menu in self.menus.items()}
+
+    def diff(self, previous):
+        """
+        (changed, removed): menus to draw again compared with the
+        `previous` layout, and menu names it had which are gone.
+        """
+        previous_menus = previous.to_dict() if previous is not None else {}
+        changed = [
+            menu for name, menu in self.menus.items()
+            if previous_menus.get(name) != menu.to_dict()
+        ]
+        removed = [name for name in previous_menus if name not in self.menus]
+        return changed, removed
+
+    def save(self, path, signature=""):
+        """Write the layout through a temporary file so a crash never truncates it."""
+        path = os.path.expanduser(path)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"version": self.VERSION, "signature": signature, "menus": self.to_dict()}, f
+                )
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"ScriptMate: could not save menu layout: {e}")
+
+    @classmethod
+    def load(cls, path, signature=""):
+        """The saved layout, or None when missing or written by another setup."""
+        try:
+            with open(os.path.expanduser(path), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != cls.VERSION or data.get("signature") != signature:
+                return None
+            layout = cls()
+            for menu_data in data["menus"].values():
+                layout.add(from_dict(menu_data))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return layout
@@ -0,0 +1,230 @@
+# menu_render.py
+"""
+Draw a MenuLayout into Maya's main window menubar.
+CmdsMenuRenderer goes through maya.cmds menu commands, QtMenuRenderer
+builds QMenu/QAction objects directly, which is much cheaper for
+libraries with thousands of items.
+"""
+
+# Import Maya modules
+import maya.OpenMayaUI as omui
+import maya.cmds as cmds
+
+maya_version = cmds.about(version=True)
+if not maya_version.startswith('2025'):
+    from PySide2 import QtWidgets
+    from PySide2.QtWidgets import QAction
+    from shiboken2 import wrapInstance
+else:
+    from PySide6 import QtWidgets
+    from PySide6.QtGui import QAction
+    from shiboken6 import wrapInstance
+
+from crudo_sm.user_interface.icons import IconCache
+from crudo_sm.user_interface.menu_model import Divider, Item, SubMenu
+
+MAIN_WINDOW = "MayaWindow"
+
+
+class CmdsMenuRenderer:
+    """
+        Renderer through maya.cmds menu commands.
+        `on_script(script_id)` runs library scripts, `actions` maps
+        built-in action names to callables. An item action
+        "name:argument" calls `actions[name](argument)`
+    """
+
+    def __init__(self, on_script, actions):
+        self.on_script = on_script
+        self.actions = actions
+
+    def command(self, item):
+        if item.script_id:
+            script_id = item.script_id
+            return lambda *args: self.on_script(script_id)
+        name, _, argument = item.action.partition(":")
+        action = self.actions.get(name)
+        if action is None:
+            return None
+        if argument:
+            return lambda *args: action(argument)
+        return lambda *args: action()
+
+    def clear(self, menu_name):
+        """Remove all items of a menu without deleting the menu itself."""
+        if cmds.menu(menu_name, exists=True):
+            items = cmds.menu(menu_name, query=True, itemArray=True) or []
+            for item in items:
+                cmds.deleteUI(item, menuItem=True)
+
+    def delete(self, menu_name):
+        if cmds.menu(menu_name, exists=True):
+            cmds.deleteUI(menu_name)
+
+    def render(self, menu):
+        """Create or refill one top-level menu."""
+        if not cmds.menu(menu.name, exists=True):
+            cmds.menu(menu.name, label=menu.label, parent=MAIN_WINDOW, tearOff=True)
+        else:
+            cmds.menu(menu.name, edit=True, label=menu.label)
+            self.clear(menu.name)
+        self.add_children(f"{MAIN_WINDOW}|{menu.name}", menu.children)
+
+    def render_submenu(self, submenu):
+        """Refill one named submenu in place, the rest of its menu is untouched."""
+        if not cmds.menuItem(submenu.name, exists=True):
+            return False
+        for item in cmds.menu(submenu.name, query=True, itemArray=True) or []:
+            cmds.deleteUI(item, menuItem=True)
+        self.add_children(submenu.name, submenu.children)
+        return True
+
+    def add_children(self, parent, children):
+        for child in children:
+            if isinstance(child, Divider):
+                cmds.menuItem(parent=parent, divider=True, dividerLabel=child.label)
+            elif isinstance(child, SubMenu):
+                flags = dict(label=child.label, parent=parent, subMenu=True, tearOff=True)
+                if child.icon:
+                    flags["image"] = child.icon
+                submenu = cmds.menuItem(child.name, **flags) if child.name else cmds.menuItem(**flags)
+                self.add_children(submenu, child.children)
+            elif isinstance(child, Item):
+                flags = dict(label=child.label, parent=parent, enable=child.enabled)
+                if child.icon:
+                    flags["image"] = child.icon
+                if child.annotation:
+                    flags["annotation"] = child.annotation
+                command = self.command(child)
+                if command is not None:
+                    flags["command"] = command
+                if child.name:
+                    cmds.menuItem(child.name, **flags)
+                else:
+                    cmds.menuItem(**flags)
+
+    def apply(self, layout, previous=None):
+        """
+        Draw `layout` over the `previous` one: only menus which differ are
+        drawn again, menus missing from `layout` are deleted.
+        """
+        changed, removed = layout.diff(previous)
+        for menu_name in removed:
+            self.delete(menu_name)
+        for menu in changed:
+            self.render(menu)
+        return changed, removed
+
+
+class QtMenuRenderer(CmdsMenuRenderer):
+    """
+        Renderer building QMenu/QAction objects on the Maya main window
+        menubar. Every menu level is inserted with a single addActions
+        call while the menubar does not repaint.
+    """
+
+    def __init__(self, on_script, actions):
+        super(QtMenuRenderer, self).__init__(on_script, actions)
+        main_window_ptr = omui.MQtUtil.mainWindow()
+        if not main_window_ptr:
+            raise RuntimeError("Maya main window is not available")
+        self.menubar = wrapInstance(int(main_window_ptr), QtWidgets.QMainWindow).menuBar()
+        self.menus = {}   # menu name -> QMenu
+
+    def clear(self, menu_name):
+        menu = self.menus.get(menu_name)
+        if menu is not None:
+            self.clear_menu(menu)
+
+    @staticmethod
+    def clear_menu(menu):
+        for action in menu.actions():
+            submenu = action.menu()
+            if submenu is not None:
+                submenu.deleteLater()
+        menu.clear()
+
+    def delete(self, menu_name):
+        menu = self.menus.pop(menu_name, None)
+        if menu is not None:
+            self.menubar.removeAction(menu.menuAction())
+            menu.deleteLater()
+        # A menu of the same name drawn by maya.cmds (previous session code)
+        super(QtMenuRenderer, self).delete(menu_name)
+
+    def render(self, menu):
+        qmenu = self.menus.get(menu.name)
+        if qmenu is None:
+            # Replace a maya.cmds menu of the same name
+            super(QtMenuRenderer, self).delete(menu.name)
+            qmenu = self.menus[menu.name] = QtWidgets.QMenu(menu.label, self.menubar)
+            qmenu.setObjectName(menu.name)
+            qmenu.setTearOffEnabled(True)
+            qmenu.setToolTipsVisible(True)
+            self.menubar.addMenu(qmenu)
+        else:
+            qmenu.setTitle(menu.label)
+            self.clear(menu.name)
+        self.add_children(qmenu, menu.children)
+
+    def render_submenu(self, submenu):
+        for qmenu in self.menus.values():
+            found = qmenu.findChild(QtWidgets.QMenu, submenu.name)
+            if found is not None:
+                break
+        else:
+            return False
+        self.clear_menu(found)
+        self.add_children(found, submenu.children)
+        return True
+
+    def add_children(self, parent, children):
+        actions = []
+        for child in children:
+            if isinstance(child, Divider):
+                action = QAction(child.label, parent)
+                action.setSeparator(True)
+            elif isinstance(child, SubMenu):
+                submenu = QtWidgets.QMenu(child.label, parent)
+                submenu.setTearOffEnabled(True)
+                submenu.setToolTipsVisible(True)
+                if child.name:
+                    submenu.setObjectName(child.name)
+                self.add_children(submenu, child.children)
+                action = submenu.menuAction()
+                if child.icon:
+                    action.setIcon(IconCache.get(child.icon))
+            elif isinstance(child, Item):
+                action = QAction(child.label, parent)
+                if child.name:
+                    action.setObjectName(child.name)
+                if child.icon:
+                    action.setIcon(IconCache.get(child.icon))
+                if child.annotation:
+                    action.setToolTip(child.annotation)
+                    action.setStatusTip(child.annotation)
+                action.setEnabled(child.enabled)
+                command = self.command(child)
+                if command is not None:
+                    action.triggered.connect(command)
+            else:
+                continue
+            actions.append(action)
+        parent.addActions(actions)
+
+    def apply(self, layout, previous=None):
+        self.menubar.setUpdatesEnabled(False)
+        try:
+            return super(QtMenuRenderer, self).apply(layout, previous)
+        finally:
+            self.menubar.setUpdatesEnabled(True)
+
+
+def create_renderer(name, on_script, actions):
+    """Renderer by config name; maya.cmds is the fallback."""
+    if name == "qt":
+        try:
+            return QtMenuRenderer(on_script, actions)
+        except Exception as e:
+            print(f"ScriptMate: Qt menus are not available, using maya.cmds menus: {e}")
+    return CmdsMenuRenderer(on_script, actions)
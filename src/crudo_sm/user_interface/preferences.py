@@ -4,6 +4,7 @@ from os import path
 # Maya imports
 import maya.OpenMayaUI as omui
 import maya.cmds as cmds
+import maya.utils
 
 maya_version = cmds.about(version=True)
 if not maya_version.startswith('2025'):
@@ -14,18 +15,45 @@ else:
     from shiboken6 import wrapInstance
 
 # Modules imports
+from crudo_sm.core import probe
 from crudo_sm.user_interface import context_tab
 from crudo_sm.settings.common import CONFIG
 
+# Typing pause before a path is probed
+PROBE_DELAY_MS = 400
+
+
 def maya_main_window():
     main_window_ptr = omui.MQtUtil.mainWindow()
     return wrapInstance(int(main_window_ptr), QtWidgets.QWidget)
 
+
+def describe_probe(result):
+    """One line status of a probed library path."""
+    if not result.reachable:
+        return f"Not reachable: {result.error}"
+    prefix = "" if result.complete else "at least "
+    return (
+        f"Reachable in {result.latency * 1000:.0f} ms, "
+        f"{prefix}{result.scripts} scripts in {result.menus} menus"
+    )
+
+
+class ProbeSignals(QtCore.QObject):
+    # field, probe number, ProbeResult; emitted from the probe thread
+    finished = QtCore.Signal(str, int, object)
+
+
 class PreferencesWindow(QtWidgets.QDialog):
 
     def __init__(self, parent=maya_main_window()):
         super(PreferencesWindow, self).__init__(parent)
         self.config = CONFIG
+        # Probes of the entered paths, newest number per field wins
+        self.probe_signals = ProbeSignals(self)
+        self.probe_counter = 0
+        self.pending_probes = {}
+        self.probe_timeout = (self.config.get_core_param("scan", "deadline_ms") or 3000) / 1000.0
         self.setWindowTitle("Preferences")
         self.setMinimumWidth(600)
         self.setWindowFlags(self.windowFlags())
@@ -45,6 +73,17 @@ class PreferencesWindow(QtWidgets.QDialog):
         self.browse_btn.setIcon(QtGui.QIcon('path_to_icon'))  # Replace 'path_to_icon' with the path to your icon file
         self.browse_local_btn.setIcon(QtGui.QIcon('path_to_icon'))
 
+        self.user_scripts_status = QtWidgets.QLabel()
+        self.local_scripts_status = QtWidgets.QLabel()
+
+        self.probe_fields = {
+            "network": (self.user_scripts_le, self.user_scripts_status, QtCore.QTimer(self)),
+            "local": (self.local_scripts_le, self.local_scripts_status, QtCore.QTimer(self)),
+        }
+        for _, status_label, timer in self.probe_fields.values():
+            status_label.setEnabled(False)
+            timer.setSingleShot(True)
+
         self.save_btn = QtWidgets.QPushButton("Save")
         self.close_btn = QtWidgets.QPushButton("Close")
 
@@ -59,7 +98,9 @@ class PreferencesWindow(QtWidgets.QDialog):
 
         form_layout = QtWidgets.QFormLayout()
         form_layout.addRow("Global scripts directory:", browse_network_layout)
+        form_layout.addRow("", self.user_scripts_status)
         form_layout.addRow("Local scripts directory:", browse_local_layout)
+        form_layout.addRow("", self.local_scripts_status)
 
         button_layout = QtWidgets.QHBoxLayout()
         button_layout.addWidget(self.save_btn)
@@ -74,6 +115,11 @@ class PreferencesWindow(QtWidgets.QDialog):
         self.browse_local_btn.clicked.connect(lambda: self.browse(self.local_scripts_le))
         self.save_btn.clicked.connect(self.save_preferences)
         self.close_btn.clicked.connect(self.close)
+        self.probe_signals.finished.connect(self.show_probe)
+        for field, (line_edit, _, timer) in self.probe_fields.items():
+            line_edit.textChanged.connect(lambda _text, timer=timer: timer.start())
+            timer.timeout.connect(lambda field=field: self.start_probe(field))
+            timer.setInterval(PROBE_DELAY_MS)
 
     def load_preferences(self):
         """Load the saved preferences"""
@@ -84,6 +130,45 @@ class PreferencesWindow(QtWidgets.QDialog):
             self.local_scripts_le.setText(user_scripts.get('local_path', ''))
 
 
+    def start_probe(self, field):
+        """Check the path of a field in the background, the dialog stays responsive."""
+        line_edit, status_label, _ = self.probe_fields[field]
+        text = line_edit.text().strip()
+        if not text:
+            self.pending_probes.pop(field, None)
+            status_label.setText("")
+            return
+
+        self.probe_counter += 1
+        number = self.pending_probes[field] = self.probe_counter
+        status_label.setText("Checking...")
+        signals = self.probe_signals
+
+        def deliver(result):
+            try:
+                signals.finished.emit(field, number, result)
+            except RuntimeError:
+                pass   # The dialog was closed meanwhile
+
+        probe.start(text, deliver, self.probe_timeout)
+        # A hanging share never answers the first listing
+        QtCore.QTimer.singleShot(
+            int(self.probe_timeout * 1000) + 500, lambda: self.probe_timed_out(field, number)
+        )
+
+    def probe_timed_out(self, field, number):
+        if self.pending_probes.get(field) == number:
+            self.probe_fields[field][1].setText(
+                f"No answer after {self.probe_timeout:g} s, the share may be unreachable"
+            )
+
+    def show_probe(self, field, number, result):
+        # Results of paths edited since are dropped
+        if self.pending_probes.get(field) != number:
+            return
+        del self.pending_probes[field]
+        self.probe_fields[field][1].setText(describe_probe(result))
+
     def browse(self, line_edit):
         """Open a directory dialog for the given QLineEdit."""
         current_directory = line_edit.text()
@@ -102,8 +187,9 @@ class PreferencesWindow(QtWidgets.QDialog):
         local_path = self.local_scripts_le.text()
 
         if self.config.update_user_scripts_paths(network_path, local_path):
-            # Update the menu with the new settings
-            context_tab.add_menus()
+            # Rebuild once the dialog is closed, slow shares are scanned
+            # in the background and their menus filled in when they answer
+            maya.utils.executeDeferred(context_tab.rescan_and_update)
             self.close()
         else:
             QtWidgets.QMessageBox.warning(
@@ -0,0 +1,236 @@
+# script_browser.py
+"""
+Dockable browser over every script of the search index.
+The view only creates rows it shows, filtering happens in the model.
+"""
+
+# Maya imports
+import maya.OpenMayaUI as omui
+import maya.cmds as cmds
+
+maya_version = cmds.about(version=True)
+if not maya_version.startswith('2025'):
+    from PySide2 import QtWidgets, QtCore
+    from shiboken2 import wrapInstance, isValid
+else:
+    from PySide6 import QtWidgets, QtCore
+    from shiboken6 import wrapInstance, isValid
+
+from crudo_sm.user_interface.icons import IconCache
+
+WORKSPACE_CONTROL = "ScriptMateBrowserWorkspaceControl"
+KEY_ROLE = QtCore.Qt.UserRole
+# Enum lookups on QtCore.Qt are slow in PySide6 and data() is hot
+DISPLAY_ROLE = QtCore.Qt.DisplayRole
+DECORATION_ROLE = QtCore.Qt.DecorationRole
+TOOLTIP_ROLE = QtCore.Qt.ToolTipRole
+ALL = ""
+
+
+class ScriptBrowserModel(QtCore.QAbstractTableModel):
+    """
+        Rows are search index keys, most used first. Filters only
+        recompute the list of visible keys
+    """
+
+    COLUMNS = ("Name", "Category", "Library", "Path")
+    FIELDS = ("label", "category", "source", "path")
+
+    def __init__(self, index, parent=None):
+        super(ScriptBrowserModel, self).__init__(parent)
+        self.search_index = index
+        self.keys = []
+        self.rows = []
+        self.text = ""
+        self.category = ALL
+        self.source = ALL
+        self.sort_field = None   # None keeps the usage order of the index
+        self.sort_reverse = False
+        self.reload()
+
+    def reload(self):
+        """Take the current content of the index, e.g. after a rescan."""
+        self.beginResetModel()
+        self.keys = self.search_index.ranked()
+        self.rows = self._filtered()
+        self.endResetModel()
+
+    def set_filter(self, text=None, category=None, source=None):
+        if text is not None:
+            self.text = text
+        if category is not None:
+            self.category = category
+        if source is not None:
+            self.source = source
+        self.beginResetModel()
+        self.rows = self._filtered()
+        self.endResetModel()
+
+    def _filtered(self):
+        entries = self.search_index.entries
+        matching = self.search_index.matching(self.text) if self.text else None
+        rows = [
+            entries[key] for key in self.keys
+            if (matching is None or key in matching)
+            and (not self.category or entries[key].category == self.category)
+            and (not self.source or entries[key].source == self.source)
+        ]
+        if self.sort_field:
+            rows.sort(
+                key=lambda entry: getattr(entry, self.sort_field).lower(),
+                reverse=self.sort_reverse,
+            )
+        return rows
+
+    def categories(self):
+        return sorted({entry.category for entry in self.search_index.entries.values()})
+
+    def sources(self):
+        return sorted({entry.source for entry in self.search_index.entries.values() if entry.source})
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def data(self, index, role=DISPLAY_ROLE):
+        if role == DISPLAY_ROLE:
+            return getattr(self.rows[index.row()], self.FIELDS[index.column()])
+        if role == DECORATION_ROLE and index.column() == 0:
+            return IconCache.get(self.rows[index.row()].icon)
+        if role == TOOLTIP_ROLE:
+            return self.rows[index.row()].path
+        if role == KEY_ROLE:
+            return self.rows[index.row()].key
+        return None
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return self.COLUMNS[section]
+        return None
+
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        self.sort_field = self.FIELDS[column] if 0 <= column < len(self.FIELDS) else None
+        self.sort_reverse = order == QtCore.Qt.DescendingOrder
+        self.layoutAboutToBeChanged.emit()
+        self.rows = self._filtered()
+        self.layoutChanged.emit()
+
+
+class ScriptBrowser(QtWidgets.QWidget):
+
+    def __init__(self, index, on_activate, parent=None):
+        super(ScriptBrowser, self).__init__(parent)
+        self.on_activate = on_activate
+        self.model = ScriptBrowserModel(index, self)
+
+        self.create_widgets()
+        self.create_layouts()
+        self.create_connections()
+        self.refresh_filters()
+
+    def create_widgets(self):
+        self.filter_le = QtWidgets.QLineEdit()
+        self.filter_le.setPlaceholderText("Filter scripts...")
+        self.category_cb = QtWidgets.QComboBox()
+        self.source_cb = QtWidgets.QComboBox()
+
+        self.scripts_tv = QtWidgets.QTreeView()
+        self.scripts_tv.setModel(self.model)
+        self.scripts_tv.setRootIsDecorated(False)
+        self.scripts_tv.setUniformRowHeights(True)
+        self.scripts_tv.setAlternatingRowColors(True)
+        # No sort column until a header is clicked: rows keep the usage order
+        self.scripts_tv.header().setSortIndicator(-1, QtCore.Qt.AscendingOrder)
+        self.scripts_tv.setSortingEnabled(True)
+        self.scripts_tv.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.scripts_tv.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+
+    def create_layouts(self):
+        filter_layout = QtWidgets.QHBoxLayout()
+        filter_layout.addWidget(self.filter_le, 1)
+        filter_layout.addWidget(self.category_cb)
+        filter_layout.addWidget(self.source_cb)
+
+        main_layout = QtWidgets.QVBoxLayout(self)
+        main_layout.setContentsMargins(2, 2, 2, 2)
+        main_layout.addLayout(filter_layout)
+        main_layout.addWidget(self.scripts_tv)
+
+    def create_connections(self):
+        self.filter_le.textChanged.connect(lambda text: self.model.set_filter(text=text))
+        self.category_cb.currentIndexChanged.connect(
+            lambda *args: self.model.set_filter(category=self.category_cb.currentData())
+        )
+        self.source_cb.currentIndexChanged.connect(
+            lambda *args: self.model.set_filter(source=self.source_cb.currentData())
+        )
+        self.scripts_tv.activated.connect(self.activate)
+
+    def refresh_filters(self):
+        """Fill the category and library filters, keeping the current choice."""
+        for combo, label, values in (
+            (self.category_cb, "All categories", self.model.categories()),
+            (self.source_cb, "All libraries", self.model.sources()),
+        ):
+            current = combo.currentData() or ALL
+            combo.blockSignals(True)
+            combo.clear()
+            combo.addItem(label, ALL)
+            for value in values:
+                combo.addItem(value, value)
+            combo.setCurrentIndex(max(0, combo.findData(current)))
+            combo.blockSignals(False)
+        self.model.set_filter(
+            category=self.category_cb.currentData(), source=self.source_cb.currentData()
+        )
+
+    def reload(self):
+        self.model.reload()
+        self.refresh_filters()
+
+    def activate(self, index):
+        key = index.data(KEY_ROLE)
+        if key:
+            self.on_activate(key)
+
+
+browser = None
+
+
+def attach(index, on_activate):
+    """
+    Put a browser into the workspace control Maya is creating or
+    restoring, called through the control's uiScript.
+    """
+    global browser
+    control = wrapInstance(int(omui.MQtUtil.getCurrentParent()), QtWidgets.QWidget)
+    browser = ScriptBrowser(index, on_activate, control)
+    control.layout().addWidget(browser)
+
+
+def show(ui_script):
+    """
+    Open the browser as a dockable workspace control. `ui_script` builds
+    the panel, Maya runs it now and when it restores a saved workspace.
+    """
+    if cmds.workspaceControl(WORKSPACE_CONTROL, exists=True):
+        cmds.workspaceControl(WORKSPACE_CONTROL, edit=True, restore=True)
+        return
+
+    cmds.workspaceControl(
+        WORKSPACE_CONTROL,
+        label="ScriptMate Browser",
+        floating=True,
+        initialWidth=520,
+        initialHeight=640,
+        retain=False,
+        uiScript=ui_script,
+    )
+
+
+def refresh():
+    """Reload an open browser after the libraries were scanned again."""
+    if browser is not None and isValid(browser):
+        browser.reload()
@@ -0,0 +1,142 @@
+# search_palette.py
+"""
+Search palette popup over every loaded script
+"""
+
+# Maya imports
+import maya.OpenMayaUI as omui
+import maya.cmds as cmds
+
+maya_version = cmds.about(version=True)
+if not maya_version.startswith('2025'):
+    from PySide2 import QtWidgets, QtCore, QtGui
+    from shiboken2 import wrapInstance
+else:
+    from PySide6 import QtWidgets, QtCore, QtGui
+    from shiboken6 import wrapInstance
+
+from crudo_sm.user_interface.icons import IconCache
+
+RUNTIME_COMMAND = "ScriptMateSearchPalette"
+MAX_RESULTS = 30
+KEY_ROLE = QtCore.Qt.UserRole
+
+
+def maya_main_window():
+    main_window_ptr = omui.MQtUtil.mainWindow()
+    return wrapInstance(int(main_window_ptr), QtWidgets.QWidget)
+
+
+class SearchPalette(QtWidgets.QDialog):
+
+    def __init__(self, index, on_activate, parent=None):
+        super(SearchPalette, self).__init__(parent or maya_main_window())
+        self.index = index
+        self.on_activate = on_activate
+        self.setWindowFlags(QtCore.Qt.Popup)
+        self.setMinimumWidth(520)
+
+        self.create_widgets()
+        self.create_layouts()
+        self.create_connections()
+
+    def create_widgets(self):
+        self.search_le = QtWidgets.QLineEdit()
+        self.search_le.setPlaceholderText("Search scripts...")
+        self.search_le.installEventFilter(self)
+        self.results_lw = QtWidgets.QListWidget()
+        self.results_lw.setUniformItemSizes(True)
+
+    def create_layouts(self):
+        main_layout = QtWidgets.QVBoxLayout(self)
+        main_layout.setContentsMargins(4, 4, 4, 4)
+        main_layout.addWidget(self.search_le)
+        main_layout.addWidget(self.results_lw)
+
+    def create_connections(self):
+        self.search_le.textChanged.connect(self.refresh)
+        self.search_le.returnPressed.connect(self.activate_current)
+        self.results_lw.itemActivated.connect(self.activate_item)
+
+    def eventFilter(self, watched, event):
+        """Let arrow keys move the selection while typing."""
+        if watched is self.search_le and event.type() == QtCore.QEvent.KeyPress:
+            if event.key() in (QtCore.Qt.Key_Up, QtCore.Qt.Key_Down):
+                row = self.results_lw.currentRow()
+                step = -1 if event.key() == QtCore.Qt.Key_Up else 1
+                row = max(0, min(self.results_lw.count() - 1, row + step))
+                self.results_lw.setCurrentRow(row)
+                return True
+        return super(SearchPalette, self).eventFilter(watched, event)
+
+    def refresh(self, text):
+        self.results_lw.clear()
+        for entry in self.index.search(text, limit=MAX_RESULTS):
+            item = QtWidgets.QListWidgetItem(
+                IconCache.get(entry.icon), f"{entry.label}    {entry.category} · {entry.path}"
+            )
+            item.setData(KEY_ROLE, entry.key)
+            self.results_lw.addItem(item)
+        if self.results_lw.count():
+            self.results_lw.setCurrentRow(0)
+
+    def activate_current(self):
+        item = self.results_lw.currentItem()
+        if item:
+            self.activate_item(item)
+
+    def activate_item(self, item):
+        key = item.data(KEY_ROLE)
+        self.close()
+        # Run after the popup is gone so the script gets a clean UI state
+        cmds.evalDeferred(lambda: self.on_activate(key))
+
+
+def show(index, on_activate):
+    global palette
+    try:
+        palette.close()
+        palette.deleteLater()
+    except:
+        pass
+
+    palette = SearchPalette(index, on_activate)
+    palette.move(QtGui.QCursor.pos() - QtCore.QPoint(palette.minimumWidth() // 2, 16))
+    palette.show()
+    palette.search_le.setFocus()
+
+
+def register_hotkey(command, shortcut):
+    """
+    Create a runtime command for the palette and bind `shortcut`
+    (e.g. "ctrl+alt+f") in the current hotkey set when it is editable.
+    """
+    if not cmds.runTimeCommand(RUNTIME_COMMAND, exists=True):
+        cmds.runTimeCommand(
+            RUNTIME_COMMAND,
+            annotation="Open the ScriptMate search palette",
+            category="Custom Scripts.ScriptMate",
+            commandLanguage="python",
+            command=command,
+        )
+    name_command = f"{RUNTIME_COMMAND}NameCommand"
+    cmds.nameCommand(
+        name_command, annotation=RUNTIME_COMMAND, sourceType="mel", command=RUNTIME_COMMAND
+    )
+
+    if not shortcut:
+        return
+    if cmds.hotkeySet(query=True, current=True) == "Maya_Default":
+        # The default set is locked; users bind the runtime command themselves
+        print(f"ScriptMate: assign '{RUNTIME_COMMAND}' in the Hotkey Editor to open the search palette")
+        return
+
+    *modifiers, key = shortcut.lower().split("+")
+    cmds.hotkey(
+        keyShortcut=key,
+        ctrlModifier="ctrl" in modifiers,
+        altModifier="alt" in modifiers,
+        shiftModifier="shift" in modifiers,
+        commandModifier="cmd" in modifiers,
+        name=name_command,
+    )
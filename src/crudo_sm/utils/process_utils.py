@@ -0,0 +1,30 @@
+"""
+    Process utils library
+"""
+import os
+
+STILL_ACTIVE = 259
+
+
+def pid_alive(pid: int) -> bool:
+    """
+    True while a process with this id runs; the process is never signalled.
+    """
+    if os.name == "nt":
+        # os.kill would terminate the process on Windows
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)   # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(code))
+        kernel32.CloseHandle(handle)
+        return code.value == STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
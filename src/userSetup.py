@@ -1,5 +1,22 @@
 # Load main.py file
 # This wrapper needed to load plugin
 # only when maya fully loaded
+import os
+import sys
+import importlib.util
+
 import maya.cmds as cmds
+
+# Release builds may ship the package precompiled as one archive per
+# Python version (crudo_sm.cpython-311.zip, ...): import from the one
+# matching this Maya, the source tree stays the fallback
+_spec = importlib.util.find_spec("crudo_sm")
+if _spec is not None and _spec.origin:
+    _archive = os.path.join(
+        os.path.dirname(os.path.dirname(_spec.origin)),
+        f"crudo_sm.{sys.implementation.cache_tag}.zip",
+    )
+    if os.path.isfile(_archive) and _archive not in sys.path:
+        sys.path.insert(0, _archive)
+
 cmds.evalDeferred("import crudo_sm.main")
@@ -0,0 +1,51 @@
+# test_search_index.py
+# -*- coding: utf-8 -*-
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from crudo_sm.core.search_index import SearchIndex  # noqa: E402
+
+SCRIPTS = [
+    ("cleanup", "Cleanup Scene", "Modeling"),
+    ("export_fbx", "Export FBX", "Pipeline"),
+    ("rename", "Batch Rename", "Utils"),
+]
+
+
+def build(count):
+    index = SearchIndex()
+    for i in range(count):
+        key, label, category = SCRIPTS[i] if i < len(SCRIPTS) else (f"tool{i}", f"Tool {i}", "Misc")
+        index.add(key, label, category, f"/studio/lib/menu_{category}/{key}.py")
+    return index
+
+
+def keys(index, text):
+    return [entry.key for entry in index.search(text)]
+
+
+class FuzzyMatchTest(unittest.TestCase):
+
+    def test_typos_in_small_index(self):
+        for count in (1, 2, 3):
+            index = build(count)
+            self.assertEqual(keys(index, "cleanpu"), ["cleanup"], count)
+        index = build(3)
+        self.assertEqual(keys(index, "exprt fbx"), ["export_fbx"])
+        self.assertEqual(keys(index, "renmae"), ["rename"])
+
+    def test_typos_in_larger_index(self):
+        index = build(12)
+        self.assertEqual(keys(index, "cleanpu"), ["cleanup"])
+        self.assertEqual(keys(index, "exprt fbx"), ["export_fbx"])
+
+    def test_unknown_text_matches_nothing(self):
+        for count in (3, 12):
+            self.assertEqual(keys(build(count), "qqqx"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()